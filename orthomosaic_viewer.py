@@ -38,11 +38,12 @@ from qgis.gui import QgsMapCanvas, QgsMapToolPan, QgsMapToolZoom, QgsRubberBand
 class OrthomosaicViewer(QDialog):
     """Dialog to show orthomosaic at specific coordinates with synchronization support"""
     
-    def __init__(self, ecw_path, x_coord, y_coord, profile_pk, parent=None, bearing=None):
-        """Initialize with ECW path and coordinates"""
+    def __init__(self, ecw_path, x_coord, y_coord, profile_pk, parent=None, bearing=None, ortho_layer=None):
+        """Initialize with ECW path and coordinates (ortho_layer: capa ya cargada en segundo plano)"""
         super(OrthomosaicViewer, self).__init__(parent)
         
         self.ecw_path = ecw_path
+        self._preloaded_layer = ortho_layer
         self.x_coord = x_coord
         self.y_coord = y_coord
         self.profile_pk = profile_pk
@@ -231,12 +232,17 @@ class OrthomosaicViewer(QDialog):
         try:
             print("DEBUG - Cargando ortomosaico...")
             
-            # Create a temporary layer ID
-            import uuid
-            layer_id = f"ecw_viewer_{uuid.uuid4().hex[:8]}"
-            
-            # Create raster layer
-            self.ortho_layer = QgsRasterLayer(self.ecw_path, layer_id)
+            if self._preloaded_layer is not None:
+                # Capa construida por el visualizador de perfiles fuera del hilo de la GUI
+                self.ortho_layer = self._preloaded_layer
+                layer_id = self.ortho_layer.name()
+            else:
+                # Create a temporary layer ID
+                import uuid
+                layer_id = f"ecw_viewer_{uuid.uuid4().hex[:8]}"
+                
+                # Create raster layer
+                self.ortho_layer = QgsRasterLayer(self.ecw_path, layer_id)
             
             if not self.ortho_layer.isValid():
                 print(f"ERROR - El ortomosaico no es válido: {self.ecw_path}")
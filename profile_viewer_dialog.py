@@ -1,18 +1,34 @@
 
 import os
-from qgis.PyQt.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
+import logging
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from types import SimpleNamespace, MappingProxyType
+import numpy as np
+from qgis.PyQt.QtWidgets import (QDialog, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                                  QLabel, QSlider, QGroupBox, QMessageBox,
-                                 QFileDialog, QProgressDialog, QApplication, QSpinBox, QDoubleSpinBox, QShortcut)
-from qgis.PyQt.QtCore import Qt, QTimer
-from qgis.PyQt.QtXml import QDomDocument
+                                 QFileDialog, QProgressDialog, QApplication, QSpinBox, QDoubleSpinBox, QShortcut,
+                                 QToolBar, QStatusBar)
+from qgis.PyQt.QtCore import Qt, QTimer, QEvent, QObject, QThread, QCoreApplication, pyqtSignal, pyqtSlot
 from qgis.PyQt.QtGui import QFont, QKeySequence
 from qgis.core import (QgsApplication, QgsProject, QgsRasterLayer, QgsPointXY, QgsRectangle,
-                       QgsPrintLayout, QgsLayoutExporter, QgsLayoutItemHtml, QgsLayoutFrame,
-                       QgsLayoutItemPicture, QgsLayoutSize, QgsUnitTypes, QgsLayoutPoint, QgsReadWriteContext,
-                       QgsLayoutItemLabel)
+                       QgsMessageLog, Qgis)
+
+try:
+    from .utils.logging_config import get_logger
+except ImportError:
+    get_logger = lambda x: __import__('logging').getLogger(x)
+
+logger = get_logger(__name__)
 
 def diagnose_libraries():
-    """Diagnose library versions for debugging compatibility issues"""
+    """Diagnose library versions for debugging compatibility issues.
+
+    Solo se ejecuta con la variable de entorno REVANCHAS_DIAG definida.
+    """
+    if not os.environ.get("REVANCHAS_DIAG"):
+        return
     print("🔍 DIAGNÓSTICO DE LIBRERÍAS:")
     
     # Check NumPy
@@ -46,22 +62,22 @@ def diagnose_libraries():
     except Exception as e:
         print(f"  ❌ Matplotlib error: {e}")
     
-    # Check backend availability
-    try:
-        from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT
-        print(f"    ✅ NavigationToolbar2QT (qt5agg) disponible")
-    except Exception:
-        print(f"    ⚠️ NavigationToolbar2QT (qt5agg) no disponible")
-        try:
-            from matplotlib.backends.backend_qtagg import NavigationToolbar2QT
-            print(f"    ✅ NavigationToolbar2QT (qtagg) disponible")
-        except Exception:
-            print(f"    ❌ NavigationToolbar2QT no disponible en ningún backend")
+    # Check backend availability (ya resuelto al importar el módulo)
+    if HAS_MATPLOTLIB:
+        print(f"    ✅ NavigationToolbar2QT disponible ({NavigationToolbar.__module__})")
+    else:
+        print(f"    ❌ NavigationToolbar2QT no disponible en ningún backend")
 
 try:
     import matplotlib.pyplot as plt
+    from matplotlib import rc_context
     from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
     from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection, PolyCollection
+    from matplotlib.image import imsave
+    from matplotlib.colors import to_rgba
+    from matplotlib.lines import Line2D
     from matplotlib.offsetbox import AnchoredOffsetbox, TextArea, VPacker # 🆕 For multi-color legend
     
     # Handle different versions of matplotlib NavigationToolbar
@@ -85,6 +101,215 @@ except ImportError:
         def __init__(self, *args, **kwargs):
             pass
 
+# Resultado cacheado de la verificación de matplotlib/NavigationToolbar (una vez por sesión)
+_MPL_TOOLBAR_OK = None
+
+
+def _check_mpl():
+    """Verifica una sola vez que Figure/FigureCanvas/NavigationToolbar funcionan"""
+    global _MPL_TOOLBAR_OK
+    if _MPL_TOOLBAR_OK is None:
+        if not HAS_MATPLOTLIB:
+            _MPL_TOOLBAR_OK = False
+        else:
+            try:
+                test_fig = Figure(figsize=(1, 1))
+                test_canvas = FigureCanvas(test_fig)
+                NavigationToolbar(test_canvas, None)
+                _MPL_TOOLBAR_OK = True
+                print("✅ Matplotlib y NavigationToolbar funcionando correctamente")
+            except Exception as e:
+                print(f"⚠️ Error al inicializar matplotlib/NavigationToolbar: {e}")
+                _MPL_TOOLBAR_OK = False
+    return _MPL_TOOLBAR_OK
+
+
+# Numba es opcional (no viene con QGIS): sin él se usa el kernel NumPy equivalente
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def _boundary_scan_numpy(d, e, y0, want_min):
+    """X extremo donde el perfil (d, e) cruza la cota y0; NaN si no hay cruce.
+
+    Mismo criterio que el barrido original: cruce inclusivo entre puntos adyacentes,
+    interpolación lineal si |dy| > 1 mm y, en tramos planos, el punto más alejado del eje.
+    """
+    y1, y2 = e[:-1], e[1:]
+    hit = ((y1 <= y0) & (y0 <= y2)) | ((y2 <= y0) & (y0 <= y1))
+    if not hit.any():
+        return np.nan
+    x1, x2 = d[:-1][hit], d[1:][hit]
+    a, b = y1[hit], y2[hit]
+    dy = b - a
+    # División segura: solo en tramos con |dy| > 1 mm, el resto toma el punto más alejado del eje
+    safe = np.abs(dy) > 0.001
+    ratio = np.zeros_like(dy)
+    np.divide(y0 - a, dy, out=ratio, where=safe)
+    flat = np.where(np.abs(x2) > np.abs(x1), x2, x1)
+    xs = np.where(safe, x1 + ratio * (x2 - x1), flat)
+    return float(xs.min() if want_min else xs.max())
+
+
+def _horizontal_crossings(d, e, y0):
+    """Todas las X (en orden de perfil) donde el tramo entre puntos adyacentes corta la cota y0.
+
+    Los tramos casi planos (|dy| <= 1 mm) se descartan, como en la búsqueda original.
+    """
+    y1, y2 = e[:-1], e[1:]
+    dy = y2 - y1
+    hit = (((y1 <= y0) & (y0 <= y2)) | ((y2 <= y0) & (y0 <= y1))) & (np.abs(dy) > 0.001)
+    i = np.flatnonzero(hit)
+    return d[i] + (y0 - y1[i]) / dy[i] * (d[i + 1] - d[i])
+
+
+def _closest_crossing_numpy(d, e, y0, x_click):
+    """X del cruce con la cota y0 más cercano a x_click (primero en empates); NaN si no hay"""
+    xs = _horizontal_crossings(d, e, y0)
+    if not xs.size:
+        return np.nan
+    return float(xs[np.argmin(np.abs(xs - x_click))])
+
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _boundary_scan_jit(d, e, y0, want_min):
+        found = False
+        best = 0.0
+        for i in range(d.shape[0] - 1):
+            y1 = e[i]
+            y2 = e[i + 1]
+            if (y1 <= y0 <= y2) or (y2 <= y0 <= y1):
+                if abs(y2 - y1) > 0.001:
+                    x = d[i] + (y0 - y1) / (y2 - y1) * (d[i + 1] - d[i])
+                elif abs(d[i + 1]) > abs(d[i]):
+                    x = d[i + 1]
+                else:
+                    x = d[i]
+                if not found or (want_min and x < best) or (not want_min and x > best):
+                    best = x
+                    found = True
+        return best if found else np.nan
+
+    @njit(cache=True)
+    def _horizontal_crossings_jit(d, e, y0):
+        out = np.empty(max(d.shape[0] - 1, 0), dtype=np.float64)
+        n = 0
+        for i in range(d.shape[0] - 1):
+            y1 = e[i]
+            y2 = e[i + 1]
+            if ((y1 <= y0 <= y2) or (y2 <= y0 <= y1)) and abs(y2 - y1) > 0.001:
+                out[n] = d[i] + (y0 - y1) / (y2 - y1) * (d[i + 1] - d[i])
+                n += 1
+        return out[:n]
+
+    @njit(cache=True)
+    def _closest_crossing_jit(d, e, y0, x_click):
+        best = np.nan
+        best_dist = np.inf
+        for i in range(d.shape[0] - 1):
+            y1 = e[i]
+            y2 = e[i + 1]
+            if ((y1 <= y0 <= y2) or (y2 <= y0 <= y1)) and abs(y2 - y1) > 0.001:
+                x = d[i] + (y0 - y1) / (y2 - y1) * (d[i + 1] - d[i])
+                if abs(x - x_click) < best_dist:
+                    best = x
+                    best_dist = abs(x - x_click)
+        return best
+
+    _boundary_scan = _boundary_scan_jit
+    _find_intersections = _horizontal_crossings_jit
+    _closest_crossing = _closest_crossing_jit
+else:
+    _boundary_scan = _boundary_scan_numpy
+    _find_intersections = _horizontal_crossings
+    _closest_crossing = _closest_crossing_numpy
+
+
+@contextmanager
+def _ui_batch(widget):
+    """Congela el repintado de widget mientras se actualizan varias etiquetas hijas.
+
+    Anidable: solo el bloque más externo reactiva y pide un único update().
+    """
+    if widget is None or not widget.updatesEnabled():
+        yield
+        return
+    widget.setUpdatesEnabled(False)
+    try:
+        yield
+    finally:
+        widget.setUpdatesEnabled(True)
+        widget.update()
+
+
+def _write_png(rgba, path, dpi):
+    """Codifica un buffer RGBA ya renderizado a PNG (para un hilo de fondo: zlib suelta el GIL).
+
+    compress_level=1: mismos píxeles que savefig, archivo algo mayor pero mucho más rápido.
+    """
+    imsave(path, rgba, format='png', dpi=dpi, pil_kwargs={'compress_level': 1})
+
+
+# Simplificación de trazo para las líneas de terreno: se descartan vértices que desvían
+# menos de medio píxel (el default de matplotlib es 1/9 px)
+_TERRAIN_SIMPLIFY = {'path.simplify': True, 'path.simplify_threshold': 0.5}
+
+if HAS_MATPLOTLIB:
+    class _TerrainLine(Line2D):
+        """Line2D que dibuja con _TERRAIN_SIMPLIFY.
+
+        El umbral se lee al crear cada Path, y con >1000 puntos ordenados Line2D arma en
+        draw() un Path nuevo para el tramo visible: por eso el rc_context va en draw() y
+        no al asignar los datos. No toca los rcParams globales de la sesión de QGIS.
+        """
+
+        def draw(self, renderer):
+            with rc_context(_TERRAIN_SIMPLIFY):
+                super().draw(renderer)
+
+# Mediciones de un PK sin nada guardado, y default vacío de los .get anidados sin crear un {} por llamada
+# (solo lectura: para escribir usar _ensure_current_measurements)
+_NO_MEASUREMENTS = MappingProxyType({})
+
+# Cajas UTM (nombre, x0, x1, y0, y1) de cada muro; "Muro Principal" primero por ser el más común
+_WALL_BOXES = (
+    ("Muro Principal", 336688, 337997, 6334170, 6334753),
+    ("Muro Oeste", 336193, 336328, 6332549, 6333195),
+    ("Muro Este", 339816, 340114, 6333743, 6334206),
+)
+
+# Fila de la tabla de detalle del reporte: un solo format por fila (ver generate_detail_html_table)
+_DETAIL_ROW_TEMPLATE = (
+    "<tr><td>{sector}</td><td>{pk}</td><td>{crown}</td>"
+    "<td class='{revancha_cls}'>{revancha}</td><td>{lama}</td><td class='{ancho_cls}'>{ancho}</td>"
+    "<td class='geo-col'>{geo}</td><td class='{dgl_cls}'>{dgl}</td><td class='{dgc_cls}'>{dgc}</td></tr>"
+)
+
+
+class OrthoLoader(QObject):
+    """Construye el QgsRasterLayer del ortomosaico fuera del hilo de la GUI"""
+    finished = pyqtSignal(object)  # QgsRasterLayer (o None si falló)
+    
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+    
+    @pyqtSlot()
+    def run(self):
+        layer = None
+        try:
+            import uuid
+            layer = QgsRasterLayer(self.path, f"ecw_viewer_{uuid.uuid4().hex[:8]}")
+            # La capa nace con afinidad al hilo worker: devolverla al hilo principal
+            layer.moveToThread(QCoreApplication.instance().thread())
+        except Exception as e:
+            logger.warning("No se pudo cargar el ortomosaico %s: %s", self.path, e)
+        self.finished.emit(layer)
+
 
 class CustomNavigationToolbar(NavigationToolbar):
     """Custom navigation toolbar with essential topographic tools only"""
@@ -93,22 +318,21 @@ class CustomNavigationToolbar(NavigationToolbar):
         super().__init__(canvas, parent)
         self.profile_viewer = profile_viewer
         
-        # Remove ALL unwanted buttons and keep only essential ones
-        actions = self.actions()
-        
-        # Keep only: Home, Pan, Zoom
-        wanted_actions = ['home', 'pan', 'zoom']
+        # Keep only: Home, Pan, Zoom (whitelist positiva sobre el dict _actions de matplotlib)
+        wanted_actions = ('home', 'pan', 'zoom')
+        mpl_actions = getattr(self, '_actions', None)
         
-        # Remove all actions except the ones we want
-        for action in actions:
-            if hasattr(action, 'text') and action.text():
-                action_text = action.text().lower()
-                # Remove back, forward, configure, coordinates, etc.
-                if not any(wanted in action_text for wanted in wanted_actions):
-                    self.removeAction(action)
-            elif hasattr(action, 'toolTip') and action.toolTip():
-                tooltip_text = action.toolTip().lower()
-                if 'back' in tooltip_text or 'forward' in tooltip_text or 'configure' in tooltip_text:
+        if mpl_actions:
+            kept = [mpl_actions[name] for name in wanted_actions if name in mpl_actions]
+            # Remove back, forward, configure, coordinates, etc.
+            self.clear()
+            for action in kept:
+                self.addAction(action)
+        else:
+            # Fallback para versiones antiguas sin _actions: filtrar por texto
+            for action in self.actions():
+                action_text = action.text().lower() if action.text() else ''
+                if action_text and not any(wanted in action_text for wanted in wanted_actions):
                     self.removeAction(action)
         
         # Add ONLY zoom extent button
@@ -121,16 +345,18 @@ class CustomNavigationToolbar(NavigationToolbar):
         
         self.addSeparator()
         
-        # 🆕 Controles de rango de visualización
-        self.addSeparator()
+        # 🆕 Controles de rango de visualización (un solo contenedor -> una sola QWidgetAction)
+        range_widget = QWidget()
+        range_layout = QHBoxLayout(range_widget)
+        range_layout.setContentsMargins(0, 0, 0, 0)
         
         # Label para rango
         range_label = QLabel("  Rango (m):")
         range_label.setStyleSheet("font-weight: bold; padding: 5px;")
-        self.addWidget(range_label)
+        range_layout.addWidget(range_label)
         
         # SpinBox para límite izquierdo (negativo)
-        self.addWidget(QLabel(" Izq:"))
+        range_layout.addWidget(QLabel(" Izq:"))
         self.left_limit_spin = QSpinBox()
         self.left_limit_spin.setMinimum(-70)
         self.left_limit_spin.setMaximum(0)
@@ -138,10 +364,10 @@ class CustomNavigationToolbar(NavigationToolbar):
         self.left_limit_spin.setSuffix("m")
         self.left_limit_spin.setToolTip("Límite izquierdo del perfil (-70 a 0)")
         self.left_limit_spin.valueChanged.connect(self.on_range_changed)
-        self.addWidget(self.left_limit_spin)
+        range_layout.addWidget(self.left_limit_spin)
         
         # SpinBox para límite derecho (positivo)
-        self.addWidget(QLabel(" Der:"))
+        range_layout.addWidget(QLabel(" Der:"))
         self.right_limit_spin = QSpinBox()
         self.right_limit_spin.setMinimum(0)
         self.right_limit_spin.setMaximum(70)
@@ -149,14 +375,15 @@ class CustomNavigationToolbar(NavigationToolbar):
         self.right_limit_spin.setSuffix("m")
         self.right_limit_spin.setToolTip("Límite derecho del perfil (0 a 70)")
         self.right_limit_spin.valueChanged.connect(self.on_range_changed)
-        self.addWidget(self.right_limit_spin)
+        range_layout.addWidget(self.right_limit_spin)
         
         # Botón para aplicar rango
         apply_range_btn = QPushButton("✓")
         apply_range_btn.setMaximumWidth(30)
         apply_range_btn.setToolTip("Aplicar rango personalizado")
         apply_range_btn.clicked.connect(self.apply_custom_range)
-        self.addWidget(apply_range_btn)
+        range_layout.addWidget(apply_range_btn)
+        self.addWidget(range_widget)
         
         self.addSeparator()
         
@@ -182,38 +409,15 @@ class CustomNavigationToolbar(NavigationToolbar):
     def zoom_to_profile_extent(self):
         """Zoom to full profile extent with wall-specific ranges"""
         ax = self.profile_viewer.ax
-        profile = self.profile_viewer.profiles_data[self.profile_viewer.current_profile_index]
-        
-        # 🆕 OBTENER RANGO ESPECÍFICO DEL MURO
-        x_min, x_max = self.profile_viewer.get_wall_display_range(profile)
         
-        # Get valid elevations for Y-axis
-        distances = profile.get('distances', [])
-        elevations = profile.get('elevations', [])
-        valid_data = [(d, e) for d, e in zip(distances, elevations) 
-                    if e != -9999 and x_min <= d <= x_max]  # 🔧 USAR RANGO DINÁMICO
+        # 🆕 EXTENSIÓN CACHEADA (rango del muro + cotas válidas + coronamiento)
+        x_min, x_max, y_min, y_max, _ = self.profile_viewer.get_profile_extent()
         
-        if valid_data:
-            valid_distances, valid_elevations = zip(*valid_data)
-            
-            # Include reference lines if they exist
-            current_pk = profile['pk']
-            crown_elevation = None
-            if current_pk in self.profile_viewer.saved_measurements and 'crown' in self.profile_viewer.saved_measurements[current_pk]:
-                crown_elevation = self.profile_viewer.saved_measurements[current_pk]['crown']['y']
-            elif self.profile_viewer.current_crown_point:
-                crown_elevation = self.profile_viewer.current_crown_point[1]
-            
-            y_values = list(valid_elevations)
-            if crown_elevation is not None:
-                y_values.extend([crown_elevation, crown_elevation - 1.0])
-            
-            margin_y = (max(y_values) - min(y_values)) * 0.05
-            
+        if y_min is not None:
             # 🆕 USAR RANGOS DINÁMICOS
             ax.set_xlim(x_min, x_max)
-            ax.set_ylim(min(y_values) - margin_y, max(y_values) + margin_y)
-            self.profile_viewer.canvas.draw()
+            ax.set_ylim(y_min, y_max)
+            self.profile_viewer.canvas.draw_idle()
             self.update_zoom_label()
     
     def on_zoom_changed(self, ax):
@@ -257,14 +461,15 @@ class CustomNavigationToolbar(NavigationToolbar):
         # Actualizar el rango personalizado en el profile_viewer
         self.profile_viewer.custom_range_left = left
         self.profile_viewer.custom_range_right = right
+        self.profile_viewer.invalidate_extent_cache()
         
         # Redibujar el perfil con el nuevo rango
-        self.profile_viewer.update_profile_display()
+        self.profile_viewer._schedule_redraw()
     
     def toggle_legend(self):
         """Activar/desactivar la visualización de la leyenda"""
         self.profile_viewer.show_legend = self.legend_btn.isChecked()
-        self.profile_viewer.update_profile_display()
+        # Síncrono: un redibujado diferido volvería a fijar los límites home después del zoom
         self.profile_viewer.update_profile_display()
         
         # Zoom a la extensión completa del nuevo rango
@@ -273,6 +478,48 @@ class CustomNavigationToolbar(NavigationToolbar):
 
 class InteractiveProfileViewer(QDialog):
     """Interactive profile viewer with navigation and measurement tools"""
+
+    # Estilos/textos del estado de auto-detección: objetos únicos reutilizados en cada actualización
+    _STYLE_OK = "color: green; font-style: italic;"
+    _STYLE_WARN = "color: orange; font-style: italic;"
+    _STYLE_INFO = "color: blue; font-style: italic;"
+    _STYLE_INFO_BOLD = "color: blue; font-weight: bold;"
+    _STYLE_ACTIVE = "color: purple; font-style: italic; font-weight: bold;"
+    _STYLE_ERROR = "color: red; font-style: italic; font-weight: bold;"
+    _STYLE_VALUE_ALERT = "color: red;"
+    _TEXT_AUTO_ON = "🤖 Auto-Detección: ON"
+    _TEXT_AUTO_OFF = "🤖 Auto-Detección: OFF"
+    _TEXT_WIDTH_ACTIVE = "Herramienta Ancho activa - Presiona 'A' para auto-snap"
+    _STYLE_BTN_CSV = "background-color: #4CAF50; color: white; font-weight: bold; padding: 8px;"
+    _STYLE_BTN_PDF = "background-color: #d32f2f; color: white; font-weight: bold; padding: 8px;"
+    
+    # Botones del panel de medición: (fila, atributo, texto, estilo, checkable, slot, argumento).
+    # Cada botón se crea y conecta una sola vez en create_measurement_panel.
+    # Líneas horizontales de referencia por modo, de abajo hacia arriba en el dibujo:
+    # (desplazamiento sobre la cota base, color, estilo, ancho, alpha, etiqueta)
+    _REF_LINE_SPECS = {
+        'ancho_proyectado': (
+            (2.0, 'gray', ':', 1.0, 0.4, 'Visual +2m: {:.2f}m'),
+            (0.0, 'yellow', ':', 2.0, 0.8, 'Lama: {:.2f}m'),
+            (3.0, 'orange', '--', 2.5, 1.0, 'Ref. +3m: {:.2f}m'),
+        ),
+        'revancha': (
+            (-1.0, 'gray', ':', 1.5, 0.6, 'Auxiliar (-1m): {:.2f}m'),
+            (0.0, 'orange', '--', 2.5, 1.0, 'Ref. Coronamiento: {:.2f}m'),
+        ),
+    }
+
+    # Márgenes fijos de la figura del perfil (interactiva y de exportación)
+    _FIGURE_MARGINS = dict(left=0.07, right=0.98, top=0.95, bottom=0.08)
+
+    _BUTTON_SPECS = (
+        (1, 'lama_btn', "🟡 Modificar LAMA (Z)", None, True, 'set_measurement_mode', 'lama'),
+        (1, 'crown_btn', "📍 Cota Coronamiento (X)", None, True, 'set_measurement_mode', 'crown'),
+        (1, 'width_btn', "📏 Medir Ancho (C)", None, True, 'set_measurement_mode', 'width'),
+        (1, 'clear_btn', "🗑️ Limpiar", None, False, 'clear_current_measurements', None),
+        (3, 'export_btn', "📊 Exportar Mediciones", _STYLE_BTN_CSV, False, 'export_measurements_to_csv', None),
+        (3, 'export_pdf_btn', "📄 Generar Reporte PDF", _STYLE_BTN_PDF, False, 'export_pdf_report', None),
+    )
     
     def __init__(self, profiles_data, parent=None, ecw_file_path=None, excel_file_path=None, dem_path=None):
         super().__init__(parent)
@@ -281,6 +528,7 @@ class InteractiveProfileViewer(QDialog):
         diagnose_libraries()
         
         self.profiles_data = profiles_data
+        self._prepare_profile_arrays()
         self.current_profile_index = 0
         self.measurement_mode = None
         self.ecw_file_path = ecw_file_path  # Store ECW file path
@@ -289,10 +537,26 @@ class InteractiveProfileViewer(QDialog):
         
         # Separate measurements per PK
         self.saved_measurements = {}  # PK -> {crown: {x, y}, width: {p1, p2, distance}}
+        # PK actual y sus mediciones, cacheados (ver _refresh_current_refs)
+        self._current_pk = None
+        self._current_measurements = _NO_MEASUREMENTS
+        self._refresh_current_refs()
+        # Leyendas de captura por PK: pk -> (valores mostrados, caja armada), ver _add_export_legend
+        self._legend_cache = {}
+        # Figura Agg para capturas de alertas (se crea en el primer uso, ver _export_profile_png)
+        self._offscreen = None
+        # Padre de las etiquetas de resultado (se asigna en create_measurement_panel)
+        self._result_panel = None
+        # Última revancha mostrada: (entradas, texto revancha, texto LAMA, valor)
+        self._last_revancha = None
+        # _set_value_label: label -> ((plantilla, valor), texto mostrado)
+        self._label_cache = {}
         
         # Current temporary measurements (reset when changing PK)
         self.current_crown_point = None
-        self.current_width_points = []
+        # Ancho manual en curso: buffer fijo de 2 puntos + cursor (0 = sin punto pendiente)
+        self._wp = [None, None]
+        self._wp_i = 0
         
         # Auto-detection parameters
         self.auto_width_detection = True
@@ -303,6 +567,53 @@ class InteractiveProfileViewer(QDialog):
         self.custom_range_left = -40  # Default: -40m
         self.custom_range_right = 40  # Default: +40m
         
+        # 🆕 Cache de extensión por perfil: (índice, rango, cota corona) -> límites
+        self._extent_cache = {}
+        # PK en texto -> float (parse_pk), lo usan los ordenamientos del reporte
+        self._pk_cache = {}
+        # Constantes del scroll para el perfil mostrado (se recalculan en update_profile_display)
+        self._scroll_consts = None
+        
+        # 🆕 Coalescer de scroll: acumula límites y redibuja como máximo cada 16 ms
+        self._pending_xylim = None
+        self._redraw_timer = QTimer(self)
+        self._redraw_timer.setSingleShot(True)
+        self._redraw_timer.setInterval(16)
+        self._redraw_timer.timeout.connect(self._flush_scroll)
+        
+        # 🆕 Redibujado diferido (~30 fps): ráfagas de cambios de estado -> un solo update_profile_display
+        self._redraw_pending = False
+        self._display_timer = QTimer(self)
+        self._display_timer.setSingleShot(True)
+        self._display_timer.setInterval(33)
+        self._display_timer.timeout.connect(self._do_redraw)
+        
+        # 🆕 Sincronización con el ortomosaico diferida: varias mediciones seguidas -> un solo envío
+        self._ortho_sync_timer = QTimer(self)
+        self._ortho_sync_timer.setSingleShot(True)
+        self._ortho_sync_timer.setInterval(50)
+        self._ortho_sync_timer.timeout.connect(self.sync_measurements_to_orthomosaic)
+        
+        # 🆕 Panel de información diferido: se rellena al volver al event loop, tras el dibujo
+        # del canvas (_pending_info: último perfil renderizado, solo se aplica el más reciente)
+        self._pending_info = None
+        self._info_panel = None
+        self._info_timer = QTimer(self)
+        self._info_timer.setSingleShot(True)
+        self._info_timer.setInterval(0)
+        self._info_timer.timeout.connect(self._apply_info_panel)
+        
+        # 🆕 Blitting: fondo cacheado tras cada draw completo + artistas animados encima
+        # (_bg_key: estado estático del fondo, si no cambia las mediciones se blitean)
+        self._bg = None
+        self._bg_limits = None
+        self._bg_key = None
+        self._home_limits = None
+        self._animated_artists = []
+        
+        # 🆕 Artistas persistentes del gráfico (se actualizan con set_data, no se recrean)
+        self._artists = {}
+        
         # 🆕 Legend visibility control (desactivada por defecto)
         self.show_legend = False
         
@@ -314,24 +625,18 @@ class InteractiveProfileViewer(QDialog):
         
         # 🆕 Referencia al visualizador de ortomosaico (si está abierto)
         self.ortho_viewer = None
+        # Carga del ECW en segundo plano (hilo + worker) y capa ya cargada para reutilizar
+        self._ortho_thread = None
+        self._ortho_loader = None
+        self._ortho_request = None
+        self._ortho_layer = None
         
         self.setWindowTitle("Visualizador Interactivo de Perfiles")
         self.setModal(True)
         self.resize(1200, 800)
         
-        # Verify matplotlib functionality before proceeding
-        matplotlib_working = False
-        if HAS_MATPLOTLIB:
-            try:
-                # Test if NavigationToolbar is properly imported and functional
-                test_fig = Figure(figsize=(1, 1))
-                test_canvas = FigureCanvas(test_fig)
-                test_toolbar = NavigationToolbar(test_canvas, self)
-                matplotlib_working = True
-                print("✅ Matplotlib y NavigationToolbar funcionando correctamente")
-            except Exception as e:
-                print(f"⚠️ Error al inicializar matplotlib/NavigationToolbar: {e}")
-                matplotlib_working = False
+        # Verify matplotlib functionality before proceeding (cacheado a nivel de módulo)
+        matplotlib_working = _check_mpl()
         
         if matplotlib_working:
             self.init_ui()
@@ -339,20 +644,112 @@ class InteractiveProfileViewer(QDialog):
             self.setup_keyboard_events()
         else:
             self.init_no_matplotlib()
-        
-        # AHORA es seguro acceder a self.canvas SOLO si matplotlib funciona:
-        self._key_A_pressed = False
-        if matplotlib_working and hasattr(self, 'canvas'):
-            self.canvas.setFocusPolicy(Qt.StrongFocus)
-            self.canvas.setFocus()
-            self.canvas.mpl_connect('key_press_event', self.on_key_press)
-            self.canvas.mpl_connect('key_release_event', self.on_key_release)
+
+    def _prepare_profile_arrays(self):
+        """Precalcula columnas NumPy float32 (SoA) de todos los perfiles para filtros vectorizados.
+
+        self._dists/self._elevs: matrices (n_perfiles, n_muestras) contiguas, rellenas con
+        NaN en perfiles más cortos; las cotas -9999 también pasan a NaN. Cada perfil guarda
+        vistas a su fila: _d/_e/_valid (distancias, cotas y máscara de cotas válidas);
+        self._n_valid[i]: nº de cotas != -9999 del perfil i (guardas de detección sin filtrar);
+        _pe: cotas del DEM anterior (o None); _sorted: si _d es monótona (permite recortar
+        rangos con búsqueda binaria). Las listas originales se conservan porque el diálogo
+        principal y core/ las siguen consumiendo.
+        """
+        lengths = [min(len(p.get('distances', [])), len(p.get('elevations', []))) for p in self.profiles_data]
+        n_samples = max(lengths, default=0)
+        self._dists = np.full((len(self.profiles_data), n_samples), np.nan, dtype=np.float32)
+        self._elevs = np.full((len(self.profiles_data), n_samples), np.nan, dtype=np.float32)
+        self._n_valid = np.zeros(len(self.profiles_data), dtype=np.intp)
+        
+        for i, (profile, n) in enumerate(zip(self.profiles_data, lengths)):
+            self._dists[i, :n] = profile.get('distances', [])[:n]
+            self._elevs[i, :n] = profile.get('elevations', [])[:n]
+            profile['_d'] = self._dists[i, :n]
+            profile['_e'] = self._elevs[i, :n]
+            nodata = profile['_e'] == -9999
+            self._n_valid[i] = n - np.count_nonzero(nodata)
+            profile['_e'][nodata] = np.nan
+            profile['_valid'] = ~np.isnan(profile['_e'])
+            profile['_sorted'] = bool(np.all(profile['_d'][1:] >= profile['_d'][:-1]))
+            previous = profile.get('previous_elevations')
+            profile['_pe'] = (np.asarray(previous, dtype=np.float32)
+                              if previous is not None and len(previous) == len(profile['_e']) and len(previous)
+                              else None)
+        
+        # Columnas float64 de puntos válidos ordenados (snap/detección), se llenan bajo demanda
+        self._valid_cache = {}
+        # Bordes auto-detectados por (índice, corona redondeada a mm, modo)
+        self._boundary_cache = {}
+        
+        # Clasificación de muro en una sola pasada (una máscara por caja)
+        if not self.profiles_data:
+            self._pk_labels, self._counter_labels, self._wall_names = [], [], []
+            return
+        xs = np.array([p.get('centerline_x', np.nan) for p in self.profiles_data], dtype=float)
+        ys = np.array([p.get('centerline_y', np.nan) for p in self.profiles_data], dtype=float)
+        wall_names = np.full(len(self.profiles_data), None, dtype=object)
+        for name, x0, x1, y0, y1 in _WALL_BOXES:
+            inside = (xs >= x0) & (xs <= x1) & (ys >= y0) & (ys <= y1)
+            wall_names[inside] = name  # cajas disjuntas
+        for profile, wall_name in zip(self.profiles_data, wall_names):
+            profile['_wall_name'] = wall_name
+        
+        # Etiquetas de navegación precalculadas (se leen por índice al arrastrar el slider)
+        total = len(self.profiles_data)
+        self._pk_labels = [f"{p.get('pk', 'Unknown')}" for p in self.profiles_data]
+        self._counter_labels = [f"{i + 1} / {total}" for i in range(total)]
+        self._wall_names = list(wall_names)
+
+    def _valid_arrays(self, index=None):
+        """(distancias, cotas) float64 de los puntos válidos del perfil, ordenadas por distancia.
+
+        Se construyen desde las listas originales (precisión completa, no float32) una
+        sola vez por perfil y se reutilizan en cada clic.
+        """
+        if index is None:
+            index = self.current_profile_index
+        arrays = self._valid_cache.get(index)
+        if arrays is None:
+            profile = self.profiles_data[index]
+            d = np.asarray(profile.get('distances', []), dtype=np.float64)
+            e = np.asarray(profile.get('elevations', []), dtype=np.float64)
+            valid = e != -9999
+            d, e = d[valid], e[valid]
+            order = np.argsort(d, kind='stable')
+            arrays = self._valid_cache[index] = (d[order], e[order])
+        return arrays
+
+    def _refresh_current_refs(self):
+        """Cachea el PK actual y su dict de mediciones (llamar al cambiar de perfil o de mediciones)"""
+        if not self.profiles_data:
+            return
+        self._current_pk = self.profiles_data[self.current_profile_index]['pk']
+        self._current_measurements = self.saved_measurements.get(self._current_pk, _NO_MEASUREMENTS)
+
+    def _ensure_current_measurements(self):
+        """Dict de mediciones del PK actual, creándolo en saved_measurements si aún no existe"""
+        if self._current_measurements is _NO_MEASUREMENTS:
+            self._current_measurements = self.saved_measurements.setdefault(self._current_pk, {})
+        return self._current_measurements
+
+    @staticmethod
+    def _range_index(profile, x_min, x_max):
+        """Índice (slice o máscara) de los puntos con x_min <= d <= x_max.
+
+        Las distancias vienen ordenadas a lo largo del perfil, así que basta con dos
+        búsquedas binarias; si no lo están se cae a la máscara completa.
+        """
+        d = profile['_d']
+        if profile.get('_sorted', False):
+            return slice(int(np.searchsorted(d, x_min, 'left')), int(np.searchsorted(d, x_max, 'right')))
+        return (d >= x_min) & (d <= x_max)
 
     def setup_keyboard_events(self):
         """Setup keyboard event handling after UI is created"""
         self.canvas.setFocusPolicy(Qt.StrongFocus)
-        self.canvas.mpl_connect('key_press_event', self.on_key_press)
-        self.canvas.mpl_connect('key_release_event', self.on_key_release)
+        # Tecla 'A' (auto-snap) vía filtro de eventos Qt, sin pasar por el puente de matplotlib
+        self.canvas.installEventFilter(self)
         
         # Add global shortcuts for measurement buttons (Z, X, C)
         self.shortcut_lama = QShortcut(QKeySequence("Z"), self)
@@ -373,38 +770,53 @@ class InteractiveProfileViewer(QDialog):
         # Ensure canvas gets focus immediately
         self.canvas.setFocus()
 
-    def on_key_press(self, event):
-        """Handle key press events"""
-        if event.key == 'a':
+    def eventFilter(self, obj, event):
+        """Detecta press/release de la tecla 'A' sobre el canvas (ignora autorepetición)"""
+        if obj is getattr(self, 'canvas', None) and event.type() in (QEvent.KeyPress, QEvent.KeyRelease):
+            if event.key() == Qt.Key_A and not event.isAutoRepeat():
+                if event.type() == QEvent.KeyPress:
+                    self.on_key_press()
+                else:
+                    self.on_key_release()
+        return super().eventFilter(obj, event)
+
+    def on_key_press(self):
+        """Handle 'A' key press"""
+        if not self._key_A_pressed:
             self._key_A_pressed = True
             # Visual feedback when A is pressed during width measurement
             if self.measurement_mode == 'width':
                 self.auto_status.setText("🎯 SNAP AUTOMÁTICO ACTIVO - Haz clic para intersección con terreno")
-                self.auto_status.setStyleSheet("color: red; font-style: italic; font-weight: bold;")
+                self.auto_status.setStyleSheet(self._STYLE_ERROR)
 
-    def on_key_release(self, event):
-        """Handle key release events"""
-        if event.key == 'a':
+    def on_key_release(self):
+        """Handle 'A' key release"""
+        if self._key_A_pressed:
             self._key_A_pressed = False
             # Restore normal status when A is released
             if self.measurement_mode == 'width':
-                self.auto_status.setText("Herramienta Ancho activa - Presiona 'A' para auto-snap")
-                self.auto_status.setStyleSheet("color: purple; font-style: italic; font-weight: bold;")
+                self.auto_status.setText(self._TEXT_WIDTH_ACTIVE)
+                self.auto_status.setStyleSheet(self._STYLE_ACTIVE)
 
     def on_mouse_scroll(self, event):
         """Handle mouse wheel zoom - UPDATED for new range"""
         if not event.inaxes:
             return
         
-        # Get current axis limits
+        # Get current axis limits (los pendientes si hay una ráfaga de scroll sin dibujar)
         ax = self.ax
-        xlim = ax.get_xlim()
-        ylim = ax.get_ylim()
+        if self._pending_xylim is not None:
+            xlim, ylim = self._pending_xylim
+        else:
+            xlim = ax.get_xlim()
+            ylim = ax.get_ylim()
         
         # Current zoom level (100% = full extent -50 to +50 = 100m width)
+        consts = self._scroll_consts
+        if consts is None:
+            consts = self._update_scroll_consts()
+        x_min, x_max, full_width = consts.x_min, consts.x_max, consts.full_width
         current_width = xlim[1] - xlim[0]
-        x_min, x_max = self.get_wall_display_range()
-        full_width = x_max - x_min  # Ancho dinámico según el muro
         current_zoom = (full_width / current_width) * 100
         
         # LIMIT ZOOM OUT - No permitir zoom out más allá del 100%
@@ -441,39 +853,107 @@ class InteractiveProfileViewer(QDialog):
         if new_xlim[1] - new_xlim[0] > full_width:
             # Forzar a zoom extensión completa
             new_xlim = [x_min, x_max]
-            # Mantener Y proporcional
-            profile = self.profiles_data[self.current_profile_index]
-            distances = profile.get('distances', [])
-            elevations = profile.get('elevations', [])
-            valid_data = [(d, e) for d, e in zip(distances, elevations) if e != -9999 and x_min <= d <= x_max]
-            
-            if valid_data:
-                _, valid_elevations = zip(*valid_data)
-                
-                # Include reference lines if they exist
-                current_pk = profile['pk']
-                crown_elevation = None
-                if current_pk in self.saved_measurements and 'crown' in self.saved_measurements[current_pk]:
-                    crown_elevation = self.saved_measurements[current_pk]['crown']['y']
-                elif self.current_crown_point:
-                    crown_elevation = self.current_crown_point[1]
-                
-                y_values = list(valid_elevations)
-                if crown_elevation is not None:
-                    y_values.extend([crown_elevation, crown_elevation - 1.0])
-                
-                margin_y = (max(y_values) - min(y_values)) * 0.05
-                new_ylim = [min(y_values) - margin_y, max(y_values) + margin_y]
+            # Mantener Y proporcional (extensión cacheada)
+            if consts.y_min_full is not None:
+                new_ylim = [consts.y_min_full, consts.y_max_full]
+        
+        # Guardar límites y coalescer el redibujado (máx. un frame cada 16 ms)
+        self._pending_xylim = (new_xlim, new_ylim)
+        if not self._redraw_timer.isActive():
+            self._redraw_timer.start()
+
+    def _flush_scroll(self):
+        """Aplica los últimos límites acumulados por on_mouse_scroll y redibuja una sola vez"""
+        if self._pending_xylim is None:
+            return
+        new_xlim, new_ylim = self._pending_xylim
+        self._pending_xylim = None
         
         # Apply new limits
-        ax.set_xlim(new_xlim)
-        ax.set_ylim(new_ylim)
+        self.ax.set_xlim(new_xlim)
+        self.ax.set_ylim(new_ylim)
         
-        # Update display
-        self.canvas.draw()
+        # Update display (blit si los límites no cambiaron, draw_idle si cambiaron)
+        self._blit_animated()
         if hasattr(self, 'toolbar'):
             self.toolbar.update_zoom_label()
 
+    def _on_canvas_draw(self, event):
+        """Captura el fondo tras un draw completo y pinta los artistas animados encima"""
+        self._bg = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._bg_limits = (tuple(self.ax.get_xlim()), tuple(self.ax.get_ylim()))
+        for artist in self._animated_artists:
+            self.ax.draw_artist(artist)
+
+    def _blit_animated(self):
+        """Repinta solo los artistas animados sobre el fondo cacheado.
+
+        El fondo incluye ejes, ticks y terreno a los límites de la captura, así que si
+        los límites cambiaron se cae a un draw_idle completo (que recaptura el fondo).
+        """
+        limits = (tuple(self.ax.get_xlim()), tuple(self.ax.get_ylim()))
+        if self._bg is None or limits != self._bg_limits:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._bg)
+        for artist in self._animated_artists:
+            self.ax.draw_artist(artist)
+        self.canvas.blit(self.ax.bbox)
+
+    def get_profile_extent(self):
+        """Extensión completa (x_min, x_max, y_min, y_max, full_width) del perfil actual, cacheada.
+
+        La clave incluye índice, rango personalizado y cota de coronamiento, de modo que
+        cualquier cambio de esos valores produce un cache miss. y_min/y_max son None si
+        no hay cotas válidas en el rango.
+        """
+        profile = self.profiles_data[self.current_profile_index]
+        current_pk = profile['pk']
+        crown_sig = None
+        pk_measurements = self.saved_measurements.get(current_pk, _NO_MEASUREMENTS)
+        if 'crown' in pk_measurements:
+            crown_sig = pk_measurements['crown']['y']
+        elif self.current_crown_point:
+            crown_sig = self.current_crown_point[1]
+        
+        key = (self.current_profile_index, self.custom_range_left, self.custom_range_right, crown_sig)
+        extent = self._extent_cache.get(key)
+        if extent is not None:
+            return extent
+        
+        x_min, x_max = self.get_wall_display_range(profile)
+        idx = self._range_index(profile, x_min, x_max)
+        e_slice = profile['_e'][idx]
+        valid_elevations = e_slice[profile['_valid'][idx]]
+        
+        y_min = y_max = None
+        if valid_elevations.size:
+            y_min = float(valid_elevations.min())
+            y_max = float(valid_elevations.max())
+            # Include reference lines if they exist
+            if crown_sig is not None:
+                y_min = min(y_min, crown_sig - 1.0)
+                y_max = max(y_max, crown_sig)
+            margin_y = (y_max - y_min) * 0.05
+            y_min -= margin_y
+            y_max += margin_y
+        
+        extent = (x_min, x_max, y_min, y_max, x_max - x_min)
+        self._extent_cache[key] = extent
+        return extent
+
+    def invalidate_extent_cache(self):
+        """Descarta extensiones cacheadas (cambio de rango, perfil o coronamiento)"""
+        self._extent_cache.clear()
+        self._scroll_consts = None
+
+    def _update_scroll_consts(self):
+        """Fija las constantes que usa on_mouse_scroll para el perfil actual"""
+        x_min, x_max, y_min, y_max, full_width = self.get_profile_extent()
+        self._scroll_consts = SimpleNamespace(x_min=x_min, x_max=x_max, full_width=full_width,
+                                              y_min_full=y_min, y_max_full=y_max)
+        return self._scroll_consts
+
     def get_wall_display_range(self, profile=None):
         if not profile:
             profile = self.profiles_data[self.current_profile_index]
@@ -481,18 +961,18 @@ class InteractiveProfileViewer(QDialog):
         # 🆕 USAR RANGO PERSONALIZADO del usuario
         return (self.custom_range_left, self.custom_range_right)
 
-    def detect_wall_name(self, profile):
+    def detect_wall_name(self, profile=None):
         """Detecta el nombre del muro para mostrar en el título"""
+        if profile is None:
+            return self._wall_names[self.current_profile_index]
+        if '_wall_name' in profile:
+            return profile['_wall_name']
         if 'centerline_x' in profile and 'centerline_y' in profile:
             x = profile['centerline_x']
             y = profile['centerline_y']
-            
-            if 336688 <= x <= 337997 and 6334170 <= y <= 6334753:
-                return "Muro Principal"
-            elif 336193 <= x <= 336328 and 6332549 <= y <= 6333195:
-                return "Muro Oeste"
-            elif 339816 <= x <= 340114 and 6333743 <= y <= 6334206:
-                return "Muro Este"
+            for name, x0, x1, y0, y1 in _WALL_BOXES:
+                if x0 <= x <= x1 and y0 <= y <= y1:
+                    return name
         return None
     
     def init_no_matplotlib(self):
@@ -563,9 +1043,12 @@ class InteractiveProfileViewer(QDialog):
         layout = QVBoxLayout()
         
         # Matplotlib canvas with toolbar
-        self.figure = Figure(figsize=(14, 8))
+        # Márgenes fijos: sin tight/constrained layout no se recalcula el layout en cada redibujado
+        self.figure = Figure(figsize=(14, 8), tight_layout=False, constrained_layout=False)
+        self.figure.subplots_adjust(**self._FIGURE_MARGINS)
         self.canvas = FigureCanvas(self.figure)
         self.ax = self.figure.add_subplot(111)
+        self._init_axes_style()
         
         # Custom navigation toolbar
         self.toolbar = CustomNavigationToolbar(self.canvas, self, self)
@@ -573,6 +1056,7 @@ class InteractiveProfileViewer(QDialog):
         # Enable matplotlib interactions
         self.canvas.mpl_connect('button_press_event', self.on_canvas_click)
         self.canvas.mpl_connect('scroll_event', self.on_mouse_scroll)
+        self.canvas.mpl_connect('draw_event', self._on_canvas_draw)
         
         # Control panels
         control_panel = self.create_control_panel()
@@ -700,48 +1184,32 @@ class InteractiveProfileViewer(QDialog):
         group = QGroupBox("🔧 Herramientas de Medición")
         layout = QVBoxLayout()
         
-        # Measurement mode buttons (PRIMERA FILA)
+        # Filas: 1 = modos de medición, 2 = auto-detección, 3 = exportación
         btn_layout1 = QHBoxLayout()
-        
-        self.lama_btn = QPushButton("🟡 Modificar LAMA (Z)")
-        self.crown_btn = QPushButton("📍 Cota Coronamiento (X)")
-        self.width_btn = QPushButton("📏 Medir Ancho (C)")
-        self.clear_btn = QPushButton("🗑️ Limpiar")
-        
-        self.crown_btn.setCheckable(True)
-        self.width_btn.setCheckable(True)
-        self.lama_btn.setCheckable(True)
-        
-        self.crown_btn.clicked.connect(lambda: self.set_measurement_mode('crown'))
-        self.width_btn.clicked.connect(lambda: self.set_measurement_mode('width'))
-        self.lama_btn.clicked.connect(lambda: self.set_measurement_mode('lama'))
-        self.clear_btn.clicked.connect(self.clear_current_measurements)
-        
-        btn_layout1.addWidget(self.lama_btn)
-        btn_layout1.addWidget(self.crown_btn)
-        btn_layout1.addWidget(self.width_btn)
-        btn_layout1.addWidget(self.clear_btn)
+        btn_layout2 = QHBoxLayout()
+        btn_layout3 = QHBoxLayout()
+        rows = {1: btn_layout1, 3: btn_layout3}
+        
+        for row, attr, text, style, checkable, slot_name, arg in self._BUTTON_SPECS:
+            btn = QPushButton(text)
+            if style:
+                btn.setStyleSheet(style)
+            btn.setCheckable(checkable)
+            slot = getattr(self, slot_name)
+            if arg is None:
+                btn.clicked.connect(slot)
+            else:
+                btn.clicked.connect(lambda checked=False, slot=slot, arg=arg: slot(arg))
+            setattr(self, attr, btn)
+            rows[row].addWidget(btn)
         
         # Auto-detection toggle (SEGUNDA FILA)
-        btn_layout2 = QHBoxLayout()
-        self.auto_detect_btn = QPushButton("🤖 Auto-Detección: ON")
+        self.auto_detect_btn = QPushButton(self._TEXT_AUTO_ON)
         self.auto_detect_btn.setCheckable(True)
         self.auto_detect_btn.setChecked(True)
         self.auto_detect_btn.clicked.connect(self.toggle_auto_detection)
         btn_layout2.addWidget(self.auto_detect_btn)
         
-        # BOTÓN DE EXPORTACIÓN (TERCERA FILA)
-        btn_layout3 = QHBoxLayout()
-        self.export_btn = QPushButton("📊 Exportar Mediciones")
-        self.export_btn.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold; padding: 8px;")
-        self.export_btn.clicked.connect(self.export_measurements_to_csv)
-        btn_layout3.addWidget(self.export_btn)
-        
-        self.export_pdf_btn = QPushButton("📄 Generar Reporte PDF")
-        self.export_pdf_btn.setStyleSheet("background-color: #d32f2f; color: white; font-weight: bold; padding: 8px;")
-        self.export_pdf_btn.clicked.connect(self.export_pdf_report)
-        btn_layout3.addWidget(self.export_pdf_btn)
-        
         # 🆕 MAP SETTINGS (Min/Max overrides)
         map_settings_layout = QHBoxLayout()
         map_settings_layout.addWidget(QLabel("Mapa Min:"))
@@ -769,12 +1237,14 @@ class InteractiveProfileViewer(QDialog):
         # Measurement results
         self.crown_result = QLabel("Cota Coronamiento: --")
         self.width_result = QLabel("Ancho medido: --")
+        self.width_result.setTextFormat(Qt.PlainText)  # Alerta por stylesheet, sin parseo HTML
         self.lama_result = QLabel("Cota LAMA: --")
         self.revancha_result = QLabel("Revancha: --")
+        self.revancha_result.setTextFormat(Qt.PlainText)
         
         # Auto-detection status
         self.auto_status = QLabel("Auto-detección activada")
-        self.auto_status.setStyleSheet("color: green; font-style: italic;")
+        self.auto_status.setStyleSheet(self._STYLE_OK)
         
         # Assembly
         layout.addLayout(btn_layout1)
@@ -787,6 +1257,7 @@ class InteractiveProfileViewer(QDialog):
         layout.addWidget(self.auto_status)
         
         group.setLayout(layout)
+        self._result_panel = group  # padre común de las etiquetas (ver _ui_batch)
         return group
         
     def create_info_panel(self):
@@ -805,6 +1276,7 @@ class InteractiveProfileViewer(QDialog):
         layout.addWidget(self.info_valid_points)
         
         group.setLayout(layout)
+        self._info_panel = group  # ver _apply_info_panel
         return group
     
     def toggle_operation_mode(self):
@@ -827,23 +1299,21 @@ class InteractiveProfileViewer(QDialog):
         
         # Update the UI to reflect new mode
         self.update_ui_for_operation_mode()
-        self.update_profile_display()
+        self._schedule_redraw()
         
         # Show feedback to user
         mode_name = "Ancho Proyectado" if self.operation_mode == "ancho_proyectado" else "Revancha"
         self.auto_status.setText(f"🔄 Cambiado a modo: {mode_name}")
-        self.auto_status.setStyleSheet("color: blue; font-weight: bold;")
+        self.auto_status.setStyleSheet(self._STYLE_INFO_BOLD)
     
     def update_ui_for_operation_mode(self):
         """🆕 Update UI elements based on current operation mode"""
-        current_pk = self.profiles_data[self.current_profile_index]['pk']
-        
         if self.operation_mode == "ancho_proyectado":
             # Modo Ancho Proyectado: Solo mostrar Ancho
             self.crown_result.setText("Cota Lama: --")  # Cambiar label
-            self.width_result.setText("Ancho Proyectado: --")
+            self._reset_value_label(self.width_result, "Ancho Proyectado: --")
             self.lama_result.setText("")  # Ocultar
-            self.revancha_result.setText("")  # Ocultar
+            self._reset_value_label(self.revancha_result, "")  # Ocultar
             
             # Cambiar texto de botones
             self.crown_btn.setText("📍 Seleccionar Lama")
@@ -853,9 +1323,9 @@ class InteractiveProfileViewer(QDialog):
         else:
             # Modo Revancha: UI original
             self.crown_result.setText("Cota Coronamiento: --")
-            self.width_result.setText("Ancho medido: --")
+            self._reset_value_label(self.width_result, "Ancho medido: --")
             self.lama_result.setText("Cota LAMA: --")
-            self.revancha_result.setText("Revancha: --")
+            self._reset_value_label(self.revancha_result, "Revancha: --")
             
             # Restaurar texto de botones
             self.crown_btn.setText("📍 Cota Coronamiento")
@@ -871,13 +1341,13 @@ class InteractiveProfileViewer(QDialog):
         self.auto_width_detection = self.auto_detect_btn.isChecked()
         
         if self.auto_width_detection:
-            self.auto_detect_btn.setText("🤖 Auto-Detección: ON")
+            self.auto_detect_btn.setText(self._TEXT_AUTO_ON)
             self.auto_status.setText("Auto-detección activada")
-            self.auto_status.setStyleSheet("color: green; font-style: italic;")
+            self.auto_status.setStyleSheet(self._STYLE_OK)
         else:
-            self.auto_detect_btn.setText("🤖 Auto-Detección: OFF")
+            self.auto_detect_btn.setText(self._TEXT_AUTO_OFF)
             self.auto_status.setText("Modo manual activado")
-            self.auto_status.setStyleSheet("color: orange; font-style: italic;")
+            self.auto_status.setStyleSheet(self._STYLE_WARN)
     
     def set_measurement_mode(self, mode):
         """Set measurement mode and ensure canvas has focus"""
@@ -891,7 +1361,7 @@ class InteractiveProfileViewer(QDialog):
             self.width_btn.setChecked(True)
             self.crown_btn.setChecked(False)
             self.lama_btn.setChecked(False)
-            self.current_width_points = []  # Reset width measurement
+            self._wp_i = 0  # Reset width measurement
         elif mode == 'lama':
             self.measurement_mode = 'lama'
             self.lama_btn.setChecked(True)
@@ -905,20 +1375,18 @@ class InteractiveProfileViewer(QDialog):
         
         # Add visual indicator that canvas is ready for keyboard input
         if mode == 'width':
-            self.auto_status.setText("Herramienta Ancho activa - Presiona 'A' para auto-snap")
-            self.auto_status.setStyleSheet("color: purple; font-style: italic; font-weight: bold;")
+            self.auto_status.setText(self._TEXT_WIDTH_ACTIVE)
+            self.auto_status.setStyleSheet(self._STYLE_ACTIVE)
     
     def clear_current_measurements(self):
         """Clear measurements ONLY for current PK including reference line"""
-        current_pk = self.profiles_data[self.current_profile_index]['pk']
-        
         # Remove saved measurements for this PK
-        if current_pk in self.saved_measurements:
-            del self.saved_measurements[current_pk]
+        self.saved_measurements.pop(self._current_pk, None)
+        self._current_measurements = _NO_MEASUREMENTS
         
         # Clear current temporary measurements
         self.current_crown_point = None
-        self.current_width_points = []
+        self._wp_i = 0
         
         # Reset UI
         self.measurement_mode = None
@@ -929,29 +1397,29 @@ class InteractiveProfileViewer(QDialog):
         # Clear labels based on operation mode
         if self.operation_mode == "ancho_proyectado":
             self.crown_result.setText("Cota Lama: --")
-            self.width_result.setText("Ancho Proyectado: --")
+            self._reset_value_label(self.width_result, "Ancho Proyectado: --")
             self.lama_result.setText("")
-            self.revancha_result.setText("")
+            self._reset_value_label(self.revancha_result, "")
         else:
             self.crown_result.setText("Cota Coronamiento: --")
-            self.width_result.setText("Ancho medido: --")
+            self._reset_value_label(self.width_result, "Ancho medido: --")
             self.lama_result.setText("Cota LAMA: --")
-            self.revancha_result.setText("Revancha: --")
+            self._reset_value_label(self.revancha_result, "Revancha: --")
             
         self.canvas.setCursor(Qt.ArrowCursor)
         
         # This will remove the reference line too since crown is cleared
-        self.update_profile_display()
+        self._schedule_redraw()
     
     def find_nearest_terrain_point(self, x_click):
         """Find nearest point - different logic for each mode"""
-        current_pk = self.profiles_data[self.current_profile_index]['pk']
+        measurements = self._current_measurements
         
         if self.operation_mode == "ancho_proyectado":
             # En modo Ancho Proyectado, buscar intersección con línea +3m si existe
             lama_elevation = None
-            if current_pk in self.saved_measurements and 'lama_selected' in self.saved_measurements[current_pk]:
-                lama_elevation = self.saved_measurements[current_pk]['lama_selected']['y'] + 3.0
+            if 'lama_selected' in measurements:
+                lama_elevation = measurements['lama_selected']['y'] + 3.0
             elif self.current_crown_point:
                 lama_elevation = self.current_crown_point[1] + 3.0
                 
@@ -965,8 +1433,8 @@ class InteractiveProfileViewer(QDialog):
         else:
             # Modo Revancha: ONLY snap to horizontal reference line for width measurements
             crown_elevation = None
-            if current_pk in self.saved_measurements and 'crown' in self.saved_measurements[current_pk]:
-                crown_elevation = self.saved_measurements[current_pk]['crown']['y']
+            if 'crown' in measurements:
+                crown_elevation = measurements['crown']['y']
             elif self.current_crown_point:
                 crown_elevation = self.current_crown_point[1]
             
@@ -981,206 +1449,173 @@ class InteractiveProfileViewer(QDialog):
     
     def find_terrain_snap_point(self, x_click):
         """Find closest point ONLY on terrain natural (for crown and lama)"""
-        profile = self.profiles_data[self.current_profile_index]
-        distances = profile.get('distances', [])
-        elevations = profile.get('elevations', [])
+        distances, elevations = self._valid_arrays()
         
-        # Filter valid terrain data points
-        valid_terrain_data = [(d, e) for d, e in zip(distances, elevations) if e != -9999]
-        
-        if not valid_terrain_data:
+        if not distances.size:
             return None
         
-        # Find closest point on terrain
-        min_diff = float('inf')
-        closest_point = None
-        
-        for distance, elevation in valid_terrain_data:
-            diff = abs(distance - x_click)
-            if diff < min_diff:
-                min_diff = diff
-                closest_point = (distance, elevation)
-        
-        return closest_point
+        # Find closest point on terrain: búsqueda binaria sobre distancias ordenadas, O(log N)
+        i = int(np.searchsorted(distances, x_click))
+        if i == distances.size or (i > 0 and abs(distances[i - 1] - x_click) <= abs(distances[i] - x_click)):
+            # Vecino izquierdo (en empate gana, y si su distancia se repite, su primera aparición)
+            i = int(np.searchsorted(distances, distances[i - 1]))
+        return (float(distances[i]), float(elevations[i]))
     
     def detect_road_width_automatically(self, crown_x, crown_y):
         """IMPROVED: Auto-detect full road width with better algorithm"""
-        print(f"🔧 DEBUG: detect_road_width_automatically called with crown_x={crown_x}, crown_y={crown_y}")
-        print(f"🔧 DEBUG: Current operation mode: {self.operation_mode}")
+        logger.debug("detect_road_width_automatically: crown_x=%s, crown_y=%s", crown_x, crown_y)
+        logger.debug("Current operation mode: %s", self.operation_mode)
         
-        profile = self.profiles_data[self.current_profile_index]
-        distances = profile.get('distances', [])
-        elevations = profile.get('elevations', [])
-        
-        # Filter valid data points and sort by distance
-        valid_data = [(d, e) for d, e in zip(distances, elevations) if e != -9999]
-        valid_data.sort(key=lambda x: x[0])  # Sort by distance
+        # Re-clics sobre la misma corona: devolver los bordes ya detectados
+        cache_key = (self.current_profile_index, round(crown_x, 3), round(crown_y, 3), self.operation_mode)
+        cached = self._boundary_cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Boundaries from cache for %s", cache_key)
+            return cached
         
-        print(f"🔧 DEBUG: Valid data points: {len(valid_data)}")
+        n_valid = self._n_valid[self.current_profile_index]
+        logger.debug("Valid data points: %d", n_valid)
         
-        if len(valid_data) < 20:  # Need enough points
-            print(f"❌ Not enough data points: {len(valid_data)}")
+        if n_valid < 20:  # Need enough points (sin construir arrays)
+            logger.debug("❌ Not enough data points: %d", n_valid)
             return None, None
         
-        print(f"🔍 Auto-detecting from {len(valid_data)} points, crown at X={crown_x:.2f}")
+        # Valid data points sorted by distance (cacheados por perfil)
+        terrain = self._valid_arrays()
+        
+        logger.debug("🔍 Auto-detecting from %d points, crown at X=%.2f", n_valid, crown_x)
         
         # 🆕 USAR DIFERENTES ALGORITMOS SEGÚN EL MODO
         if self.operation_mode == "ancho_proyectado":
-            return self.detect_ancho_proyectado_boundaries(valid_data, crown_x, crown_y)
+            boundaries = self.detect_ancho_proyectado_boundaries(terrain, crown_x, crown_y)
         else:
             # Lógica original para modo Revancha
-            return self.detect_revancha_boundaries(valid_data, crown_x, crown_y)
+            boundaries = self.detect_revancha_boundaries(terrain, crown_x, crown_y)
+        
+        self._boundary_cache[cache_key] = boundaries
+        return boundaries
     
-    def detect_ancho_proyectado_boundaries(self, valid_data, reference_x, reference_y):
-        """🆕 Nueva lógica para Ancho Proyectado: buscar TODAS las intersecciones"""
-        print(f"🎯 ANCHO PROYECTADO: Buscando intersecciones a elevación {reference_y:.3f}m")
-        
-        # Buscar TODAS las intersecciones con la línea horizontal de referencia
-        all_intersections = []
-        
-        for i in range(len(valid_data) - 1):
-            p1_x, p1_y = valid_data[i]
-            p2_x, p2_y = valid_data[i + 1]
-            
-            # Check if reference elevation is between these two points
-            if (p1_y <= reference_y <= p2_y) or (p2_y <= reference_y <= p1_y):
-                # Linear interpolation to find exact X coordinate
-                if abs(p2_y - p1_y) > 0.001:  # Avoid division by zero
-                    ratio = (reference_y - p1_y) / (p2_y - p1_y)
-                    intersection_x = p1_x + ratio * (p2_x - p1_x)
-                    all_intersections.append((intersection_x, reference_y))
-                    print(f"  ✅ Intersección encontrada en X={intersection_x:.2f}")
-        
-        if len(all_intersections) < 2:
-            print(f"  ❌ Se necesitan al menos 2 intersecciones, encontradas: {len(all_intersections)}")
+    def detect_ancho_proyectado_boundaries(self, terrain, reference_x, reference_y):
+        """🆕 Nueva lógica para Ancho Proyectado: buscar TODAS las intersecciones
+
+        terrain: (distancias, cotas) válidas ordenadas por distancia (ver _valid_arrays).
+        """
+        logger.debug("🎯 ANCHO PROYECTADO: Buscando intersecciones a elevación %.3fm", reference_y)
+        
+        # Buscar TODAS las intersecciones con la línea horizontal de referencia (vectorizado)
+        all_xs = _find_intersections(terrain[0], terrain[1], float(reference_y))
+        
+        if all_xs.size < 2:
+            logger.debug("  ❌ Se necesitan al menos 2 intersecciones, encontradas: %d", all_xs.size)
             return None, None
         
-        print(f"  🔍 Total intersecciones encontradas: {len(all_intersections)}")
+        logger.debug("  🔍 Total intersecciones encontradas: %d", all_xs.size)
         
         # Encontrar la más cercana y más lejana al punto de referencia
-        distances_to_ref = [(abs(x - reference_x), (x, y)) for x, y in all_intersections]
-        distances_to_ref.sort(key=lambda x: x[0])  # Sort by distance to reference
+        # (en empates: la primera para la cercana, la última para la lejana)
+        dist_to_ref = np.abs(all_xs - reference_x)
+        i_closest = int(np.argmin(dist_to_ref))
+        i_furthest = dist_to_ref.size - 1 - int(np.argmax(dist_to_ref[::-1]))
         
-        closest = distances_to_ref[0][1]  # Más cercana
-        furthest = distances_to_ref[-1][1]  # Más lejana
+        closest = (float(all_xs[i_closest]), reference_y)  # Más cercana
+        furthest = (float(all_xs[i_furthest]), reference_y)  # Más lejana
         
-        print(f"  ✅ Boundary más cercana: X={closest[0]:.2f} (distancia: {distances_to_ref[0][0]:.2f}m)")
-        print(f"  ✅ Boundary más lejana: X={furthest[0]:.2f} (distancia: {distances_to_ref[-1][0]:.2f}m)")
+        logger.debug("  ✅ Boundary más cercana: X=%.2f (distancia: %.2fm)", closest[0], dist_to_ref[i_closest])
+        logger.debug("  ✅ Boundary más lejana: X=%.2f (distancia: %.2fm)", furthest[0], dist_to_ref[i_furthest])
         
         return closest, furthest
     
-    def detect_revancha_boundaries(self, valid_data, crown_x, crown_y):
+    def detect_revancha_boundaries(self, terrain, crown_x, crown_y):
         """🔧 Lógica original para modo Revancha (izquierda/derecha)"""
-        print(f"🎯 REVANCHA: Buscando boundaries izquierda/derecha desde corona")
+        logger.debug("🎯 REVANCHA: Buscando boundaries izquierda/derecha desde corona")
         
-        # DEBUG - Add this line
-        self.debug_profile_data(crown_x, crown_y)
+        # Volcado de diagnóstico solo con el logger en DEBUG (recorre todo el perfil)
+        if logger.isEnabledFor(logging.DEBUG):
+            self.debug_profile_data(crown_x, crown_y)
         
         # Find left and right boundaries using original approach
-        left_boundary = self.find_boundary_simple(valid_data, crown_x, crown_y, 'left')
-        right_boundary = self.find_boundary_simple(valid_data, crown_x, crown_y, 'right')
+        left_boundary = self.find_boundary_simple(terrain, crown_x, crown_y, 'left')
+        right_boundary = self.find_boundary_simple(terrain, crown_x, crown_y, 'right')
         
         if left_boundary and right_boundary:
-            print(f"✅ Detected boundaries: Left={left_boundary[0]:.2f}, Right={right_boundary[0]:.2f}")
+            logger.debug("✅ Detected boundaries: Left=%.2f, Right=%.2f", left_boundary[0], right_boundary[0])
             return left_boundary, right_boundary
         else:
-            print("❌ Could not find boundaries")
+            logger.debug("❌ Could not find boundaries")
             return None, None
     
-    def find_boundary_simple(self, valid_data, crown_x, crown_y, direction):
-        """Find boundary by exact horizontal line intersection at crown elevation"""
+    def find_boundary_simple(self, terrain, crown_x, crown_y, direction):
+        """Find boundary by exact horizontal line intersection at crown elevation
+
+        terrain: (distancias, cotas) válidas ordenadas por distancia (ver _valid_arrays).
+        """
+        distances, elevations = terrain
         
-        # Get points in the search direction
+        # Get points in the search direction, nearest to furthest (búsqueda binaria, sin ordenar)
         if direction == 'left':
-            search_points = [(d, e) for d, e in valid_data if d < crown_x]
-            search_points.sort(key=lambda x: x[0], reverse=True)  # Nearest to furthest
+            split = int(np.searchsorted(distances, crown_x, 'left'))
+            side_d, side_e = distances[:split][::-1], elevations[:split][::-1]
         else:
-            search_points = [(d, e) for d, e in valid_data if d > crown_x]  
-            search_points.sort(key=lambda x: x[0])  # Nearest to furthest
+            split = int(np.searchsorted(distances, crown_x, 'right'))
+            side_d, side_e = distances[split:], elevations[split:]
         
-        if len(search_points) < 10:
-            print(f"  ❌ Not enough points in {direction} direction: {len(search_points)}")
+        if side_d.size < 10:
+            logger.debug("  ❌ Not enough points in %s direction: %d", direction, side_d.size)
             return None
         
-        print(f"  🔍 Searching {direction}: {len(search_points)} points")
-        print(f"  🎯 Target elevation (EXACT): {crown_y:.3f}m")
+        logger.debug("  🔍 Searching %s: %d points", direction, side_d.size)
+        logger.debug("  🎯 Target elevation (EXACT): %.3fm", crown_y)
         
         # Find intersections by interpolation between adjacent points
-        intersections = []
-        
-        for i in range(len(search_points) - 1):
-            p1_x, p1_y = search_points[i]
-            p2_x, p2_y = search_points[i + 1]
-            
-            # Check if crown elevation is between these two points
-            if (p1_y <= crown_y <= p2_y) or (p2_y <= crown_y <= p1_y):
-                # Linear interpolation to find exact X coordinate
-                if abs(p2_y - p1_y) > 0.001:  # Avoid division by zero
-                    # Calculate exact X where line crosses crown_y
-                    ratio = (crown_y - p1_y) / (p2_y - p1_y)
-                    intersection_x = p1_x + ratio * (p2_x - p1_x)
-                    
-                    intersections.append((intersection_x, crown_y))
-                    print(f"    ✅ EXACT intersection at X={intersection_x:.2f}, Y={crown_y:.3f}")
-                else:
-                    # Points are at same elevation, use the furthest one
-                    furthest_x = p2_x if abs(p2_x) > abs(p1_x) else p1_x
-                    intersections.append((furthest_x, crown_y))
-                    print(f"    ✅ Same elevation at X={furthest_x:.2f}, Y={crown_y:.3f}")
+        # (kernel compilado con Numba si está disponible, NumPy vectorizado si no)
+        boundary_x = _boundary_scan(np.ascontiguousarray(side_d), np.ascontiguousarray(side_e),
+                                    float(crown_y), direction == 'left')
         
-        if not intersections:
-            print(f"    ❌ No exact intersections found at elevation {crown_y:.3f}m")
-            print(f"    🔍 Searching for closest point instead...")
+        if np.isnan(boundary_x):
+            logger.debug("    ❌ No exact intersections found at elevation %.3fm", crown_y)
+            logger.debug("    🔍 Searching for closest point instead...")
             
             # Fallback: find closest point to target elevation
-            closest_point = None
-            min_elevation_diff = float('inf')
-            
-            for point_x, point_y in search_points:
-                elevation_diff = abs(point_y - crown_y)
-                if elevation_diff < min_elevation_diff:
-                    min_elevation_diff = elevation_diff
-                    closest_point = (point_x, point_y)
+            i = int(np.argmin(np.abs(side_e - crown_y)))
+            min_elevation_diff = float(abs(side_e[i] - crown_y))
+            closest_point = (float(side_d[i]), float(side_e[i]))
             
-            if closest_point and min_elevation_diff < 1.0:  # Within 1 meter tolerance
-                print(f"    ✅ Using closest point: X={closest_point[0]:.2f}, Y={closest_point[1]:.3f} (diff: {min_elevation_diff:.3f}m)")
+            if min_elevation_diff < 1.0:  # Within 1 meter tolerance
+                logger.debug("    ✅ Using closest point: X=%.2f, Y=%.3f (diff: %.3fm)", closest_point[0], closest_point[1], min_elevation_diff)
                 return closest_point
             else:
-                print(f"    ❌ No suitable point found (closest diff: {min_elevation_diff:.3f}m)")
+                logger.debug("    ❌ No suitable point found (closest diff: %.3fm)", min_elevation_diff)
                 return None
         
-        # Return the furthest intersection (extended boundary)
-        if direction == 'left':
-            # For left, get the most negative X (furthest left)
-            furthest = min(intersections, key=lambda x: x[0])
-        else:
-            # For right, get the most positive X (furthest right) 
-            furthest = max(intersections, key=lambda x: x[0])
+        # The furthest intersection (extended boundary): most negative X for left,
+        # most positive X for right
+        furthest = (boundary_x, crown_y)
         
-        print(f"    ✅ Selected boundary at X={furthest[0]:.2f}, Y={furthest[1]:.3f}")
+        logger.debug("    ✅ Selected boundary at X=%.2f, Y=%.3f", furthest[0], furthest[1])
         return furthest
     
     def debug_profile_data(self, crown_x, crown_y):
-        """🐛 Debug function to see what data we have"""
-        profile = self.profiles_data[self.current_profile_index]
-        distances = profile.get('distances', [])
-        elevations = profile.get('elevations', [])
-        
-        valid_data = [(d, e) for d, e in zip(distances, elevations) if e != -9999]
+        """🐛 Debug function to see what data we have (no-op si el logger no está en DEBUG)"""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        distances, elevations = self._valid_arrays()
+        if not distances.size:
+            return
         
-        print(f"\n🐛 DEBUG INFO:")
-        print(f"Total points: {len(valid_data)}")
-        print(f"Distance range: {min(d for d,e in valid_data):.1f} to {max(d for d,e in valid_data):.1f}")
-        print(f"Elevation range: {min(e for d,e in valid_data):.1f} to {max(e for d,e in valid_data):.1f}")
-        print(f"Crown position: X={crown_x:.2f}, Y={crown_y:.2f}")
+        logger.debug("🐛 DEBUG INFO:")
+        logger.debug("Total points: %d", distances.size)
+        logger.debug("Distance range: %.1f to %.1f", distances.min(), distances.max())
+        logger.debug("Elevation range: %.1f to %.1f", elevations.min(), elevations.max())
+        logger.debug("Crown position: X=%.2f, Y=%.2f", crown_x, crown_y)
         
         # Show points near crown elevation
         tolerance = 0.5
-        near_crown = [(d, e) for d, e in valid_data if abs(e - crown_y) <= tolerance]
-        print(f"Points near crown elevation (±{tolerance}m): {len(near_crown)}")
+        near = np.flatnonzero(np.abs(elevations - crown_y) <= tolerance)
+        logger.debug("Points near crown elevation (±%sm): %d", tolerance, near.size)
         
-        if near_crown:
-            print(f"Near crown sample: {near_crown[:10]}")  # First 10 points
+        if near.size:
+            sample = near[:10]  # First 10 points
+            logger.debug("Near crown sample: %s", list(zip(distances[sample].tolist(), elevations[sample].tolist())))
     
     
     def on_canvas_click(self, event):
@@ -1193,7 +1628,8 @@ class InteractiveProfileViewer(QDialog):
         
         # Rest of the method remains the same as the fixed version...
         x_click = event.xdata
-        current_pk = self.profiles_data[self.current_profile_index]['pk']
+        self._refresh_current_refs()
+        current_pk = self._current_pk
         
         # 🆕 LÓGICA ESPECÍFICA SEGÚN MODO DE OPERACIÓN
         if self.operation_mode == "ancho_proyectado":
@@ -1203,28 +1639,32 @@ class InteractiveProfileViewer(QDialog):
     
     def handle_revancha_click(self, x_click, current_pk):
         """🔧 Lógica original para modo Revancha"""
-        if self.measurement_mode == 'crown' or self.measurement_mode == 'lama':
+        # Referencias locales: se usan varias veces por clic
+        mode = self.measurement_mode
+        status = self.auto_status
+        width_result = self.width_result
+        if mode == 'crown' or mode == 'lama':
             # Crown and LAMA use TERRAIN snap
             terrain_point = self.find_terrain_snap_point(x_click)
             if not terrain_point:
                 return
             snap_x, snap_y = terrain_point
             
-        elif self.measurement_mode == 'width':
+        elif mode == 'width':
             # Width measurements: Check if A key is pressed for auto-snap
             crown_elevation = None
             crown_x = 0
             
             # Get crown reference data
-            if current_pk in self.saved_measurements and 'crown' in self.saved_measurements[current_pk]:
-                crown_elevation = self.saved_measurements[current_pk]['crown']['y']
-                crown_x = self.saved_measurements[current_pk]['crown']['x']
+            crown = self._current_measurements.get('crown')
+            if crown is not None:
+                crown_elevation = crown['y']
+                crown_x = crown['x']
             elif self.current_crown_point:
                 crown_elevation = self.current_crown_point[1]
                 crown_x = self.current_crown_point[0]
             
             if crown_elevation is None:
-                from qgis.PyQt.QtWidgets import QMessageBox
                 QMessageBox.information(
                     self,
                     "Referencia requerida",
@@ -1237,11 +1677,7 @@ class InteractiveProfileViewer(QDialog):
             if self._key_A_pressed:
                 # AUTO-SNAP: Find intersection of crown elevation with terrain
                 direction = 'left' if x_click < crown_x else 'right'
-                profile = self.profiles_data[self.current_profile_index]
-                distances = profile.get('distances', [])
-                elevations = profile.get('elevations', [])
-                valid_data = [(d, e) for d, e in zip(distances, elevations) if e != -9999]
-                boundary = self.find_boundary_simple(valid_data, crown_x, crown_elevation, direction)
+                boundary = self.find_boundary_simple(self._valid_arrays(), crown_x, crown_elevation, direction)
                 
                 if boundary:
                     snap_x, snap_y = boundary
@@ -1256,230 +1692,207 @@ class InteractiveProfileViewer(QDialog):
             return
         
         # Process the measurement based on mode
-        if self.measurement_mode == 'crown':
-            # Save crown point for current PK
-            self.current_crown_point = (snap_x, snap_y)
-            
-            # Update saved measurements
-            if current_pk not in self.saved_measurements:
-                self.saved_measurements[current_pk] = {}
-            self.saved_measurements[current_pk]['crown'] = {
-                'x': snap_x,
-                'y': snap_y
-            }
+        # (etiquetas del panel agrupadas: un solo repintado por clic)
+        with _ui_batch(self._result_panel):
+            if mode == 'crown':
+                # Save crown point for current PK
+                self.current_crown_point = (snap_x, snap_y)
+            
+                # Update saved measurements
+                measurements = self._ensure_current_measurements()
+                measurements['crown'] = {
+                    'x': snap_x,
+                    'y': snap_y
+                }
             
-            self.crown_result.setText(f"Cota Coronamiento: {snap_y:.2f} m")
+                self.crown_result.setText(f"Cota Coronamiento: {snap_y:.2f} m")
             
-            # 🆕 Sincronizar medición con ortomosaico
-            self.sync_measurements_to_orthomosaic()
+                # 🆕 Sincronizar medición con ortomosaico
+                self._schedule_ortho_sync()
             
-            # 🔄 Actualizar cálculo de revancha inmediatamente
-            self.update_revancha_calculation(current_pk)
+                # 🔄 Actualizar cálculo de revancha inmediatamente
+                self.update_revancha_calculation(current_pk)
             
-            # Auto-detection for width (unchanged from original)
-            if self.auto_width_detection:
-                self.auto_status.setText("🔍 Detectando ancho automáticamente...")
-                self.auto_status.setStyleSheet("color: blue; font-style: italic;")
+                # Auto-detection for width (unchanged from original)
+                if self.auto_width_detection:
+                    status.setText("🔍 Detectando ancho automáticamente...")
+                    status.setStyleSheet(self._STYLE_INFO)
                 
-                left_boundary, right_boundary = self.detect_road_width_automatically(snap_x, snap_y)
+                    left_boundary, right_boundary = self.detect_road_width_automatically(snap_x, snap_y)
                 
-                if left_boundary and right_boundary:
-                    # Automatically set width measurement
-                    self.current_width_points = [left_boundary, right_boundary]
-                    
-                    # Calculate width
-                    width = abs(right_boundary[0] - left_boundary[0])
-                    
-                    # Save auto-detected measurement
-                    self.saved_measurements[current_pk]['width'] = {
-                        'p1': left_boundary,
-                        'p2': right_boundary,
-                        'distance': width,
-                        'auto_detected': True
-                    }
+                    if left_boundary and right_boundary:
+                        # Calculate width
+                        width = abs(right_boundary[0] - left_boundary[0])
                     
-                    # 🔴 ALERT: Check width < 15m (HTML Styling)
-                    width_str = f"{width:.2f}"
-                    if width < 15.0:
-                        width_str = f"<span style='color:red;'>{width_str}</span>"
+                        # Save auto-detected measurement
+                        measurements['width'] = {
+                            'p1': left_boundary,
+                            'p2': right_boundary,
+                            'distance': width,
+                            'auto_detected': True
+                        }
                     
-                    self.width_result.setText(f"Ancho auto-detectado: {width_str} m")
-                    self.width_result.setStyleSheet("") # Reset style
+                        # 🔴 ALERT: Check width < 15m
+                        self._set_value_label(width_result, width, 15.0, "Ancho auto-detectado: {:.2f} m")
                     
-                    self.auto_status.setText("✅ Ancho detectado automáticamente")
-                    self.auto_status.setStyleSheet("color: green; font-style: italic;")
+                        status.setText("✅ Ancho detectado automáticamente")
+                        status.setStyleSheet(self._STYLE_OK)
                     
-                    # 🆕 Sincronizar medición con ortomosaico
-                    self.sync_measurements_to_orthomosaic()
+                        # 🆕 Sincronizar medición con ortomosaico
+                        self._schedule_ortho_sync()
                     
-                    self.set_measurement_mode('width')
+                        self.set_measurement_mode('width')
                     
-                else:
-                    self.auto_status.setText("⚠️ No se pudo detectar automáticamente")
-                    self.auto_status.setStyleSheet("color: orange; font-style: italic;")
-            
-        elif self.measurement_mode == 'width':
-            # Add point to width measurement
-            self.current_width_points.append((snap_x, snap_y))
-            
-            if len(self.current_width_points) == 1:
-                # Show feedback for first point
-                snap_type = "Auto-snap" if self._key_A_pressed else "Ref"
-                self.width_result.setText(f"Punto 1: X={snap_x:.1f}m, Y={snap_y:.2f}m ({snap_type})")
-                
-            elif len(self.current_width_points) == 2:
-                # Calculate width between two points
-                p1 = self.current_width_points[0]
-                p2 = self.current_width_points[1]
-                width = abs(p2[0] - p1[0])
+                    else:
+                        status.setText("⚠️ No se pudo detectar automáticamente")
+                        status.setStyleSheet(self._STYLE_WARN)
+            
+            elif mode == 'width':
+                # Add point to width measurement (el cursor vuelve a 0 al completar el par)
+                self._wp[self._wp_i] = (snap_x, snap_y)
+                self._wp_i = (self._wp_i + 1) % 2
+            
+                if self._wp_i == 1:
+                    # Show feedback for first point
+                    snap_type = "Auto-snap" if self._key_A_pressed else "Ref"
+                    width_result.setText(f"Punto 1: X={snap_x:.1f}m, Y={snap_y:.2f}m ({snap_type})")
                 
-                # Save measurement for current PK
-                if current_pk not in self.saved_measurements:
-                    self.saved_measurements[current_pk] = {}
-                self.saved_measurements[current_pk]['width'] = {
-                    'p1': p1,
-                    'p2': p2,
-                    'distance': width,
-                    'auto_detected': False
-                }
+                else:
+                    # Calculate width between two points
+                    p1, p2 = self._wp
+                    width = abs(p2[0] - p1[0])
                 
-                self.current_width_points = []
-
-                # 🔴 ALERT: Check width < 15m (HTML Styling)
-                width_str = f"{width:.2f}"
-                if width < 15.0:
-                    width_str = f"<span style='color:red;'>{width_str}</span>"
+                    # Save measurement for current PK
+                    self._ensure_current_measurements()['width'] = {
+                        'p1': p1,
+                        'p2': p2,
+                        'distance': width,
+                        'auto_detected': False
+                    }
 
-                self.width_result.setText(f"Ancho medido: {width_str} m (manual)")
-                self.width_result.setStyleSheet("") # Reset style
+                    # 🔴 ALERT: Check width < 15m
+                    self._set_value_label(width_result, width, 15.0, "Ancho medido: {:.2f} m (manual)")
                 
-                self.auto_status.setText("✏️ Medición manual completada")
-                self.auto_status.setStyleSheet("color: blue; font-style: italic;")
+                    status.setText("✏️ Medición manual completada")
+                    status.setStyleSheet(self._STYLE_INFO)
                 
-                # 🆕 Sincronizar medición con ortomosaico
-                self.sync_measurements_to_orthomosaic()
-                
-                self.current_width_points = []
+                    # 🆕 Sincronizar medición con ortomosaico
+                    self._schedule_ortho_sync()
 
         
-        elif self.measurement_mode == 'lama':
-            # LAMA measurement on terrain
-            if current_pk not in self.saved_measurements:
-                self.saved_measurements[current_pk] = {}
-            self.saved_measurements[current_pk]['lama'] = {
-                'x': snap_x,
-                'y': snap_y
-            }
+            elif mode == 'lama':
+                # LAMA measurement on terrain
+                self._ensure_current_measurements()['lama'] = {
+                    'x': snap_x,
+                    'y': snap_y
+                }
             
-            # 🆕 Sincronizar medición con ortomosaico
-            self.sync_measurements_to_orthomosaic()
+                # 🆕 Sincronizar medición con ortomosaico
+                self._schedule_ortho_sync()
             
-            self.lama_result.setText(f"Cota LAMA: {snap_y:.2f} m (manual)")
+                self.lama_result.setText(f"Cota LAMA: {snap_y:.2f} m (manual)")
             
-            # 🔄 Actualizar cálculo de revancha inmediatamente
-            self.update_revancha_calculation(current_pk)
+                # 🔄 Actualizar cálculo de revancha inmediatamente
+                self.update_revancha_calculation(current_pk)
         
         # Update the display
-        self.update_profile_display()
+        self._schedule_redraw()
     
     def handle_ancho_proyectado_click(self, x_click, current_pk):
         """🆕 Lógica específica para modo Ancho Proyectado"""
+        # Referencias locales: se usan varias veces por clic
+        mode = self.measurement_mode
+        status = self.auto_status
+        width_result = self.width_result
         
-        if self.measurement_mode == 'crown':
+        if mode == 'crown':
             # En modo Ancho Proyectado, "crown" es realmente seleccionar la Lama
             terrain_point = self.find_terrain_snap_point(x_click)
             if not terrain_point:
                 return
             snap_x, snap_y = terrain_point
             
-            # Guardar como "lama_selected" en lugar de crown
-            self.current_crown_point = (snap_x, snap_y)
+            # (etiquetas del panel agrupadas: un solo repintado por clic)
+            with _ui_batch(self._result_panel):
+                # Guardar como "lama_selected" en lugar de crown
+                self.current_crown_point = (snap_x, snap_y)
             
-            if current_pk not in self.saved_measurements:
-                self.saved_measurements[current_pk] = {}
-            self.saved_measurements[current_pk]['lama_selected'] = {
-                'x': snap_x,
-                'y': snap_y
-            }
+                measurements = self._ensure_current_measurements()
+                measurements['lama_selected'] = {
+                    'x': snap_x,
+                    'y': snap_y
+                }
             
-            self.crown_result.setText(f"Cota Lama: {snap_y:.2f} m")
+                self.crown_result.setText(f"Cota Lama: {snap_y:.2f} m")
             
-            # 🆕 Sincronizar medición con ortomosaico
-            self.sync_measurements_to_orthomosaic()
+                # 🆕 Sincronizar medición con ortomosaico
+                self._schedule_ortho_sync()
             
-            # 🔄 Actualizar cálculo de revancha inmediatamente
-            self.update_revancha_calculation(current_pk)
+                # 🔄 Actualizar cálculo de revancha inmediatamente
+                self.update_revancha_calculation(current_pk)
             
-            # 🆕 Auto-detection: MISMA LÓGICA QUE REVANCHA pero en línea +3m
-            print(f"🐛 DEBUG: auto_width_detection = {self.auto_width_detection}")
-            if self.auto_width_detection:
-                print(f"🐛 DEBUG: Iniciando auto-detección en Ancho Proyectado")
-                print(f"🐛 DEBUG: Lama point = ({snap_x:.2f}, {snap_y:.2f})")
+                # 🆕 Auto-detection: MISMA LÓGICA QUE REVANCHA pero en línea +3m
+                logger.debug("auto_width_detection = %s", self.auto_width_detection)
+                if self.auto_width_detection:
+                    logger.debug("Iniciando auto-detección en Ancho Proyectado")
+                    logger.debug("Lama point = (%.2f, %.2f)", snap_x, snap_y)
                 
-                self.auto_status.setText("🔍 Detectando ancho proyectado automáticamente...")
-                self.auto_status.setStyleSheet("color: blue; font-style: italic;")
+                    status.setText("🔍 Detectando ancho proyectado automáticamente...")
+                    status.setStyleSheet(self._STYLE_INFO)
                 
-                reference_elevation = snap_y + 3.0  # 3 metros arriba de la lama
-                print(f"🐛 DEBUG: Reference elevation +3m = {reference_elevation:.2f}")
-                print(f"🐛 DEBUG: About to call detect_road_width_automatically with snap_x={snap_x:.2f}, reference_elevation={reference_elevation:.2f}")
+                    reference_elevation = snap_y + 3.0  # 3 metros arriba de la lama
+                    logger.debug("Reference elevation +3m = %.2f", reference_elevation)
+                    logger.debug("detect_road_width_automatically(snap_x=%.2f, reference_elevation=%.2f)", snap_x, reference_elevation)
                 
-                # 🎯 USAR LA MISMA FUNCIÓN ROBUSTA QUE REVANCHA
-                left_boundary, right_boundary = self.detect_road_width_automatically(snap_x, reference_elevation)
-                print(f"🐛 DEBUG: Boundaries returned = {left_boundary}, {right_boundary}")
+                    # 🎯 USAR LA MISMA FUNCIÓN ROBUSTA QUE REVANCHA
+                    left_boundary, right_boundary = self.detect_road_width_automatically(snap_x, reference_elevation)
+                    logger.debug("Boundaries returned = %s, %s", left_boundary, right_boundary)
                 
-                if left_boundary and right_boundary:
-                    print("🐛 DEBUG: ✅ Auto-detección exitosa")
-                    # Automatically set width measurement
-                    self.current_width_points = [left_boundary, right_boundary]
-                    
-                    # Calculate width
-                    width = abs(right_boundary[0] - left_boundary[0])
-                    print(f"🐛 DEBUG: Width calculated = {width:.2f}m")
-                    
-                    # Save auto-detected measurement
-                    self.saved_measurements[current_pk]['width'] = {
-                        'p1': left_boundary,
-                        'p2': right_boundary,
-                        'distance': width,
-                        'auto_detected': True,
-                        'reference_elevation': reference_elevation
-                    }
+                    if left_boundary and right_boundary:
+                        logger.debug("✅ Auto-detección exitosa")
+                        # Calculate width
+                        width = abs(right_boundary[0] - left_boundary[0])
+                        logger.debug("Width calculated = %.2fm", width)
                     
-                    # 🔴 ALERT: Check width < 15m (HTML Styling)
-                    width_str = f"{width:.2f}"
-                    if width < 15.0:
-                        width_str = f"<span style='color:red;'>{width_str}</span>"
+                        # Save auto-detected measurement
+                        measurements['width'] = {
+                            'p1': left_boundary,
+                            'p2': right_boundary,
+                            'distance': width,
+                            'auto_detected': True,
+                            'reference_elevation': reference_elevation
+                        }
                     
-                    self.width_result.setText(f"Ancho Proyectado auto: {width_str} m")
-                    self.width_result.setStyleSheet("") # Reset style
+                        # 🔴 ALERT: Check width < 15m
+                        self._set_value_label(width_result, width, 15.0, "Ancho Proyectado auto: {:.2f} m")
                     
-                    self.auto_status.setText("✅ Ancho proyectado detectado automáticamente")
-                    self.auto_status.setStyleSheet("color: green; font-style: italic;")
+                        status.setText("✅ Ancho proyectado detectado automáticamente")
+                        status.setStyleSheet(self._STYLE_OK)
                     
-                    # 🆕 Sincronizar medición con ortomosaico
-                    self.sync_measurements_to_orthomosaic()
+                        # 🆕 Sincronizar medición con ortomosaico
+                        self._schedule_ortho_sync()
                     
-                    # 🆕 Actualizar cálculo de revancha inmediatamente
-                    self.update_revancha_calculation(current_pk)
+                        # 🆕 Actualizar cálculo de revancha inmediatamente
+                        self.update_revancha_calculation(current_pk)
                     
-                    # 🆕 ACTIVAR AUTOMÁTICAMENTE MODO WIDTH para permitir ajustes
-                    self.set_measurement_mode('width')
+                        # 🆕 ACTIVAR AUTOMÁTICAMENTE MODO WIDTH para permitir ajustes
+                        self.set_measurement_mode('width')
                     
+                    else:
+                        logger.debug("❌ Auto-detección falló")
+                        status.setText("⚠️ No se pudo detectar ancho automáticamente")
+                        status.setStyleSheet(self._STYLE_WARN)
                 else:
-                    print("🐛 DEBUG: ❌ Auto-detección falló")
-                    self.auto_status.setText("⚠️ No se pudo detectar ancho automáticamente")
-                    self.auto_status.setStyleSheet("color: orange; font-style: italic;")
-            else:
-                print("🐛 DEBUG: Auto-width detection está DESACTIVADO")
+                    logger.debug("Auto-width detection está DESACTIVADO")
                     
-        elif self.measurement_mode == 'width':
+        elif mode == 'width':
             # En modo Ancho Proyectado, el width se mide sobre la línea de referencia (+3m)
             lama_elevation = None
             lama_x = 0
             
             # Obtener datos de lama seleccionada
-            if current_pk in self.saved_measurements and 'lama_selected' in self.saved_measurements[current_pk]:
-                lama_data = self.saved_measurements[current_pk]['lama_selected']
+            lama_data = self._current_measurements.get('lama_selected')
+            if lama_data:
                 lama_elevation = lama_data['y'] + 3.0  # 3 metros arriba
                 lama_x = lama_data['x']
             elif self.current_crown_point:
@@ -1487,7 +1900,6 @@ class InteractiveProfileViewer(QDialog):
                 lama_x = self.current_crown_point[0]
                 
             if lama_elevation is None:
-                from qgis.PyQt.QtWidgets import QMessageBox
                 QMessageBox.information(
                     self,
                     "Lama requerida",
@@ -1510,118 +1922,69 @@ class InteractiveProfileViewer(QDialog):
                 # MANUAL SNAP: usar línea de referencia
                 snap_x, snap_y = (x_click, lama_elevation)
                 
-            # Agregar punto a medición de ancho
-            self.current_width_points.append((snap_x, snap_y))
-            
-            if len(self.current_width_points) == 1:
-                snap_type = "Auto-snap" if self._key_A_pressed else "Ref"
-                self.width_result.setText(f"Punto 1: X={snap_x:.1f}m, Y={snap_y:.2f}m ({snap_type})")
+            with _ui_batch(self._result_panel):
+                # Agregar punto a medición de ancho (el cursor vuelve a 0 al completar el par)
+                self._wp[self._wp_i] = (snap_x, snap_y)
+                self._wp_i = (self._wp_i + 1) % 2
+            
+                if self._wp_i == 1:
+                    snap_type = "Auto-snap" if self._key_A_pressed else "Ref"
+                    width_result.setText(f"Punto 1: X={snap_x:.1f}m, Y={snap_y:.2f}m ({snap_type})")
                 
-            elif len(self.current_width_points) == 2:
-                p1 = self.current_width_points[0]
-                p2 = self.current_width_points[1]
-                width = abs(p2[0] - p1[0])
-                
-                if current_pk not in self.saved_measurements:
-                    self.saved_measurements[current_pk] = {}
-                self.saved_measurements[current_pk]['width'] = {
-                    'p1': p1,
-                    'p2': p2,
-                    'distance': width,
-                    'auto_detected': False,
-                    'reference_elevation': lama_elevation
-                }
+                else:
+                    p1, p2 = self._wp
+                    width = abs(p2[0] - p1[0])
                 
-                self.current_width_points = []
+                    self._ensure_current_measurements()['width'] = {
+                        'p1': p1,
+                        'p2': p2,
+                        'distance': width,
+                        'auto_detected': False,
+                        'reference_elevation': lama_elevation
+                    }
 
-                # 🔴 ALERT: Check width < 15m (HTML Styling)
-                width_str = f"{width:.2f}"
-                if width < 15.0:
-                    width_str = f"<span style='color:red;'>{width_str}</span>"
-                
-                self.width_result.setText(f"Ancho Proyectado: {width_str} m (manual)")
-                self.width_result.setStyleSheet("") # Reset style
+                    # 🔴 ALERT: Check width < 15m
+                    self._set_value_label(width_result, width, 15.0, "Ancho Proyectado: {:.2f} m (manual)")
                 
-                self.auto_status.setText("✏️ Medición manual completada")
-                self.auto_status.setStyleSheet("color: blue; font-style: italic;")
+                    status.setText("✏️ Medición manual completada")
+                    status.setStyleSheet(self._STYLE_INFO)
                 
-                # 🆕 Sincronizar medición con ortomosaico
-                self.sync_measurements_to_orthomosaic()
-                
-                self.current_width_points = []
+                    # 🆕 Sincronizar medición con ortomosaico
+                    self._schedule_ortho_sync()
         
         # Update display
-        self.update_profile_display()
+        self._schedule_redraw()
     
     def find_reference_line_snap_point(self, x_click, reference_elevation):
-        """🆕 Find snap point on reference line with terrain intersection in radius around click"""
-        profile = self.profiles_data[self.current_profile_index]
-        distances = profile.get('distances', [])
-        elevations = profile.get('elevations', [])
-        
-        valid_data = [(d, e) for d, e in zip(distances, elevations) if e != -9999]
-        if len(valid_data) < 10:
+        """🆕 Find snap point on reference line with terrain intersection in radius around click
+
+        Si no hay puntos de terreno en el radio se usa la intersección más cercana de todo
+        el perfil (None si la línea no corta el terreno).
+        """
+        if self._n_valid[self.current_profile_index] < 10:
             return None
+        # Puntos válidos ordenados por distancia (arrays cacheados del perfil)
+        distances, elevations = self._valid_arrays()
             
         # 🎯 BUSCAR EN RADIO ALREDEDOR DEL CLICK (similar a modo Revancha)
         search_radius = 5.0  # metros de radio de búsqueda
         
-        # Filter points within search radius
-        nearby_points = [(d, e) for d, e in valid_data 
-                        if abs(d - x_click) <= search_radius]
+        # Points within search radius: búsqueda binaria sobre las distancias ya ordenadas
+        lo = int(np.searchsorted(distances, x_click - search_radius, 'left'))
+        hi = int(np.searchsorted(distances, x_click + search_radius, 'right'))
+        in_radius = hi > lo
+        if in_radius:
+            distances, elevations = distances[lo:hi], elevations[lo:hi]
         
-        if not nearby_points:
-            # If no points in radius, find closest intersection
-            return self.find_closest_terrain_intersection(x_click, reference_elevation, valid_data)
+        # Intersección con la línea de referencia más cercana al click (kernel numba o NumPy)
+        closest_x = _closest_crossing(distances, elevations, float(reference_elevation), float(x_click))
         
-        # Find intersections within the search radius
-        intersections = []
-        nearby_points.sort(key=lambda x: x[0])  # Sort by distance
-        
-        for i in range(len(nearby_points) - 1):
-            p1_x, p1_y = nearby_points[i]
-            p2_x, p2_y = nearby_points[i + 1]
-            
-            # Check if reference elevation is between these two points
-            if (p1_y <= reference_elevation <= p2_y) or (p2_y <= reference_elevation <= p1_y):
-                # Linear interpolation to find exact X coordinate
-                if abs(p2_y - p1_y) > 0.001:  # Avoid division by zero
-                    ratio = (reference_elevation - p1_y) / (p2_y - p1_y)
-                    intersection_x = p1_x + ratio * (p2_x - p1_x)
-                    
-                    # Calculate distance from click point
-                    distance_from_click = abs(intersection_x - x_click)
-                    intersections.append((intersection_x, reference_elevation, distance_from_click))
-        
-        if intersections:
+        if not np.isnan(closest_x):
             # Return closest intersection to click point
-            closest = min(intersections, key=lambda x: x[2])
-            return (closest[0], closest[1])
+            return (float(closest_x), reference_elevation)
         
         # Fallback: no intersections found, return point on reference line at click X
-        return (x_click, reference_elevation)
-    
-    def find_closest_terrain_intersection(self, x_click, reference_elevation, valid_data):
-        """🔧 Fallback function to find closest intersection when no points in radius"""
-        intersections = []
-        
-        for i in range(len(valid_data) - 1):
-            p1_x, p1_y = valid_data[i]
-            p2_x, p2_y = valid_data[i + 1]
-            
-            # Check if reference elevation is between these two points
-            if (p1_y <= reference_elevation <= p2_y) or (p2_y <= reference_elevation <= p1_y):
-                if abs(p2_y - p1_y) > 0.001:
-                    ratio = (reference_elevation - p1_y) / (p2_y - p1_y)
-                    intersection_x = p1_x + ratio * (p2_x - p1_x)
-                    distance_from_click = abs(intersection_x - x_click)
-                    intersections.append((intersection_x, reference_elevation, distance_from_click))
-        
-        if intersections:
-            closest = min(intersections, key=lambda x: x[2])
-            return (closest[0], closest[1])
-            
-        return None
+        return (x_click, reference_elevation) if in_radius else None
 
     # Implementación original de update_revancha_calculation fue reemplazada por una versión más completa más abajo
     
@@ -1632,7 +1995,7 @@ class InteractiveProfileViewer(QDialog):
             self.pk_slider.setValue(self.current_profile_index)
             self.load_profile_measurements()  # Load measurements for new PK
             self.sync_range_controls()  # 🆕 Sync range spinboxes
-            self.update_profile_display()
+            self._schedule_redraw()
             # 🆕 Actualizar visualizador de ortomosaico si está abierto
             self.update_orthomosaic_view()
     
@@ -1643,7 +2006,7 @@ class InteractiveProfileViewer(QDialog):
             self.pk_slider.setValue(self.current_profile_index)
             self.load_profile_measurements()  # Load measurements for new PK
             self.sync_range_controls()  # 🆕 Sync range spinboxes
-            self.update_profile_display()
+            self._schedule_redraw()
             # 🆕 Actualizar visualizador de ortomosaico si está abierto
             self.update_orthomosaic_view()
     
@@ -1653,7 +2016,7 @@ class InteractiveProfileViewer(QDialog):
             self.current_profile_index = value
             self.load_profile_measurements()  # Load measurements for new PK
             self.sync_range_controls()  # 🆕 Sync range spinboxes
-            self.update_profile_display()
+            self._schedule_redraw()
             # 🆕 Actualizar visualizador de ortomosaico si está abierto
             self.update_orthomosaic_view()
             
@@ -1665,7 +2028,7 @@ class InteractiveProfileViewer(QDialog):
                 self.ortho_viewer.update_to_profile(profile)
                 
                 # 🆕 Sincronizar mediciones también
-                self.sync_measurements_to_orthomosaic()
+                self._schedule_ortho_sync()
                 
             except Exception as e:
                 print(f"Error al actualizar ortomosaico: {str(e)}")
@@ -1692,6 +2055,11 @@ class InteractiveProfileViewer(QDialog):
                     f"Vista completa del perfil ({self.custom_range_left}m a {self.custom_range_right}m)"
                 )
     
+    def _schedule_ortho_sync(self):
+        """Agenda un único sync_measurements_to_orthomosaic (como máximo uno cada 50 ms)"""
+        if self.ortho_viewer and not self._ortho_sync_timer.isActive():
+            self._ortho_sync_timer.start()
+
     def sync_measurements_to_orthomosaic(self):
         """🆕 Sincroniza las mediciones actuales al ortomosaico"""
         if not self.ortho_viewer or not hasattr(self.ortho_viewer, 'update_measurements_display'):
@@ -1702,33 +2070,30 @@ class InteractiveProfileViewer(QDialog):
             profile = self.profiles_data[self.current_profile_index]
             current_pk = profile.get('pk') or profile.get('PK')
             
-            print(f"🔍 DEBUG - Syncing for PK: {current_pk} (profile index: {self.current_profile_index})")
+            logger.debug("🔍 Syncing for PK: %s (profile index: %d)", current_pk, self.current_profile_index)
             
-            # Obtener mediciones guardadas para el PK actual
-            measurements_data = {}
-            if current_pk in self.saved_measurements:
-                measurements_data = self.saved_measurements[current_pk].copy()
-                print(f"🔍 DEBUG - Found saved measurements for {current_pk}: {list(measurements_data.keys())}")
+            # Obtener mediciones guardadas para el PK actual (una sola búsqueda en el dict).
+            # Sin copiar: los agregados (LAMA auto, temporales) van a un overlay delante del
+            # dict vivo; el ortomosaico solo lee.
+            pk_meas = self.saved_measurements.get(current_pk)
+            measurements_data = ChainMap({}, pk_meas if pk_meas is not None else _NO_MEASUREMENTS)
+            if pk_meas is not None:
+                logger.debug("🔍 Found saved measurements for %s: %s", current_pk, list(measurements_data))
             else:
-                print(f"⚠️ DEBUG - No saved measurements found for PK {current_pk}")
-                print(f"📊 DEBUG - Available PKs in saved_measurements: {list(self.saved_measurements.keys())}")
+                logger.debug("⚠️ No saved measurements found for PK %s", current_pk)
+                logger.debug("📊 Available PKs in saved_measurements: %s", list(self.saved_measurements))
             
             # 🔧 CORREGIDO: Añadir puntos LAMA automáticos si no hay manuales
-            profile = self.profiles_data[self.current_profile_index]
-            auto_lama_points = profile.get('lama_points', [])
+            # (dict precalculado en load_profile_measurements; solo lectura)
+            auto_lama = profile.get('_auto_lama_meas')
             
             # Si no hay LAMA manual ni lama_selected, usar LAMA automático
-            if (auto_lama_points and 
+            if (auto_lama is not None and 
                 'lama' not in measurements_data and 
                 'lama_selected' not in measurements_data):
                 
-                # Convertir LAMA automático a formato de medición
-                lama_point = auto_lama_points[0]  # Usar el primer punto LAMA
-                measurements_data['lama'] = {
-                    'x': lama_point.get('offset_from_centerline', 0),  # Offset desde el eje
-                    'y': lama_point['elevation']
-                }
-                print(f"DEBUG - LAMA automático agregado: x={lama_point.get('offset_from_centerline', 0):.2f}, y={lama_point['elevation']:.2f}")
+                measurements_data['lama'] = auto_lama
+                logger.debug("LAMA automático agregado: x=%.2f, y=%.2f", auto_lama['x'], auto_lama['y'])
             
             # Añadir mediciones temporales SOLO si no hay guardadas
             # Esto evita que las temporales sobrescriban las guardadas al navegar
@@ -1738,136 +2103,126 @@ class InteractiveProfileViewer(QDialog):
                     'y': self.current_crown_point[1]
                 }
             
-            if len(self.current_width_points) >= 2 and 'width' not in measurements_data:
-                measurements_data['width'] = {
-                    'p1': {'x': self.current_width_points[0][0], 'y': self.current_width_points[0][1]},
-                    'p2': {'x': self.current_width_points[1][0], 'y': self.current_width_points[1][1]},
-                    'distance': abs(self.current_width_points[1][0] - self.current_width_points[0][0])
-                }
-            
             # Enviar mediciones al ortomosaico
             self.ortho_viewer.update_measurements_display(measurements_data)
-            print(f"DEBUG - Mediciones sincronizadas para PK {current_pk}: {list(measurements_data.keys())}")
+            logger.debug("Mediciones sincronizadas para PK %s: %s", current_pk, list(measurements_data))
             
             # 🔧 DEBUG TEMPORAL: Mostrar estructura completa
-            if measurements_data:
+            if measurements_data and logger.isEnabledFor(logging.DEBUG):
                 for key, value in measurements_data.items():
-                    print(f"DEBUG - {key}: {value}")
+                    logger.debug("%s: %s", key, value)
             
         except Exception as e:
             print(f"ERROR al sincronizar mediciones: {str(e)}")
     
     def load_profile_measurements(self):
         """🔧 Load measurements specific to current PK including different modes"""
-        current_pk = self.profiles_data[self.current_profile_index]['pk']
+        self._refresh_current_refs()
+        current_pk = self._current_pk
         
-        # Clear current temporary measurements
-        self.current_crown_point = None
-        self.current_width_points = []
+        # LAMA automático en formato de medición: estático por perfil, se arma una sola vez
+        profile = self.profiles_data[self.current_profile_index]
+        if '_auto_lama_meas' not in profile:
+            auto_lama_points = profile.get('lama_points')
+            if auto_lama_points:
+                lama_point = auto_lama_points[0]  # Usar el primer punto LAMA
+                profile['_auto_lama_meas'] = {
+                    'x': lama_point.get('offset_from_centerline', 0),  # Offset desde el eje
+                    'y': lama_point['elevation']
+                }
+            else:
+                profile['_auto_lama_meas'] = None
+        
+        # Etiquetas del panel: un solo repintado para todo el bloque
+        with _ui_batch(self._result_panel):
+            # Clear current temporary measurements
+            self.current_crown_point = None
+            self._wp_i = 0
         
-        # Load saved measurements for this PK
-        if current_pk in self.saved_measurements:
-            measurements = self.saved_measurements[current_pk]
+            # Load saved measurements for this PK
+            if current_pk in self.saved_measurements:
+                measurements = self.saved_measurements[current_pk]
             
-            if self.operation_mode == "ancho_proyectado":
-                # Modo Ancho Proyectado
-                if 'lama_selected' in measurements:
-                    lama_data = measurements['lama_selected']
-                    self.current_crown_point = (lama_data['x'], lama_data['y'])
-                    self.crown_result.setText(f"Cota Lama: {lama_data['y']:.2f} m")
-                else:
-                    self.crown_result.setText("Cota Lama: --")
-                
-                # Load width measurement
-                if 'width' in measurements:
-                    width_data = measurements['width']
-                    auto_detected = width_data.get('auto_detected', False)
-                    width_val = width_data['distance']
-                    
-                    # 🔴 ALERT: Check width < 15m (HTML Styling)
-                    width_str = f"{width_val:.2f}"
-                    if width_val < 15.0:
-                        width_str = f"<span style='color:red;'>{width_str}</span>"
-                    
-                    if auto_detected:
-                        self.width_result.setText(f"Ancho Proyectado: {width_str} m (auto)")
-                        self.auto_status.setText("✅ Ancho proyectado calculado (+3m)")
-                        self.auto_status.setStyleSheet("color: green; font-style: italic;")
+                if self.operation_mode == "ancho_proyectado":
+                    # Modo Ancho Proyectado
+                    lama_data = measurements.get('lama_selected')
+                    if lama_data is not None:
+                        lx, ly = lama_data['x'], lama_data['y']
+                        self.current_crown_point = (lx, ly)
+                        self.crown_result.setText(f"Cota Lama: {ly:.2f} m")
                     else:
-                        self.width_result.setText(f"Ancho Proyectado: {width_str} m (manual)")
-                        self.auto_status.setText("✏️ Medición manual")
-                        self.auto_status.setStyleSheet("color: blue; font-style: italic;")
-                    
-                    # Reset stylesheet just in case
-                    self.width_result.setStyleSheet("")
-
-                else:
-                    self.width_result.setText("Ancho Proyectado: --")
-                    self.width_result.setStyleSheet("")
-                    self.auto_status.setText("Auto-detección activada" if self.auto_width_detection else "Modo manual activado")
-                    self.auto_status.setStyleSheet("color: green; font-style: italic;" if self.auto_width_detection else "color: orange; font-style: italic;")
-                    
-            else:
-                # Modo Revancha (lógica original)
-                if 'crown' in measurements:
-                    crown_data = measurements['crown']
-                    self.current_crown_point = (crown_data['x'], crown_data['y'])
-                    self.crown_result.setText(f"Cota Coronamiento: {crown_data['y']:.2f} m")
-                else:
-                    self.crown_result.setText("Cota Coronamiento: --")
+                        self.crown_result.setText("Cota Lama: --")
                 
-                # Load width measurement
-                if 'width' in measurements:
-                    width_data = measurements['width']
-                    auto_detected = width_data.get('auto_detected', False)
-                    width_val = width_data['distance']
-                    
-                    # 🔴 ALERT: Check width < 15m (HTML Styling)
-                    width_str = f"{width_val:.2f}"
-                    if width_val < 15.0:
-                        width_str = f"<span style='color:red;'>{width_str}</span>"
+                    # Load width measurement
+                    if 'width' in measurements:
+                        width_data = measurements['width']
+                        auto_detected = width_data.get('auto_detected', False)
+                        width_val = width_data['distance']
                     
-                    if auto_detected:
-                        self.width_result.setText(f"Ancho medido: {width_str} m (auto-detectado)")
+                        # 🔴 ALERT: Check width < 15m
+                        if auto_detected:
+                            self._set_value_label(self.width_result, width_val, 15.0, "Ancho Proyectado: {:.2f} m (auto)")
+                            self.auto_status.setText("✅ Ancho proyectado calculado (+3m)")
+                            self.auto_status.setStyleSheet(self._STYLE_OK)
+                        else:
+                            self._set_value_label(self.width_result, width_val, 15.0, "Ancho Proyectado: {:.2f} m (manual)")
+                            self.auto_status.setText("✏️ Medición manual")
+                            self.auto_status.setStyleSheet(self._STYLE_INFO)
+
                     else:
-                        self.width_result.setText(f"Ancho medido: {width_str} m (manual)")
+                        self._reset_value_label(self.width_result, "Ancho Proyectado: --")
+                        self.auto_status.setText("Auto-detección activada" if self.auto_width_detection else "Modo manual activado")
+                        self.auto_status.setStyleSheet(self._STYLE_OK if self.auto_width_detection else self._STYLE_WARN)
                     
-                    if auto_detected:
-                        self.auto_status.setText("✅ Ancho detectado automáticamente")
-                        self.auto_status.setStyleSheet("color: green; font-style: italic;")
+                else:
+                    # Modo Revancha (lógica original)
+                    crown_data = measurements.get('crown')
+                    if crown_data is not None:
+                        cx, cy = crown_data['x'], crown_data['y']
+                        self.current_crown_point = (cx, cy)
+                        self.crown_result.setText(f"Cota Coronamiento: {cy:.2f} m")
                     else:
-                        self.auto_status.setText("✏️ Medición manual")
-                        self.auto_status.setStyleSheet("color: blue; font-style: italic;")
+                        self.crown_result.setText("Cota Coronamiento: --")
+                
+                    # Load width measurement
+                    if 'width' in measurements:
+                        width_data = measurements['width']
+                        auto_detected = width_data.get('auto_detected', False)
+                        width_val = width_data['distance']
                     
-                    # Reset stylesheet just in case
-                    self.width_result.setStyleSheet("")
+                        # 🔴 ALERT: Check width < 15m
+                        if auto_detected:
+                            self._set_value_label(self.width_result, width_val, 15.0, "Ancho medido: {:.2f} m (auto-detectado)")
+                            self.auto_status.setText("✅ Ancho detectado automáticamente")
+                            self.auto_status.setStyleSheet(self._STYLE_OK)
+                        else:
+                            self._set_value_label(self.width_result, width_val, 15.0, "Ancho medido: {:.2f} m (manual)")
+                            self.auto_status.setText("✏️ Medición manual")
+                            self.auto_status.setStyleSheet(self._STYLE_INFO)
 
-                else:
-                    self.width_result.setText("Ancho medido: --")
-                    self.width_result.setStyleSheet("")
-                    self.auto_status.setText("Auto-detección activada" if self.auto_width_detection else "Modo manual activado")
-                    self.auto_status.setStyleSheet("color: green; font-style: italic;" if self.auto_width_detection else "color: orange; font-style: italic;")
+                    else:
+                        self._reset_value_label(self.width_result, "Ancho medido: --")
+                        self.auto_status.setText("Auto-detección activada" if self.auto_width_detection else "Modo manual activado")
+                        self.auto_status.setStyleSheet(self._STYLE_OK if self.auto_width_detection else self._STYLE_WARN)
                     
-        else:
-            # No measurements for this PK
-            if self.operation_mode == "ancho_proyectado":
-                self.crown_result.setText("Cota Lama: --")
-                self.width_result.setText("Ancho Proyectado: --")
-                self.width_result.setStyleSheet("")  # Reset style
             else:
-                self.crown_result.setText("Cota Coronamiento: --")
-                self.width_result.setText("Ancho medido: --")
-                self.width_result.setStyleSheet("")  # Reset style
+                # No measurements for this PK
+                if self.operation_mode == "ancho_proyectado":
+                    self.crown_result.setText("Cota Lama: --")
+                    self._reset_value_label(self.width_result, "Ancho Proyectado: --")
+                else:
+                    self.crown_result.setText("Cota Coronamiento: --")
+                    self._reset_value_label(self.width_result, "Ancho medido: --")
                 
-            self.auto_status.setText("Auto-detección activada" if self.auto_width_detection else "Modo manual activado")
-            self.auto_status.setStyleSheet("color: green; font-style: italic;" if self.auto_width_detection else "color: orange; font-style: italic;")
+                self.auto_status.setText("Auto-detección activada" if self.auto_width_detection else "Modo manual activado")
+                self.auto_status.setStyleSheet(self._STYLE_OK if self.auto_width_detection else self._STYLE_WARN)
         
-        # 🆕 Update LAMA and Revancha (only in Revancha mode)
-        if self.operation_mode == "revancha":
-            self.update_revancha_calculation()
+            # 🆕 Update LAMA and Revancha (only in Revancha mode)
+            if self.operation_mode == "revancha":
+                self.update_revancha_calculation()
             
         # 🆕 Sincronizar mediciones cargadas con ortomosaico
-        self.sync_measurements_to_orthomosaic()
+        self._schedule_ortho_sync()
     
     def update_revancha_calculation(self, current_pk=None):
         """
@@ -1876,26 +2231,22 @@ class InteractiveProfileViewer(QDialog):
         
         Esta función se llamará después de cada modificación de crown o LAMA.
         """
+        if not hasattr(self, 'profiles_data') or not hasattr(self, 'current_profile_index'):
+            return
+        profile = self.profiles_data[self.current_profile_index]
         if current_pk is None:
-            if hasattr(self, 'profiles_data') and hasattr(self, 'current_profile_index'):
-                profile = self.profiles_data[self.current_profile_index]
-                current_pk = profile.get('PK') or profile.get('pk')
-            else:
-                return
+            current_pk = profile.get('PK') or profile.get('pk')
+        measurements = self.saved_measurements.get(current_pk, _NO_MEASUREMENTS)
         
         # Get LAMA point - check saved first, then auto LAMA
-        manual_lama = None
-        if current_pk in self.saved_measurements and 'lama' in self.saved_measurements[current_pk]:
-            manual_lama = self.saved_measurements[current_pk]['lama']
+        manual_lama = measurements.get('lama')
         
         # Get auto LAMA points if available
-        auto_lama_points = None
-        if hasattr(self, 'profiles_data') and hasattr(self, 'current_profile_index'):
-            profile = self.profiles_data[self.current_profile_index]
-            auto_lama_points = profile.get('lama_points', [])
+        auto_lama_points = profile.get('lama_points', [])
         
         # Get LAMA elevation (manual takes priority)
         lama_elevation = None
+        lama_source = None
         if manual_lama:
             lama_elevation = manual_lama['y']
             lama_source = "manual"
@@ -1905,27 +2256,31 @@ class InteractiveProfileViewer(QDialog):
         
         # Get Crown elevation
         crown_elevation = None
-        if current_pk in self.saved_measurements and 'crown' in self.saved_measurements[current_pk]:
-            crown_elevation = self.saved_measurements[current_pk]['crown']['y']
+        if 'crown' in measurements:
+            crown_elevation = measurements['crown']['y']
         elif hasattr(self, 'current_crown_point') and self.current_crown_point:
             crown_elevation = self.current_crown_point[1]
         
+        # Mismas entradas que la última vez y etiquetas sin tocar desde entonces: nada que rehacer
+        inputs = (crown_elevation, lama_elevation, lama_source)
+        last = self._last_revancha
+        if (last is not None and last[0] == inputs
+                and self.revancha_result.text() == last[1]
+                and self.lama_result.text() == last[2]):
+            return last[3]
+        
         # Calculate Revancha
         if crown_elevation is not None and lama_elevation is not None:
             revancha = crown_elevation - lama_elevation
             
-            # 🔴 ALERT: Check Revancha < 3m (HTML Styling)
-            revancha_str = f"{revancha:.2f}"
-            if revancha <= 3.0:
-                revancha_str = f"<span style='color:red;'>{revancha_str}</span>"
-            
-            self.revancha_result.setText(f"Revancha: {revancha_str} m")
-            self.revancha_result.setStyleSheet("") # Reset style
+            # 🔴 ALERT: Check Revancha <= 3m
+            self._set_value_label(self.revancha_result, revancha, 3.0, "Revancha: {:.2f} m", inclusive=True)
             
             # Update LAMA display
             self.lama_result.setText(f"Cota LAMA: {lama_elevation:.2f} m ({lama_source})")
             
-            print(f"✅ Revancha calculada: {revancha:.2f}m (crown: {crown_elevation:.2f}m, lama: {lama_elevation:.2f}m)")
+            logger.debug("✅ Revancha calculada: %.2fm (crown: %.2fm, lama: %.2fm)", revancha, crown_elevation, lama_elevation)
+            self._last_revancha = (inputs, self.revancha_result.text(), self.lama_result.text(), revancha)
             return revancha
         else:
             # Show what's missing
@@ -1935,8 +2290,7 @@ class InteractiveProfileViewer(QDialog):
             if lama_elevation is None:
                 missing_parts.append("lama")
             
-            self.revancha_result.setText(f"Revancha: -- (falta {', '.join(missing_parts)})")
-            self.revancha_result.setStyleSheet("")  # Reset style
+            self._reset_value_label(self.revancha_result, f"Revancha: -- (falta {', '.join(missing_parts)})")
             
             # Still show LAMA if available
             if lama_elevation is not None:
@@ -1944,13 +2298,379 @@ class InteractiveProfileViewer(QDialog):
             else:
                 self.lama_result.setText("Cota LAMA: --")
             
+            self._last_revancha = (inputs, self.revancha_result.text(), self.lama_result.text(), None)
             return None
     
-    def update_profile_display(self, export_mode=False):
-        """Update the profile visualization including LAMA points and reference lines"""
-        if not self.profiles_data:
+    def _init_axes_style(self):
+        """Grid, ticks menores y etiquetas de ejes: estáticos, se configuran una vez"""
+        self.ax.grid(True, alpha=0.3, linestyle=':', linewidth=0.6)
+        
+        # Add minor grid for more precision
+        self.ax.minorticks_on()
+        self.ax.grid(which='minor', alpha=0.15, linestyle=':', linewidth=0.4)
+        
+        self.ax.set_xlabel('Distancia desde Eje (m)', fontsize=12)
+        self.ax.set_ylabel('Elevación (m)', fontsize=12)
+
+    def _line_artist(self, key, *args, **kwargs):
+        """Devuelve el Line2D persistente `key`, creándolo vacío en el primer uso"""
+        artist = self._artists.get(key)
+        if artist is None:
+            artist, = self.ax.plot([], [], *args, **kwargs)
+            self._artists[key] = artist
+        return artist
+
+    def _set_value_label(self, label, value, threshold, template, inclusive=False):
+        """Muestra value en label con template (str.format), en rojo si está bajo threshold.
+
+        Texto plano + stylesheet (sin parseo HTML). Si el label ya muestra ese mismo
+        valor y plantilla no se vuelve a formatear ni a tocar Qt.
+        """
+        key = (template, value)
+        cached = self._label_cache.get(label)
+        if cached is not None and cached[0] == key and label.text() == cached[1]:
+            return
+        alert = value <= threshold if inclusive else value < threshold
+        text = template.format(value)
+        self._label_cache[label] = (key, text)
+        label.setText(text)
+        label.setStyleSheet(self._STYLE_VALUE_ALERT if alert else "")
+
+    def _reset_value_label(self, label, text):
+        """Vuelve label a su texto por defecto sin el estilo de alerta de _set_value_label"""
+        self._label_cache.pop(label, None)
+        label.setText(text)
+        label.setStyleSheet("")
+
+    def _get_reference_elevation(self, pk):
+        """Cota base de las líneas de referencia del modo actual (o None).
+
+        Ancho Proyectado: lama seleccionada; Revancha: coronamiento. Si no está guardada
+        se usa el punto temporal (current_crown_point).
+        """
+        saved = self.saved_measurements.get(pk)
+        key = 'lama_selected' if self.operation_mode == "ancho_proyectado" else 'crown'
+        if saved and key in saved:
+            return saved[key]['y']
+        if self.current_crown_point:
+            return self.current_crown_point[1]
+        return None
+
+    def _draw_ref_lines(self, mode, base_elevation):
+        """Dibuja las líneas horizontales de referencia de mode en una sola LineCollection persistente.
+
+        Como axhline: x en coordenadas de ejes (0-1) y y en datos, así que cubren todo el
+        ancho sin depender del rango; una colección por modo con el estilo fijado al crearla,
+        por redibujado solo cambian las cotas. Devuelve [(cota, spec)] por línea para que la
+        leyenda arme sus entradas (la colección solo aportaría una), formateando solo si se muestra.
+        """
+        specs = self._REF_LINE_SPECS[mode]
+        lc = self._artists.get(('ref_lines', mode))
+        if lc is None:
+            lc = LineCollection([], transform=self.ax.get_yaxis_transform(), zorder=3,
+                                colors=[to_rgba(c, a) for _, c, _, _, a, _ in specs],
+                                linestyles=[ls for _, _, ls, _, _, _ in specs],
+                                linewidths=[lw for _, _, _, lw, _, _ in specs])
+            self.ax.add_collection(lc, autolim=False)
+            self._artists[('ref_lines', mode)] = lc
+        ys = [base_elevation + offset for offset, *_ in specs]
+        lc.set_segments([((0, y), (1, y)) for y in ys])
+        self._show_artist(lc)
+        return list(zip(ys, specs))
+
+    def _terrain_artist(self, key, **kwargs):
+        """Como _line_artist, pero con _TerrainLine (simplificación de trazo al dibujar)"""
+        artist = self._artists.get(key)
+        if artist is None:
+            artist = self.ax.add_line(_TerrainLine([], [], **kwargs))
+            self._artists[key] = artist
+        return artist
+
+    def _show_artist(self, artist, label='_nolegend_', value=None):
+        """Marca un artista persistente como visible en este frame.
+
+        Con value, label es una plantilla str.format: solo se formatea si la leyenda está
+        activa y el valor cambió (la etiqueta se conserva entre frames, ocultar no la borra).
+        """
+        artist.set_visible(True)
+        if value is None:
+            src = label
+        elif not self.show_legend:
             return
+        else:
+            src = (label, value)
+        if getattr(artist, '_label_src', None) != src:
+            artist._label_src = src
+            artist.set_label(label if value is None else label.format(value))
+
+    def _overlay(self, artist, export_mode):
+        """Registra una medición como artista animado (se blitea sobre el fondo cacheado).
+
+        En export_mode se deja como artista normal para que savefig lo incluya.
+        """
+        artist.set_animated(not export_mode)
+        if not export_mode:
+            self._animated_artists.append(artist)
+        return artist
+
+    def _clear_dynamic_artists(self):
+        """Reemplazo de ax.clear(): elimina artistas por-frame y oculta los persistentes"""
+        persistent = set(self._artists.values())
+        for artist in list(self.ax.lines) + list(self.ax.collections) + list(self.ax.texts) + list(self.ax.artists):
+            if artist in persistent:
+                artist.set_visible(False)
+            else:
+                artist.remove()
+        legend = self.ax.get_legend()
+        if legend:
+            legend.remove()
+
+    def _schedule_redraw(self):
+        """Agenda un único update_profile_display (como máximo uno cada 33 ms)"""
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self._display_timer.start()
+
+    def _do_redraw(self):
+        """Ejecuta el redibujado agendado (no-op si un update_profile_display directo ya lo hizo)"""
+        if self._redraw_pending:
+            if self._refresh_overlays():
+                self._redraw_pending = False
+            else:
+                self.update_profile_display()
+
+    def _background_key(self, x_min=None, x_max=None):
+        """Estado que determina el fondo cacheado (terreno, líneas de referencia, LAMA auto, límites)"""
+        if x_min is None:
+            x_min, x_max = self.get_wall_display_range()
+        measurements = self._current_measurements
+        return (self.current_profile_index, x_min, x_max, self.operation_mode,
+                measurements.get('crown', _NO_MEASUREMENTS).get('y'),
+                measurements.get('lama_selected', _NO_MEASUREMENTS).get('y'),
+                'lama' in measurements, self.current_crown_point and self.current_crown_point[1])
+
+    def _refresh_overlays(self):
+        """Camino rápido: si solo cambiaron las mediciones, redibuja esas y las blitea.
+
+        Requiere que el fondo cacheado corresponda al estado actual y a los límites que
+        pondría update_profile_display (sin zoom/pan del usuario); si no, devuelve False.
+        """
+        if self.show_legend or self._bg is None:
+            return False
+        self._refresh_current_refs()
+        limits = (tuple(self.ax.get_xlim()), tuple(self.ax.get_ylim()))
+        if limits != self._bg_limits or limits != self._home_limits or self._background_key() != self._bg_key:
+            return False
         
+        persistent = set(self._artists.values())
+        for artist in self._animated_artists:
+            if artist in persistent:
+                artist.set_visible(False)
+            else:
+                artist.remove()
+        self._animated_artists = []
+        self._draw_measurement_overlays()
+        self._blit_animated()
+        return True
+
+    def _draw_width_measurement(self, width_data, label_prefix, export_mode):
+        """Segmento de ancho guardado: un solo Line2D persistente con línea y extremos"""
+        p1, p2 = width_data['p1'], width_data['p2']
+        auto_detected = width_data.get('auto_detected', False)
+        kind = 'Auto' if auto_detected else 'Manual'
+        
+        line = self._line_artist('width_line', linewidth=2.5, alpha=0.9, zorder=4)
+        line.set_data([p1[0], p2[0]], [p1[1], p2[1]])
+        line.set_color('lime' if (auto_detected or export_mode) else 'magenta')
+        line.set_linestyle('-' if auto_detected else '--')
+        # En export_mode, NO dibujar los puntos extremos, solo la línea
+        line.set_marker('None' if export_mode else 'o')
+        line.set_markersize(10 if auto_detected else 8)
+        self._show_artist(line, label_prefix + kind + ': {:.2f}m', width_data['distance'])
+        self._overlay(line, export_mode)
+
+    def _draw_measurement_overlays(self, export_mode=False):
+        """Dibuja las mediciones del PK actual (guardadas y temporales) sobre el perfil.
+
+        Todas se registran con _overlay, así que pueden redibujarse solas (blit) mientras
+        el fondo (terreno, líneas de referencia, LAMA automática) no cambie.
+        """
+        # 📏 Show SAVED measurements for current PK - Different based on mode
+        measurements = self._current_measurements
+        if measurements:
+            if self.operation_mode == "ancho_proyectado":
+                # Modo Ancho Proyectado
+                if 'lama_selected' in measurements:
+                    lama_data = measurements['lama_selected']
+                    self._overlay(self.ax.plot(lama_data['x'], lama_data['y'], 'o', color='yellow', markersize=12,
+                            markeredgecolor='orange', markeredgewidth=2, 
+                            label=f'Lama Seleccionada: {lama_data["y"]:.2f}m', zorder=4)[0], export_mode)
+                
+                # Width measurement
+                if 'width' in measurements:
+                    self._draw_width_measurement(measurements['width'], 'Ancho ', export_mode)
+            else:
+                # Modo Revancha (lógica original)
+                if 'crown' in measurements:
+                    crown_data = measurements['crown']
+                    # Dibujar punto de coronamiento (azul intenso con borde negro) siempre
+                    marker = self._line_artist('crown_marker', 'o', color='#0000FF', markersize=12,
+                                               markeredgecolor='black', markeredgewidth=1.5, zorder=4)
+                    marker.set_data([crown_data['x']], [crown_data['y']])
+                    self._show_artist(marker, 'Cota Coronamiento: {:.2f}m', crown_data['y'])
+                    self._overlay(marker, export_mode)
+                
+                # Width measurement with auto-detection indicator
+                if 'width' in measurements:
+                    self._draw_width_measurement(measurements['width'], '', export_mode)
+                
+                # Manual LAMA point (overrides automatic)
+                if 'lama' in measurements:
+                    lama_data = measurements['lama']
+                    self._overlay(self.ax.plot(lama_data['x'], lama_data['y'], 'o', color='orange', markersize=12,
+                            markeredgecolor='red', markeredgewidth=2, 
+                            label=f'LAMA Manual: {lama_data["y"]:.2f}m', zorder=4)[0], export_mode)
+        
+        # 🎯 Show current temporary measurements - NO en export_mode
+        if not export_mode:
+            if self.current_crown_point:
+                self._overlay(self.ax.plot(self.current_crown_point[0], self.current_crown_point[1], 'go', 
+                            markersize=12, alpha=0.8, label='Cota (temp)', zorder=5)[0], export_mode)
+            
+            if self._wp_i == 1:
+                self._overlay(self.ax.plot(self._wp[0][0], self._wp[0][1], 
+                            'yo', markersize=10, label='Punto 1', zorder=5)[0], export_mode)
+
+    def _add_export_legend(self, profile, current_pk):
+        """📸 Leyenda de las capturas de alertas: coronamiento, lama, revancha y ancho.
+
+        La caja armada (TextArea/VPacker/AnchoredOffsetbox) se cachea por PK junto con los
+        valores que muestra; si el PK no cambió desde la última captura se vuelve a añadir
+        tal cual, sin rearmarla.
+        """
+        measurements = self.saved_measurements.get(current_pk, _NO_MEASUREMENTS)
+        
+        # 1. Cota Coronamiento (punto azul intenso)
+        crown = measurements.get('crown')
+        crown_val = crown['y'] if crown is not None else None
+        
+        # 2. Cota Lama: manual o seleccionada según modo, con fallback a la automática
+        lama = measurements.get('lama')
+        if lama is None:
+            lama = measurements.get('lama_selected')
+        lama_val = lama['y'] if lama is not None else None
+        if lama_val is None and profile.get('lama_points'):
+            lama_val = profile['lama_points'][0]['elevation']
+        
+        # 3. Revancha (sin símbolo)
+        revancha_val = crown_val - lama_val if crown_val is not None and lama_val is not None else None
+        
+        # 4. Ancho (línea verde)
+        width = measurements.get('width')
+        width_val = width['distance'] if width is not None else None
+        
+        # 🆕 Determinar posición según el muro seleccionado
+        # Default: Muro Principal (Top-Right)
+        # MO (Muro Oeste/2): Bottom-Right
+        loc_param = 'upper right'
+        bbox_param = (0.98, 0.98)
+        valign_param = 'top'
+        
+        try:
+            # Intentar obtener nombre del muro desde el padre
+            wall_name = "Muro Principal" 
+            if self.parent() and hasattr(self.parent(), 'selected_wall') and self.parent().selected_wall:
+                wall_name = self.parent().selected_wall
+            
+            wall_lower = wall_name.lower()
+            if "oeste" in wall_lower or "mo" in wall_lower or "muro 2" in wall_lower:
+                # Muro Oeste -> Abajo Derecha
+                loc_param = 'lower right'
+                bbox_param = (0.98, 0.02)
+                valign_param = 'bottom'
+        except:
+            pass
+        
+        key = (self.ax, crown_val, lama_val, width_val, loc_param)
+        cached = self._legend_cache.get(current_pk)
+        if cached is not None and cached[0] == key:
+            self.ax.add_artist(cached[1])
+            return
+        
+        # 🆕 CONSTRUIR LEYENDA MULTICOLOR (VPacker)
+        try:
+            pack_items = []
+            
+            # Cota Coronamiento
+            if crown_val is not None:
+                pack_items.append(TextArea(f"● Cota Coronamiento: {crown_val:.2f} m", textprops=dict(color='blue', size=11, family='monospace')))
+
+            # Cota Lama
+            if lama_val is not None:
+                pack_items.append(TextArea(f"● Cota Lama: {lama_val:.2f} m", textprops=dict(color='black', size=11, family='monospace')))
+            
+            # Revancha (ROJO si <= 3.0)
+            if revancha_val is not None:
+                color = 'red' if revancha_val <= 3.0 else 'black'
+                pack_items.append(TextArea(f"  Revancha: {revancha_val:.2f} m", textprops=dict(color=color, size=11, family='monospace')))
+            
+            # Ancho (ROJO si < 15.0)
+            if width_val is not None:
+                color = 'red' if width_val < 15.0 else 'black'
+                pack_items.append(TextArea(f"─ Ancho: {width_val:.2f} m", textprops=dict(color=color, size=11, family='monospace')))
+            
+            # Empaquetar verticalmente alineado a la derecha
+            vbox = VPacker(children=pack_items, align="right", pad=0, sep=4)
+
+            # Crear caja anclada
+            anchored_box = AnchoredOffsetbox(loc=loc_param, 
+                                           child=vbox, 
+                                           pad=0.5, 
+                                           frameon=True, 
+                                           bbox_to_anchor=bbox_param,
+                                           bbox_transform=self.ax.transAxes, 
+                                           borderpad=0.5)
+            
+            # Estilo del cuadro (igual al anterior)
+            anchored_box.patch.set_boxstyle("round,pad=0.5,rounding_size=0.2")
+            anchored_box.patch.set_facecolor("white")
+            anchored_box.patch.set_alpha(0.9)
+            anchored_box.patch.set_edgecolor("black")
+            anchored_box.patch.set_linewidth(1.5)
+            
+            self.ax.add_artist(anchored_box)
+            self._legend_cache[current_pk] = (key, anchored_box)
+            
+        except Exception as e:
+            print(f"⚠️ Error generando leyenda multicolor: {e}. Usando texto simple.")
+            # Fallback a texto simple si falla VPacker
+            legend_lines = []
+            if crown_val is not None:
+                legend_lines.append(f"● Cota Coronamiento: {crown_val:.2f} m")
+            if lama_val is not None:
+                legend_lines.append(f"● Cota Lama: {lama_val:.2f} m")
+            if revancha_val is not None:
+                legend_lines.append(f"  Revancha: {revancha_val:.2f} m")
+            if width_val is not None:
+                legend_lines.append(f"─ Ancho: {width_val:.2f} m")
+            if legend_lines:
+                legend_text = "\n".join(legend_lines)
+                self.ax.text(0.98, bbox_param[1], legend_text, # Use matching Y coord
+                           transform=self.ax.transAxes,
+                           fontsize=11,
+                           verticalalignment=valign_param, # Use matching alignment
+                           horizontalalignment='right',
+                           bbox=dict(boxstyle='round', facecolor='white', alpha=0.9, edgecolor='black', linewidth=1.5),
+                           family='monospace',
+                           weight='bold')
+
+    def _render_profile(self, export_mode=False):
+        """Dibuja el perfil actual sobre self.ax (terreno, referencias, mediciones, leyenda y límites).
+
+        No toca etiquetas Qt ni el canvas: lo comparten update_profile_display y la exportación
+        fuera de pantalla (_export_profile_png). Devuelve (x_min, x_max, (emin, emax, n_valid))
+        con las cotas visibles, o (x_min, x_max, None) si no hay datos válidos en el rango.
+        """
         profile = self.profiles_data[self.current_profile_index]
         current_pk = profile.get('pk', 'Unknown')
         # 🆕 OBTENER RANGOS ESPECÍFICOS DEL MURO
@@ -2010,173 +2730,86 @@ class InteractiveProfileViewer(QDialog):
                     
             except Exception as e:
                 print(f"⚠️ Error calculando Smart Zoom: {e}. Usando rango por defecto.")
-        # Clear and plot
-        self.ax.clear()
+        # Quitar solo los artistas por-frame; los persistentes se reutilizan con set_data
+        self._clear_dynamic_artists()
         
-        # Extract data
-        distances = profile.get('distances', [])
-        elevations = profile.get('elevations', [])
+        # Extract data (columnas NumPy precalculadas en _prepare_profile_arrays)
+        distances = profile['_d']
+        elevations = profile['_e']
         
         # 🔧 CRITICAL FIX: Filter data to display range FIRST
         # This ensures we only plot what's visible and prevents "empty" appearance
-        print(f"📊 DEBUG - Total points: {len(distances)}, Range: {x_min} to {x_max}")
+        logger.debug("📊 Total points: %d, Range: %s to %s", len(distances), x_min, x_max)
         
         # Filter valid data within the display range
-        valid_data = [(d, e) for d, e in zip(distances, elevations) 
-                      if e != -9999 and x_min <= d <= x_max]
+        idx = self._range_index(profile, x_min, x_max)
+        in_range = profile['_valid'][idx]
+        valid_distances = distances[idx][in_range]
+        valid_elevations = elevations[idx][in_range]
+        n_valid = int(valid_distances.size)
         
-        print(f"📊 DEBUG - Points in range: {len(valid_data)}")
+        logger.debug("📊 Points in range: %d", n_valid)
         
-        if not valid_data:
+        if not n_valid:
+            self.ax.set_title(f'Perfil Topográfico - {current_pk}', fontsize=14, fontweight='bold')
             self.ax.text(0.5, 0.5, f'No hay datos válidos en el rango {x_min}m a {x_max}m', 
                         ha='center', va='center', transform=self.ax.transAxes)
-            self.canvas.draw()
-            return
+            return x_min, x_max, None
         
-        valid_distances, valid_elevations = zip(*valid_data)
+        # Extremos de las cotas visibles, una sola pasada (relleno, escala Y y panel de info)
+        emin = float(valid_elevations.min())
+        emax = float(valid_elevations.max())
         
         # 🆕 Plot Previous Terrain (Background) - SOLO en modo interactivo
         if not export_mode:
-            previous_elevations = profile.get('previous_elevations', [])
-            if previous_elevations and len(previous_elevations) == len(distances):
-                # Filter valid previous data
-                valid_prev_data = [(d, pe) for d, pe in zip(distances, previous_elevations) 
-                                 if pe != -9999 and x_min <= d <= x_max]
+            previous_elevations = profile['_pe']  # columna float32 precalculada (o None)
+            if previous_elevations is not None:
+                # Filter valid previous data: mismo recorte de rango que el terreno + máscara de nodata
+                prev_e = previous_elevations[idx]
+                keep = prev_e != -9999
+                prev_d, prev_e = distances[idx][keep], prev_e[keep]
                 
-                if valid_prev_data:
-                    prev_d, prev_e = zip(*valid_prev_data)
-                    self.ax.plot(prev_d, prev_e, '--', color='gray', linewidth=1.0, 
-                               alpha=0.6, label='Terreno Anterior', zorder=0)
+                if prev_d.size:
+                    prev_line = self._terrain_artist('prev_terrain', linestyle='--', color='gray',
+                                                     linewidth=1.0, alpha=0.6, zorder=0)
+                    prev_line.set_data(prev_d, prev_e)
+                    self._show_artist(prev_line, 'Terreno Anterior')
 
         # 🎨 Plot the profile with FINER LINE and MORE DETAIL
-        self.ax.plot(valid_distances, valid_elevations, 'b-', linewidth=1.2,
-                    label='Terreno Natural', alpha=0.9)
+        terrain = self._terrain_artist('terrain', color='b', linestyle='-', linewidth=1.2, alpha=0.9)
+        terrain.set_data(valid_distances, valid_elevations)
+        self._show_artist(terrain, 'Terreno Natural')
         
         # Fill with reduced opacity to see terrain detail better
-        self.ax.fill_between(valid_distances, valid_elevations,
-                        min(valid_elevations) - 2, alpha=0.15, color='brown',
-                        label='Terreno')
+        # (polígono persistente: se reemplazan sus vértices, sin rehacer fill_between)
+        fill = self._artists.get('fill')
+        if fill is None:
+            fill = self._artists['fill'] = PolyCollection([], alpha=0.15, color='brown')
+            # Polígono denso y sin interacción: en SVG/PDF (guardar desde la barra) va como bitmap
+            fill.set_rasterized(True)
+            self.ax.add_collection(fill, autolim=False)
+        base = emin - 2
+        fill.set_verts([np.column_stack((np.concatenate((valid_distances, valid_distances[::-1])),
+                                         np.concatenate((valid_elevations, np.full_like(valid_elevations, base)))))])
+        self._show_artist(fill, 'Terreno')
         
         # 📍 Mark centerline - SOLO en modo interactivo
         if not export_mode:
-            self.ax.axvline(x=0, color='red', linestyle='--', linewidth=1.8, alpha=0.8, 
-                        label='Eje de Alineación')
+            centerline = self._artists.get('centerline')
+            if centerline is None:
+                # Vertical en x=0 con transformación mixta: no depende del perfil, se crea una vez
+                centerline = self._artists['centerline'] = self.ax.axvline(
+                    x=0, color='red', linestyle='--', linewidth=1.8, alpha=0.8)
+            self._show_artist(centerline, 'Eje de Alineación')
         
         # 🆕 REFERENCE LINES - Different logic based on operation mode - SOLO en modo interactivo
-        if not export_mode:
-            if self.operation_mode == "ancho_proyectado":
-                # Modo Ancho Proyectado: Línea en lama, línea +2m (visual) y línea +3m (medición)
-                lama_elevation = None
-                
-                # Get lama point (selected manually)
-                if current_pk in self.saved_measurements and 'lama_selected' in self.saved_measurements[current_pk]:
-                    lama_elevation = self.saved_measurements[current_pk]['lama_selected']['y']
-                elif self.current_crown_point:
-                    lama_elevation = self.current_crown_point[1]
-                    
-                if lama_elevation is not None:
-                    x_range = [x_min, x_max]
-                    
-                    # Línea en la lama (visual reference)
-                    y_lama = [lama_elevation, lama_elevation]
-                    self.ax.plot(x_range, y_lama, ':', color='yellow', linewidth=2.0, 
-                                alpha=0.8, label=f'Lama: {lama_elevation:.2f}m', zorder=2)
-                    
-                    # 🆕 Línea de ayuda visual (+2m) - MÁS TENUE
-                    visual_elevation = lama_elevation + 2.0
-                    y_visual = [visual_elevation, visual_elevation]
-                    self.ax.plot(x_range, y_visual, ':', color='gray', linewidth=1.0, 
-                                alpha=0.4, label=f'Visual +2m: {visual_elevation:.2f}m', zorder=1)
-                    
-                    # Línea de referencia 3m arriba (para medición)
-                    reference_elevation = lama_elevation + 3.0
-                    y_ref = [reference_elevation, reference_elevation]
-                    self.ax.plot(x_range, y_ref, '--', color='orange', linewidth=2.5, 
-                                alpha=1.0, label=f'Ref. +3m: {reference_elevation:.2f}m', zorder=3)
-            else:
-                # Modo Revancha: Línea de coronamiento y auxiliar
-                crown_elevation = None
-                if current_pk in self.saved_measurements and 'crown' in self.saved_measurements[current_pk]:
-                    crown_elevation = self.saved_measurements[current_pk]['crown']['y']
-                elif self.current_crown_point:
-                    crown_elevation = self.current_crown_point[1]
-                
-                if crown_elevation is not None:
-                    x_range = [x_min, x_max]
-                    
-                    # 🔥 MAIN REFERENCE LINE - MÁS INTENSA
-                    y_ref = [crown_elevation, crown_elevation]
-                    self.ax.plot(x_range, y_ref, '--', color='orange', linewidth=2.5, 
-                                alpha=1.0, label=f'Ref. Coronamiento: {crown_elevation:.2f}m',
-                                zorder=3)
-                    
-                    # 🆕 AUXILIARY LINE - 1 metro debajo, MÁS TENUE
-                    aux_elevation = crown_elevation - 1.0  # 1 metro abajo
-                    y_aux = [aux_elevation, aux_elevation]
-                    self.ax.plot(x_range, y_aux, ':', color='gray', linewidth=1.5, 
-                                alpha=0.6, label=f'Auxiliar (-1m): {aux_elevation:.2f}m',
-                                zorder=2)
-        
-        # 📏 Show SAVED measurements for current PK - Different based on mode
-        if current_pk in self.saved_measurements:
-            measurements = self.saved_measurements[current_pk]
-            
-            if self.operation_mode == "ancho_proyectado":
-                # Modo Ancho Proyectado
-                if 'lama_selected' in measurements:
-                    lama_data = measurements['lama_selected']
-                    self.ax.plot(lama_data['x'], lama_data['y'], 'o', color='yellow', markersize=12,
-                            markeredgecolor='orange', markeredgewidth=2, 
-                            label=f'Lama Seleccionada: {lama_data["y"]:.2f}m', zorder=4)
-                
-                # Width measurement
-                if 'width' in measurements:
-                    width_data = measurements['width']
-                    p1, p2 = width_data['p1'], width_data['p2']
-                    auto_detected = width_data.get('auto_detected', False)
-                    
-                    color = 'lime' if (auto_detected or export_mode) else 'magenta'
-                    marker_size = 10 if auto_detected else 8
-                    line_style = '-' if auto_detected else '--'
-                    label_prefix = 'Auto' if auto_detected else 'Manual'
-                    
-                    # En export_mode, NO dibujar los puntos extremos, solo la línea
-                    if not export_mode:
-                        self.ax.plot([p1[0], p2[0]], [p1[1], p2[1]], 'o', color=color, markersize=marker_size, zorder=4)
-                    self.ax.plot([p1[0], p2[0]], [p1[1], p2[1]], color=color, linestyle=line_style, 
-                            linewidth=2.5, alpha=0.9, label=f'Ancho {label_prefix}: {width_data["distance"]:.2f}m', zorder=4)
-            else:
-                # Modo Revancha (lógica original)
-                if 'crown' in measurements:
-                    crown_data = measurements['crown']
-                    # Dibujar punto de coronamiento (azul intenso con borde negro) siempre
-                    self.ax.plot(crown_data['x'], crown_data['y'], 'o', color='#0000FF', markersize=12, 
-                            markeredgecolor='black', markeredgewidth=1.5,
-                            label=f'Cota Coronamiento: {crown_data["y"]:.2f}m', zorder=4)
-                
-                # Width measurement with auto-detection indicator
-                if 'width' in measurements:
-                    width_data = measurements['width']
-                    p1, p2 = width_data['p1'], width_data['p2']
-                    auto_detected = width_data.get('auto_detected', False)
-                    
-                    color = 'lime' if (auto_detected or export_mode) else 'magenta'
-                    marker_size = 10 if auto_detected else 8
-                    line_style = '-' if auto_detected else '--'
-                    label_prefix = 'Auto' if auto_detected else 'Manual'
-                    
-                    # En export_mode, NO dibujar los puntos extremos, solo la línea
-                    if not export_mode:
-                        self.ax.plot([p1[0], p2[0]], [p1[1], p2[1]], 'o', color=color, markersize=marker_size, zorder=4)
-                    self.ax.plot([p1[0], p2[0]], [p1[1], p2[1]], color=color, linestyle=line_style, 
-                            linewidth=2.5, alpha=0.9, label=f'{label_prefix}: {width_data["distance"]:.2f}m', zorder=4)
-                
-                # Manual LAMA point (overrides automatic)
-                if 'lama' in measurements:
-                    lama_data = measurements['lama']
-                    self.ax.plot(lama_data['x'], lama_data['y'], 'o', color='orange', markersize=12,
-                            markeredgecolor='red', markeredgewidth=2, 
-                            label=f'LAMA Manual: {lama_data["y"]:.2f}m', zorder=4)
+        # Ancho Proyectado: lama, ayuda visual +2m y referencia +3m (medición);
+        # Revancha: coronamiento y auxiliar -1m (ver _REF_LINE_SPECS)
+        ref_mode = 'ancho_proyectado' if self.operation_mode == "ancho_proyectado" else 'revancha'
+        reference_elevation = self._get_reference_elevation(current_pk)
+        ref_entries = []
+        if not export_mode and reference_elevation is not None:
+            ref_entries = self._draw_ref_lines(ref_mode, reference_elevation)
         
         # Show automatic LAMA points (only in Revancha mode and if no manual override)
         # EN EXPORT_MODE: Mostrar si no hay manual override
@@ -2184,212 +2817,151 @@ class InteractiveProfileViewer(QDialog):
             if current_pk not in self.saved_measurements or 'lama' not in self.saved_measurements[current_pk]:
                 lama_points = profile.get('lama_points', [])
                 if lama_points:
-                    for lama_point in lama_points:
-                        # Dibujar siempre (incluso en export_mode)
-                        self.ax.plot(lama_point['offset_from_centerline'], lama_point['elevation'], 
-                                    'o', color='orange', markersize=12, markeredgecolor='red',
-                                    markeredgewidth=2, label=f'LAMA Auto: {lama_point["elevation"]:.2f}m', zorder=4)
-        
-        # 🎯 Show current temporary measurements - NO en export_mode
-        if not export_mode:
-            if self.current_crown_point:
-                self.ax.plot(self.current_crown_point[0], self.current_crown_point[1], 'go', 
-                            markersize=12, alpha=0.8, label='Cota (temp)', zorder=5)
-            
-            if len(self.current_width_points) == 1:
-                self.ax.plot(self.current_width_points[0][0], self.current_width_points[0][1], 
-                            'yo', markersize=10, label='Punto 1', zorder=5)
-        
-        # 🎨 Formatting with MORE DETAIL
-        self.ax.grid(True, alpha=0.3, linestyle=':', linewidth=0.6)
+                    for k, lama_point in enumerate(lama_points):
+                        # Dibujar siempre (incluso en export_mode); un marcador persistente por punto
+                        marker = self._line_artist(('lama_auto', k), 'o', color='orange', markersize=12,
+                                                   markeredgecolor='red', markeredgewidth=2, zorder=4)
+                        marker.set_data([lama_point['offset_from_centerline']], [lama_point['elevation']])
+                        self._show_artist(marker, 'LAMA Auto: {:.2f}m', lama_point['elevation'])
         
-        # Add minor grid for more precision
-        self.ax.minorticks_on()
-        self.ax.grid(which='minor', alpha=0.15, linestyle=':', linewidth=0.4)
+        # 📏 Mediciones guardadas y temporales (artistas animados, ver _draw_measurement_overlays)
+        self._draw_measurement_overlays(export_mode)
         
-        self.ax.set_xlabel('Distancia desde Eje (m)', fontsize=12)
-        self.ax.set_ylabel('Elevación (m)', fontsize=12)
+        # 🎨 Grid y etiquetas de ejes se configuran una sola vez (_init_axes_style)
         self.ax.set_title(f'Perfil Topográfico - {current_pk}', fontsize=14, fontweight='bold')
         
-        # 🆕 Mostrar leyenda solo si está activada
+        # 🆕 Mostrar leyenda solo si está activada (solo artistas visibles)
         if self.show_legend and not export_mode:
-            self.ax.legend(loc='upper right', fontsize=9)
+            handles, labels = self.ax.get_legend_handles_labels()
+            visible = [(h, l) for h, l in zip(handles, labels) if h.get_visible()]
+            # Las líneas de referencia son una sola colección: una entrada (proxy) por línea
+            visible += [(Line2D([], [], color=c, linestyle=ls, linewidth=lw, alpha=a), label.format(y))
+                        for y, (_, c, ls, lw, a, label) in ref_entries]
+            if visible:
+                self.ax.legend(*zip(*visible), loc='upper right', fontsize=9)
         elif export_mode:
-            # 📸 LEYENDA SIMPLIFICADA PARA PANTALLAZOS DE ALERTAS
-            legend_lines = []
-            
-            # 1. Cota Coronamiento (punto azul intenso)
-            crown_val = None
-            if current_pk in self.saved_measurements and 'crown' in self.saved_measurements[current_pk]:
-                crown_val = self.saved_measurements[current_pk]['crown']['y']
-                legend_lines.append(f"● Cota Coronamiento: {crown_val:.2f} m")
-            
-            # 2. Cota Lama (punto naranja)
-            lama_val = None
-            if current_pk in self.saved_measurements:
-                # Buscar lama en diferentes formatos según modo
-                if 'lama' in self.saved_measurements[current_pk]:
-                    lama_val = self.saved_measurements[current_pk]['lama']['y']
-                elif 'lama_selected' in self.saved_measurements[current_pk]:
-                    lama_val = self.saved_measurements[current_pk]['lama_selected']['y']
-            
-            # Fallback a lama automática
-            if lama_val is None and 'lama_points' in profile and profile['lama_points']:
-                lama_val = profile['lama_points'][0]['elevation']
-            
-            if lama_val is not None:
-                legend_lines.append(f"● Cota Lama: {lama_val:.2f} m")
-            
-            # 3. Revancha (sin símbolo)
-            if crown_val is not None and lama_val is not None:
-                revancha_val = crown_val - lama_val
-                legend_lines.append(f"  Revancha: {revancha_val:.2f} m")
-            
-            # 4. Ancho (línea verde)
-            width_val = None
-            if current_pk in self.saved_measurements and 'width' in self.saved_measurements[current_pk]:
-                width_val = self.saved_measurements[current_pk]['width']['distance']
-                legend_lines.append(f"─ Ancho: {width_val:.2f} m")
-            
-            # 🆕 CONSTRUIR LEYENDA MULTICOLOR (VPacker)
-            try:
-                pack_items = []
-                
-                # Header - REMOVED AS REQUESTED
-                # pack_items.append(TextArea(f"Perfil: {current_pk}", textprops=dict(color='black', weight='bold', size=11, family='monospace')))
-                
-                # Cota Coronamiento
-                if crown_val is not None:
-                     pack_items.append(TextArea(f"● Cota Coronamiento: {crown_val:.2f} m", textprops=dict(color='blue', size=11, family='monospace')))
-
-                # Cota Lama
-                if lama_val is not None:
-                    pack_items.append(TextArea(f"● Cota Lama: {lama_val:.2f} m", textprops=dict(color='black', size=11, family='monospace')))
-                
-                # Revancha (ROJO si <= 3.0)
-                if revancha_val is not None:
-                    color = 'red' if revancha_val <= 3.0 else 'black'
-                    pack_items.append(TextArea(f"  Revancha: {revancha_val:.2f} m", textprops=dict(color=color, size=11, family='monospace')))
-                
-                # Ancho (ROJO si < 15.0)
-                if width_val is not None:
-                    color = 'red' if width_val < 15.0 else 'black'
-                    pack_items.append(TextArea(f"─ Ancho: {width_val:.2f} m", textprops=dict(color=color, size=11, family='monospace')))
-                
-                # Empaquetar verticalmente alineado a la derecha
-                vbox = VPacker(children=pack_items, align="right", pad=0, sep=4)
-                
-                # 🆕 Determinar posición según el muro seleccionado
-                # Default: Muro Principal (Top-Right)
-                # MO (Muro Oeste/2): Bottom-Right
-                loc_param = 'upper right'
-                bbox_param = (0.98, 0.98)
-                valign_param = 'top'
-                
-                try:
-                    # Intentar obtener nombre del muro desde el padre
-                    wall_name = "Muro Principal" 
-                    if self.parent() and hasattr(self.parent(), 'selected_wall') and self.parent().selected_wall:
-                        wall_name = self.parent().selected_wall
-                    
-                    wall_lower = wall_name.lower()
-                    if "oeste" in wall_lower or "mo" in wall_lower or "muro 2" in wall_lower:
-                        # Muro Oeste -> Abajo Derecha
-                        loc_param = 'lower right'
-                        bbox_param = (0.98, 0.02)
-                        valign_param = 'bottom'
-                except:
-                    pass
-
-                # Crear caja anclada
-                anchored_box = AnchoredOffsetbox(loc=loc_param, 
-                                               child=vbox, 
-                                               pad=0.5, 
-                                               frameon=True, 
-                                               bbox_to_anchor=bbox_param,
-                                               bbox_transform=self.ax.transAxes, 
-                                               borderpad=0.5)
-                
-                # Estilo del cuadro (igual al anterior)
-                anchored_box.patch.set_boxstyle("round,pad=0.5,rounding_size=0.2")
-                anchored_box.patch.set_facecolor("white")
-                anchored_box.patch.set_alpha(0.9)
-                anchored_box.patch.set_edgecolor("black")
-                anchored_box.patch.set_linewidth(1.5)
-                
-                self.ax.add_artist(anchored_box)
-                
-            except Exception as e:
-                print(f"⚠️ Error generando leyenda multicolor: {e}. Usando texto simple.")
-                # Fallback a texto simple si falla VPacker
-                if legend_lines:
-                    legend_text = "\n".join(legend_lines)
-                    self.ax.text(0.98, bbox_param[1], legend_text, # Use matching Y coord
-                               transform=self.ax.transAxes,
-                               fontsize=11,
-                               verticalalignment=valign_param, # Use matching alignment
-                               horizontalalignment='right',
-                               bbox=dict(boxstyle='round', facecolor='white', alpha=0.9, edgecolor='black', linewidth=1.5),
-                               family='monospace',
-                               weight='bold')
-        else:
-            # Remover leyenda si existe
-            legend = self.ax.get_legend()
-            if legend:
-                legend.remove()
+            # 📸 LEYENDA SIMPLIFICADA PARA PANTALLAZOS DE ALERTAS (cacheada por PK, ver _add_export_legend)
+            self._add_export_legend(profile, current_pk)
+        # Con la leyenda oculta no se llama a legend(): la anterior ya la quitó _clear_dynamic_artists()
         
         # 🎯 Focus on relevant area with custom range
         self.ax.set_xlim(x_min, x_max)
         
-        if valid_elevations:
-            # valid_data already filtered to display range, so use all elevations
-            relevant_elevations = list(valid_elevations)
-            
-            # 🆕 Include reference elevations in Y-axis scaling based on mode
-            reference_elevation = None
-            if self.operation_mode == "ancho_proyectado":
-                # Get lama elevation for Ancho Proyectado
-                if current_pk in self.saved_measurements and 'lama_selected' in self.saved_measurements[current_pk]:
-                    reference_elevation = self.saved_measurements[current_pk]['lama_selected']['y']
-                elif self.current_crown_point:
-                    reference_elevation = self.current_crown_point[1]
-                    
-                if reference_elevation is not None:
-                    relevant_elevations.append(reference_elevation)  # Lama line
-                    relevant_elevations.append(reference_elevation + 2.0)  # +2m visual line
-                    relevant_elevations.append(reference_elevation + 3.0)  # +3m reference line
-            else:
-                # Get crown elevation for Revancha mode
-                if current_pk in self.saved_measurements and 'crown' in self.saved_measurements[current_pk]:
-                    reference_elevation = self.saved_measurements[current_pk]['crown']['y']
-                elif self.current_crown_point:
-                    reference_elevation = self.current_crown_point[1]
-                    
-                if reference_elevation is not None:
-                    relevant_elevations.append(reference_elevation)  # Crown line
-                    relevant_elevations.append(reference_elevation - 1.0)  # Auxiliary line
-            
-            if relevant_elevations:
-                margin = (max(relevant_elevations) - min(relevant_elevations)) * 0.08
-                self.ax.set_ylim(min(relevant_elevations) - margin, 
-                            max(relevant_elevations) + margin)
-            else:
-                # Fallback to all elevations
-                margin = (max(valid_elevations) - min(valid_elevations)) * 0.08
-                self.ax.set_ylim(min(valid_elevations) - margin, 
-                            max(valid_elevations) + margin)
+        # valid_data already filtered to display range, so use all elevations
+        y_lo, y_hi = emin, emax
         
-        # Update UI labels
-        self.current_pk_label.setText(f"{current_pk}")
-        self.profile_counter.setText(f"{self.current_profile_index + 1} / {len(self.profiles_data)}")
+        # 🆕 Include reference elevations in Y-axis scaling based on mode
+        # (todas las líneas de referencia del modo, aunque en export no se dibujen)
+        if reference_elevation is not None:
+            offsets = [spec[0] for spec in self._REF_LINE_SPECS[ref_mode]]
+            y_lo = min(y_lo, reference_elevation + min(offsets))
+            y_hi = max(y_hi, reference_elevation + max(offsets))
+        
+        margin = (y_hi - y_lo) * 0.08
+        self.ax.set_ylim(y_lo - margin, y_hi + margin)
+        
+        return x_min, x_max, (emin, emax, n_valid)
+
+    def _export_profile_png(self, index, path, png_pool=None):
+        """Renderiza el perfil index en modo export sobre una figura Agg propia y lo guarda en path.
+
+        No pasa por el canvas Qt ni cambia el perfil mostrado: figura, ejes y artistas
+        persistentes se intercambian solo durante el render y se restauran al terminar.
+        Con png_pool (ThreadPoolExecutor) solo se renderiza aquí: se copia el buffer RGBA y
+        la codificación PNG se encola en el pool; devuelve el Future (None si se guardó ya).
+        """
+        if self._offscreen is None:
+            fig = Figure()
+            fig.subplots_adjust(**self._FIGURE_MARGINS)
+            FigureCanvasAgg(fig)
+            self._offscreen = (fig, fig.add_subplot(111), {})
+            saved_ax, self.ax = self.ax, self._offscreen[1]
+            try:
+                self._init_axes_style()
+            finally:
+                self.ax = saved_ax
+        fig, ax, artists = self._offscreen
+        # Mismo tamaño/resolución que la vista interactiva (las capturas no cambian de aspecto)
+        fig.set_dpi(self.figure.dpi)
+        fig.set_size_inches(self.figure.get_size_inches())
+        
+        saved = (self.ax, self._artists, self._animated_artists,
+                 self.current_profile_index, self.current_crown_point)
+        self.ax, self._artists, self._animated_artists = ax, artists, []
+        self.current_profile_index = index
+        self.current_crown_point = None  # las mediciones temporales no se exportan
+        try:
+            self._refresh_current_refs()
+            self._render_profile(export_mode=True)
+            if png_pool is None:
+                fig.savefig(path)
+                return None
+            fig.canvas.draw()
+            rgba = np.array(fig.canvas.buffer_rgba())  # copia: la figura se reutiliza enseguida
+            return png_pool.submit(_write_png, rgba, path, fig.dpi)
+        finally:
+            (self.ax, self._artists, self._animated_artists,
+             self.current_profile_index, self.current_crown_point) = saved
+            self._refresh_current_refs()
+
+    def update_profile_display(self, export_mode=False):
+        """Update the profile visualization including LAMA points and reference lines"""
+        if not self.profiles_data:
+            return
         
-        # Update info panel
-        self.info_pk.setText(f"PK: {current_pk}")
-        self.info_coords.setText(f"Coordenadas: X={profile.get('centerline_x', 0):.1f}, Y={profile.get('centerline_y', 0):.1f}")
+        # Este redibujado cubre cualquier _schedule_redraw pendiente
+        self._redraw_pending = False
+        self._display_timer.stop()
         
-        if valid_elevations:
-            # valid_data already filtered, so use all elevations for range
-            self.info_elevation_range.setText(f"Rango elevación: {min(valid_elevations):.2f} - {max(valid_elevations):.2f} m")
+        # Un redibujado completo descarta cualquier zoom de scroll pendiente;
+        # los artistas animados (mediciones) se vuelven a registrar en este frame
+        self._pending_xylim = None
+        self._redraw_timer.stop()
+        self._animated_artists = []
+        self._scroll_consts = None
+        self._refresh_current_refs()
+        
+        x_min, x_max, elev_stats = self._render_profile(export_mode)
+        
+        if elev_stats is None:
+            self._bg = self._bg_key = None
+            self.canvas.draw_idle()
+            return
+        emin, emax, n_valid = elev_stats
+        
+        # Update UI labels
+        self.current_pk_label.setText(self._pk_labels[self.current_profile_index])
+        self.profile_counter.setText(self._counter_labels[self.current_profile_index])
+        
+        # Panel de información: el formateo y repintado se difieren a _apply_info_panel
+        self._pending_info = (self.current_profile_index, (emin, emax), n_valid)
+        self._info_timer.start()
+        
+        # Perfil, rango y coronamiento ya resueltos: especializar el scroll para este estado
+        self._update_scroll_consts()
+        
+        # Refresh canvas (márgenes fijados en init_ui, sin tight_layout por redibujado).
+        # Si el fondo (terreno, líneas de referencia, LAMA auto, límites) no cambió, solo
+        # se blitean las mediciones; la leyenda incluye mediciones, así que fuerza draw completo.
+        bg_key = self._background_key(x_min, x_max)
+        self._home_limits = (tuple(self.ax.get_xlim()), tuple(self.ax.get_ylim()))
+        if not export_mode and not self.show_legend and bg_key == self._bg_key:
+            self._blit_animated()
+        else:
+            self._bg = None
+            self._bg_key = None if export_mode else bg_key
+            self.canvas.draw_idle()
+
+    def _apply_info_panel(self):
+        """Rellena el panel de información del último perfil renderizado (vía _info_timer)"""
+        if self._pending_info is None:
+            return
+        index, elev_range, n_valid = self._pending_info
+        self._pending_info = None
+        if index >= len(self.profiles_data):
+            return
+        profile = self.profiles_data[index]
+        current_pk = profile.get('pk', 'Unknown')
         
         # Update info with LAMA info (single value, not range)
         lama_points = profile.get('lama_points', [])
@@ -2405,36 +2977,25 @@ class InteractiveProfileViewer(QDialog):
             lama_info = f"LAMA: {manual_lama['y']:.2f}m (manual)"
         
         # valid_data already filtered to range, so count all
-        visible_points = len(valid_data)
+        visible_points = n_valid
         
         # 🆕 Add reference lines info based on operation mode
         ref_info = ""
-        if self.operation_mode == "ancho_proyectado":
-            # Modo Ancho Proyectado: mostrar info de líneas Lama
-            lama_elevation = None
-            if current_pk in self.saved_measurements and 'lama_selected' in self.saved_measurements[current_pk]:
-                lama_elevation = self.saved_measurements[current_pk]['lama_selected']['y']
-            elif self.current_crown_point:
-                lama_elevation = self.current_crown_point[1]
-                
-            if lama_elevation is not None:
-                ref_info = f" | Lama: {lama_elevation:.2f}m | +2m: {lama_elevation+2.0:.2f}m | +3m: {lama_elevation+3.0:.2f}m"
-        else:
-            # Modo Revancha: mostrar info de líneas de coronamiento
-            crown_elevation = None
-            if current_pk in self.saved_measurements and 'crown' in self.saved_measurements[current_pk]:
-                crown_elevation = self.saved_measurements[current_pk]['crown']['y']
-            elif self.current_crown_point:
-                crown_elevation = self.current_crown_point[1]
-                
-            if crown_elevation is not None:
-                ref_info = f" | Ref: {crown_elevation:.2f}m | Aux: {crown_elevation-1.0:.2f}m"
-        
-        self.info_valid_points.setText(f"Puntos válidos: {len(valid_data)} | Visibles: {visible_points} | {lama_info}{ref_info}")
-        
-        # Refresh canvas
-        self.figure.tight_layout()
-        self.canvas.draw()
+        reference_elevation = self._get_reference_elevation(current_pk)
+        if reference_elevation is not None:
+            if self.operation_mode == "ancho_proyectado":
+                # Modo Ancho Proyectado: mostrar info de líneas Lama
+                ref_info = f" | Lama: {reference_elevation:.2f}m | +2m: {reference_elevation+2.0:.2f}m | +3m: {reference_elevation+3.0:.2f}m"
+            else:
+                # Modo Revancha: mostrar info de líneas de coronamiento
+                ref_info = f" | Ref: {reference_elevation:.2f}m | Aux: {reference_elevation-1.0:.2f}m"
+        
+        # Un único repintado del grupo para las cuatro etiquetas
+        with _ui_batch(self._info_panel):
+            self.info_pk.setText(f"PK: {current_pk}")
+            self.info_coords.setText(f"Coordenadas: X={profile.get('centerline_x', 0):.1f}, Y={profile.get('centerline_y', 0):.1f}")
+            self.info_elevation_range.setText(f"Rango elevación: {elev_range[0]:.2f} - {elev_range[1]:.2f} m")
+            self.info_valid_points.setText(f"Puntos válidos: {n_valid} | Visibles: {visible_points} | {lama_info}{ref_info}")
 
     def export_measurements_to_csv(self):
         """Export all measurements from all profiles to CSV file and screenshots for alerts"""
@@ -2499,11 +3060,11 @@ class InteractiveProfileViewer(QDialog):
                 pk = profile['pk']
                 
                 # Obtener mediciones guardadas
-                measurements = self.saved_measurements.get(pk, {})
+                measurements = self.saved_measurements.get(pk, _NO_MEASUREMENTS)
                 
                 if self.operation_mode == "ancho_proyectado":
                     # Modo Ancho Proyectado: Solo PK y Ancho
-                    width_val = measurements.get('width', {}).get('distance', None)
+                    width_val = measurements.get('width', _NO_MEASUREMENTS).get('distance')
                     row_data = {
                         'PK': pk,
                         'Ancho_Proyectado': width_val
@@ -2638,25 +3199,18 @@ class InteractiveProfileViewer(QDialog):
                 # Columnas para Revancha (original)
                 fieldnames = ['PK', 'Cota_Coronamiento', 'Revancha', 'Lama', 'Ancho']
                 
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.writer(csvfile)
             
             # Escribir cabecera
-            writer.writeheader()
-            
-            # Escribir datos
-            for row_data in export_data:
-                # Formatear valores nulos como cadenas vacías
-                formatted_row = {}
-                for key in fieldnames:
-                    value = row_data.get(key)
-                    if value is None:
-                        formatted_row[key] = ''
-                    elif isinstance(value, float):
-                        formatted_row[key] = f"{value:.3f}"  # 3 decimales
-                    else:
-                        formatted_row[key] = value
-                
-                writer.writerow(formatted_row)
+            writer.writerow(fieldnames)
+            
+            # Escribir datos: tuplas ya ordenadas por columna, generadas al vuelo
+            # (nulos como cadenas vacías, floats con 3 decimales)
+            writer.writerows(
+                tuple('' if value is None else f"{value:.3f}" if isinstance(value, float) else value
+                      for value in map(row_data.get, fieldnames))
+                for row_data in export_data
+            )
                 
     def show_orthomosaic(self):
         """Mostrar ortomosaico en una ventana separada en la ubicación exacta del perfil actual"""
@@ -2726,12 +3280,51 @@ class InteractiveProfileViewer(QDialog):
             if bearing is None:
                 print("⚠️ ADVERTENCIA: No se encontró bearing en el perfil, se usará valor por defecto")
                     
-            # Usar nuestra nueva clase de visualizador de ortomosaico
-            from .orthomosaic_viewer import OrthomosaicViewer
-            
             print(f"Creando visualizador con ECW: {self.ecw_file_path}")
             print(f"Parámetros: X={x_coord:.2f}, Y={y_coord:.2f}, PK={current_pk}, Bearing={bearing}")
             
+            self._ortho_request = (x_coord, y_coord, current_pk, bearing)
+            
+            # Capa ya cargada para este ECW: abrir directamente
+            if self._ortho_layer is not None and self._ortho_layer.source() == self.ecw_file_path:
+                self._on_ortho_ready(self._ortho_layer)
+                return
+            
+            # Ya hay una carga en curso: al terminar se abrirá con la última petición
+            if self._ortho_thread is not None:
+                return
+            
+            # 🆕 Cargar el ECW en un hilo aparte para no congelar la GUI con rásters grandes
+            self.view_ortho_btn.setEnabled(False)
+            self._ortho_thread = QThread(self)
+            self._ortho_loader = OrthoLoader(self.ecw_file_path)
+            self._ortho_loader.moveToThread(self._ortho_thread)
+            self._ortho_thread.started.connect(self._ortho_loader.run)
+            self._ortho_loader.finished.connect(self._on_ortho_ready, Qt.QueuedConnection)
+            self._ortho_loader.finished.connect(self._ortho_thread.quit)
+            self._ortho_thread.finished.connect(self._on_ortho_thread_finished)
+            self._ortho_thread.start()
+                
+        except Exception as e:
+            QMessageBox.critical(
+                self,
+                "Error",
+                f"Error al mostrar el ortomosaico: {str(e)}"
+            )
+            
+    def _on_ortho_ready(self, layer):
+        """Abre el visualizador (hilo principal) con la capa cargada por OrthoLoader"""
+        self.view_ortho_btn.setEnabled(True)
+        if self._ortho_request is None:
+            return
+        x_coord, y_coord, current_pk, bearing = self._ortho_request
+        self._ortho_request = None
+        if layer is not None and layer.isValid():
+            self._ortho_layer = layer
+        
+        try:
+            from .orthomosaic_viewer import OrthomosaicViewer
+            
             # 🆕 Crear la ventana del visualizador de forma NO MODAL
             self.ortho_viewer = OrthomosaicViewer(
                 self.ecw_file_path, 
@@ -2739,7 +3332,8 @@ class InteractiveProfileViewer(QDialog):
                 y_coord, 
                 current_pk,
                 self,  # Parent es este visualizador de perfiles
-                bearing
+                bearing,
+                ortho_layer=layer
             )
             
             # Actualizar título para mostrar que es una ventana sincronizada
@@ -2750,7 +3344,6 @@ class InteractiveProfileViewer(QDialog):
             
             # 🆕 Mostrar de forma no modal para permitir interacción con ambas ventanas
             self.ortho_viewer.show()
-                
         except ImportError as ie:
             QMessageBox.critical(
                 self,
@@ -2765,7 +3358,31 @@ class InteractiveProfileViewer(QDialog):
                 "Error",
                 f"Error al mostrar el ortomosaico: {str(e)}"
             )
-            
+    
+    def _on_ortho_thread_finished(self):
+        """Libera el hilo y el worker de carga del ortomosaico"""
+        self._ortho_loader.deleteLater()
+        self._ortho_thread.deleteLater()
+        self._ortho_loader = None
+        self._ortho_thread = None
+            
+    def _stop_ortho_loader(self):
+        """Descarta la petición pendiente y espera a que termine la carga del ortomosaico"""
+        self._ortho_request = None  # _on_ortho_ready (encolado) ya no abrirá la ventana
+        if self._ortho_thread is not None:
+            self._ortho_thread.quit()
+            self._ortho_thread.wait()
+
+    def done(self, result):
+        """Esc / reject() / accept() no pasan por closeEvent: detener también aquí la carga"""
+        self._stop_ortho_loader()
+        super().done(result)
+            
+    def closeEvent(self, event):
+        """No destruir el diálogo con la carga del ortomosaico aún en curso"""
+        self._stop_ortho_loader()
+        super().closeEvent(event)
+    
     def on_ortho_viewer_closed(self):
         """🆕 Limpia la referencia al visualizador cuando se cierra"""
         print("Visualizador de ortomosaico cerrado")
@@ -2871,10 +3488,10 @@ class InteractiveProfileViewer(QDialog):
                     print(f"⚠️ No PKs with measurements found or no profiles_data available")
             
             # Refresh display
-            self.update_profile_display()
+            self._schedule_redraw()
             
-            # Sync measurements to orthomosaic if it exists
-            self.sync_measurements_to_orthomosaic()
+            # Sync measurements to orthomosaic if it exists (coalescido con el timer de sync)
+            self._schedule_ortho_sync()
             
             print(f"✅ Mediciones restauradas: {len(self.saved_measurements)} perfiles con datos")
             
@@ -2884,80 +3501,75 @@ class InteractiveProfileViewer(QDialog):
             traceback.print_exc()
 
     def parse_pk(self, pk_str):
-        """Helper to convert PK string (e.g., '0+100') to float"""
+        """Helper to convert PK string (e.g., '0+100') to float (memoizado en _pk_cache)"""
+        value = self._pk_cache.get(pk_str)
+        if value is not None:
+            return value
         try:
             if '+' in pk_str:
                 parts = pk_str.split('+')
-                return float(parts[0]) * 1000 + float(parts[1])
-            return float(pk_str)
+                value = float(parts[0]) * 1000 + float(parts[1])
+            else:
+                value = float(pk_str)
         except:
-            return 0.0
+            value = 0.0
+        self._pk_cache[pk_str] = value
+        return value
 
     def generate_longitudinal_chart(self, output_path):
         """Generate longitudinal profile chart (Crown & Lama) and save as image"""
         try:
-            # 1. Extract and sort data
-            data_points = []
+            # 1. Extract and sort data: columnas paralelas (SoA), NaN = sin valor
+            if not self.saved_measurements:
+                return False
             
-            for pk, measurements in self.saved_measurements.items():
-                # Crown
-                crown_y = None
+            # LAMA automática por PK (una pasada, en vez de buscar el perfil por cada medición)
+            auto_lamas = {}
+            for p in self.profiles_data:
+                if p.get('lama_points'):
+                    elevation = p['lama_points'][0]['elevation']
+                    auto_lamas.setdefault(str(p.get('pk')), elevation)
+                    auto_lamas.setdefault(str(p.get('PK')), elevation)
+            
+            n = len(self.saved_measurements)
+            pks = np.empty(n)
+            crowns = np.full(n, np.nan)
+            lamas = np.full(n, np.nan)
+            for i, (pk, measurements) in enumerate(self.saved_measurements.items()):
+                pks[i] = self.parse_pk(str(pk))
+                
+                # Crown (en Ancho Proyectado la lama seleccionada no cuenta como coronamiento)
                 if 'crown' in measurements:
-                    crown_y = measurements['crown']['y']
-                elif 'lama_selected' in measurements and self.operation_mode == "ancho_proyectado":
-                    # In Ancho Mode, "Crown" concept might be the reference lama
-                    # But user asked for trends. Let's stick to what we have.
-                    pass
+                    crowns[i] = measurements['crown']['y']
                 
-                # Lama
-                lama_y = None
+                # Lama: manual, seleccionada o automática del perfil
                 if 'lama' in measurements:
-                    lama_y = measurements['lama']['y']
+                    lamas[i] = measurements['lama']['y']
                 elif 'lama_selected' in measurements:
-                     lama_y = measurements['lama_selected']['y']
-                else: 
-                     # Try to find auto lama from profile data
-                     for p in self.profiles_data:
-                         if str(p.get('pk')) == str(pk) or str(p.get('PK')) == str(pk):
-                             if p.get('lama_points'):
-                                 lama_y = p['lama_points'][0]['elevation']
-                             break
-                
-                pk_float = self.parse_pk(str(pk))
-                    
-                data_points.append({
-                    'pk_str': str(pk),
-                    'pk_val': pk_float,
-                    'crown': crown_y,
-                    'lama': lama_y
-                })
-            
-            # Sort by PK
-            data_points.sort(key=lambda x: x['pk_val'])
+                    lamas[i] = measurements['lama_selected']['y']
+                else:
+                    lamas[i] = auto_lamas.get(str(pk), np.nan)
             
-            if not data_points:
-                return False
+            # Sort by PK (estable: PKs repetidos conservan su orden)
+            order = np.argsort(pks, kind='stable')
+            pks, crowns, lamas = pks[order], crowns[order], lamas[order]
                 
             # 2. Prepare plot data
-            # Filter for plotting lines (avoid gaps if desired, or keep them)
             # We want connected lines, so we filter valid points for each series INDEPENDENTLY
-            
-            valid_crowns = [(d['pk_val'], d['crown']) for d in data_points if d['crown'] is not None]
-            valid_lamas = [(d['pk_val'], d['lama']) for d in data_points if d['lama'] is not None]
+            valid_crowns = ~np.isnan(crowns)
+            valid_lamas = ~np.isnan(lamas)
 
             # 3. Create Figure
             fig = Figure(figsize=(20, 8), dpi=100)
             ax = fig.add_subplot(111)
             
             # Plot Crown (Red)
-            if valid_crowns:
-                vx, vy = zip(*valid_crowns)
-                ax.plot(vx, vy, 'o-', color='red', linewidth=2, markersize=6, label='Coronamiento')
+            if valid_crowns.any():
+                ax.plot(pks[valid_crowns], crowns[valid_crowns], 'o-', color='red', linewidth=2, markersize=6, label='Coronamiento')
                 
             # Plot Lama (Green)
-            if valid_lamas:
-                vx, vy = zip(*valid_lamas)
-                ax.plot(vx, vy, 'o-', color='green', linewidth=2, markersize=6, label='Lama')
+            if valid_lamas.any():
+                ax.plot(pks[valid_lamas], lamas[valid_lamas], 'o-', color='green', linewidth=2, markersize=6, label='Lama')
                 
             # Styling
             ax.set_title("Perfil Longitudinal (Tendencia)", fontsize=16, fontweight='bold', pad=20)
@@ -2983,7 +3595,7 @@ class InteractiveProfileViewer(QDialog):
             print(f"Error generating longitudinal chart: {e}")
             return False
 
-    def generate_detail_html_table(self, geo_manager=None, frame_height_mm=220):
+    def generate_detail_html_table(self, geo_manager=None, frame_height_mm=220, arrays=None):
         """
         Generate HTML for Table 1: Detailed Measurements (Single Column - Compact)
         
@@ -2992,8 +3604,11 @@ class InteractiveProfileViewer(QDialog):
             frame_height_mm: Altura del frame en mm (para cálculo de fill dinámico)
         """
         
-        # 1. Prepare Data & Sorting
-        sorted_profiles = sorted(self.profiles_data, key=lambda x: self.parse_pk(str(x.get('pk', '0'))))
+        # 1. Prepare Data & Sorting (columnas compartidas, ver _build_measurement_arrays)
+        if arrays is None:
+            arrays = self._build_measurement_arrays()
+        order = np.argsort(arrays.pk_floats, kind='stable')
+        sorted_profiles = [self.profiles_data[i] for i in order]
         total_rows = len(sorted_profiles)
         
         # 🔍 DIAGNOSTICS: Show row count per wall
@@ -3106,25 +3721,20 @@ class InteractiveProfileViewer(QDialog):
         # Ensure wall_name for sector logic
         wall_name = self.profiles_data[self.current_profile_index].get('wall_name', "Muro 1")
         
-        for profile in sorted_profiles:
-            pk = str(profile.get('pk', ''))
-            measurements = self.saved_measurements.get(pk, {})
+        def value(column, i):
+            v = column[i]
+            return None if np.isnan(v) else float(v)
+        
+        for i, profile in zip(order, sorted_profiles):
+            pk = arrays.pks[i]
             profile['wall_name'] = wall_name 
             
             # --- DATA EXTRACTION & FORMATTING ---
-            # 1. Values
-            crown_val = measurements.get('crown', {}).get('y')
-            lama_val = measurements.get('lama', {}).get('y')
-            
-            # Auto lama fallback
-            if lama_val is None and profile.get('lama_points'):
-                lama_val = profile['lama_points'][0]['elevation']
-                
-            revancha_val = None
-            if crown_val is not None and lama_val is not None:
-                revancha_val = crown_val - lama_val
-                
-            width_val = measurements.get('width', {}).get('distance')
+            # 1. Values (lama manual con fallback a la automática, ya resuelta en arrays)
+            crown_val = value(arrays.crowns, i)
+            lama_val = value(arrays.lamas, i)
+            revancha_val = value(arrays.revanchas, i)
+            width_val = value(arrays.widths, i)
             
             # Geomembrane Logic
             geomembrane_val = None
@@ -3196,17 +3806,11 @@ class InteractiveProfileViewer(QDialog):
                         dgc_cls = "bg-red geo-col"
 
             # Add Row
-            html.append(f"<tr>")
-            html.append(f"<td>{sector_txt}</td>")
-            html.append(f"<td>{pk_txt}</td>")
-            html.append(f"<td>{coronamiento_txt}</td>")
-            html.append(f"<td class='{revancha_cls}'>{revancha_txt}</td>")
-            html.append(f"<td>{lama_txt}</td>")
-            html.append(f"<td class='{ancho_cls}'>{ancho_txt}</td>")
-            html.append(f"<td class='geo-col'>{geo_txt}</td>")
-            html.append(f"<td class='{dgl_cls}'>{dgl_txt}</td>")
-            html.append(f"<td class='{dgc_cls}'>{dgc_txt}</td>")
-            html.append(f"</tr>")
+            html.append(_DETAIL_ROW_TEMPLATE.format(
+                sector=sector_txt, pk=pk_txt, crown=coronamiento_txt,
+                revancha=revancha_txt, revancha_cls=revancha_cls,
+                lama=lama_txt, ancho=ancho_txt, ancho_cls=ancho_cls,
+                geo=geo_txt, dgl=dgl_txt, dgl_cls=dgl_cls, dgc=dgc_txt, dgc_cls=dgc_cls))
             
         html.append("</tbody></table>")
         return "".join(html)
@@ -3276,63 +3880,38 @@ class InteractiveProfileViewer(QDialog):
             "estimated_height_mm": estimated_height
         }
 
-    def generate_summary_html_table(self, geo_manager=None):
+    def generate_summary_html_table(self, geo_manager=None, arrays=None):
         """Generate HTML for Table 2: Summary Measurements"""
         from .core.sector_utils import get_sector_for_profile
         
-        # Structure to hold aggregated data per sector
-        sectors_data = {}
+        if arrays is None:
+            arrays = self._build_measurement_arrays()
         
         wall_name = self.profiles_data[self.current_profile_index].get('wall_name', "Muro 1")
         
-        for profile in self.profiles_data:
+        # Perfiles agrupados por sector (índices en el orden de profiles_data)
+        sector_rows = {}
+        for i, profile in enumerate(self.profiles_data):
             profile['wall_name'] = wall_name 
-            pk = str(profile.get('pk', ''))
-            measurements = self.saved_measurements.get(pk, {})
-            
-            # Determine Sector
-            sector_name = get_sector_for_profile(profile)
-            
-            if sector_name not in sectors_data:
-                sectors_data[sector_name] = {
-                    'min_rev': [None, None], 'max_rev': [None, None],
-                    'min_ancho': [None, None], 'max_ancho': [None, None],
-                    'min_crown': [None, None], 'max_crown': [None, None]
-                }
-            
-            stats = sectors_data[sector_name]
-            
-            # Revancha
-            crown_val = measurements.get('crown', {}).get('y')
-            lama_val = measurements.get('lama', {}).get('y')
-            if lama_val is None and profile.get('lama_points'):
-                lama_val = profile['lama_points'][0]['elevation']
-            
-            revancha_val = None
-            if crown_val is not None and lama_val is not None:
-                revancha_val = crown_val - lama_val
-                
-                # Check Min
-                if stats['min_rev'][0] is None or revancha_val < stats['min_rev'][0]:
-                    stats['min_rev'] = [revancha_val, pk]
-                # Check Max
-                if stats['max_rev'][0] is None or revancha_val > stats['max_rev'][0]:
-                    stats['max_rev'] = [revancha_val, pk]
-            
-            # Ancho
-            width_val = measurements.get('width', {}).get('distance')
-            if width_val is not None:
-                if stats['min_ancho'][0] is None or width_val < stats['min_ancho'][0]:
-                    stats['min_ancho'] = [width_val, pk]
-                if stats['max_ancho'][0] is None or width_val > stats['max_ancho'][0]:
-                    stats['max_ancho'] = [width_val, pk]
-                    
-            # Crown
-            if crown_val is not None:
-                if stats['min_crown'][0] is None or crown_val < stats['min_crown'][0]:
-                    stats['min_crown'] = [crown_val, pk]
-                if stats['max_crown'][0] is None or crown_val > stats['max_crown'][0]:
-                    stats['max_crown'] = [crown_val, pk]
+            sector_rows.setdefault(get_sector_for_profile(profile), []).append(i)
+        
+        def extremes(values, rows):
+            """[[min, pk], [max, pk]] de values en rows (primer PK en caso de empate)"""
+            vals = values[rows]
+            if np.isnan(vals).all():
+                return [None, None], [None, None]
+            lo, hi = np.nanargmin(vals), np.nanargmax(vals)
+            return ([float(vals[lo]), arrays.pks[rows[lo]]],
+                    [float(vals[hi]), arrays.pks[rows[hi]]])
+        
+        # Structure to hold aggregated data per sector
+        sectors_data = {}
+        for sector_name, rows in sector_rows.items():
+            rows = np.asarray(rows)
+            stats = sectors_data[sector_name] = {}
+            stats['min_rev'], stats['max_rev'] = extremes(arrays.revanchas, rows)
+            stats['min_ancho'], stats['max_ancho'] = extremes(arrays.widths, rows)
+            stats['min_crown'], stats['max_crown'] = extremes(arrays.crowns, rows)
                     
         # Construct HTML con colores por rango
         style = """
@@ -3522,9 +4101,92 @@ class InteractiveProfileViewer(QDialog):
         </table>
         """
 
+    def _build_measurement_arrays(self):
+        """Columnas float (SoA) de las mediciones por perfil, en el orden de profiles_data.
+
+        Devuelve SimpleNamespace con pks (textos), pk_floats, crowns, lamas (manual con
+        fallback a la automática), widths y revanchas; None -> NaN. Se arma una vez por
+        reporte y la comparten alertas, tabla de detalle y tabla resumen.
+        """
+        pks = [str(p.get('pk', '')) for p in self.profiles_data]
+        measured = [self.saved_measurements.get(pk, _NO_MEASUREMENTS) for pk in pks]
+        
+        def column(kind, field):
+            return np.array([m.get(kind, _NO_MEASUREMENTS).get(field) for m in measured], dtype=float)
+        
+        crowns = column('crown', 'y')
+        lamas = column('lama', 'y')
+        auto_lamas = np.array([p['lama_points'][0]['elevation'] if p.get('lama_points') else None
+                               for p in self.profiles_data], dtype=float)
+        lamas = np.where(np.isnan(lamas), auto_lamas, lamas)
+        return SimpleNamespace(pks=pks,
+                               pk_floats=np.array([self.parse_pk(pk or '0') for pk in pks]),
+                               crowns=crowns, lamas=lamas,
+                               widths=column('width', 'distance'),
+                               revanchas=crowns - lamas)
+
+    def _detect_alert_profiles(self, arrays=None):
+        """PKs con revancha < 3.0 m o ancho < 15.0 m (páginas de alertas del reporte).
+
+        Sin dato (NaN) nunca hay alerta; ambas condiciones en una sola pasada vectorizada.
+        """
+        if arrays is None:
+            arrays = self._build_measurement_arrays()
+        alert_mask = (arrays.revanchas < 3.0) | (arrays.widths < 15.0)
+        return [arrays.pks[i] for i in np.flatnonzero(alert_mask)]
+
+    def _export_state_hash(self, geomembrane_csv=None):
+        """Huella del estado que alimenta el reporte PDF (mediciones, DEMs, ortomosaico, plantilla,
+        terreno/LAMA de los perfiles, mapa, cotas)"""
+        import hashlib
+        import json
+        main_dialog = self.parent()
+        
+        def mtime(path):
+            return os.path.getmtime(path) if path and os.path.exists(path) else None
+        
+        # Terreno (columnas SoA), DEM anterior y LAMA automática de cada perfil
+        profile_hash = hashlib.md5()
+        for column in (self._dists, self._elevs):
+            profile_hash.update(np.ascontiguousarray(column).tobytes())
+        for profile in self.profiles_data:
+            if profile.get('_pe') is not None:
+                profile_hash.update(profile['_pe'].tobytes())
+        
+        state = {
+            'profiles': profile_hash.hexdigest(),
+            'lama_points': [p.get('lama_points') for p in self.profiles_data],
+            'ecw': self.ecw_file_path,
+            'ecw_mtime': mtime(self.ecw_file_path),
+            'template_mtime': mtime(os.path.join(os.path.dirname(__file__), 'report_template.qpt')),
+            'measurements': self.saved_measurements,
+            'pks': [str(p.get('pk', '')) for p in self.profiles_data],
+            'dem': getattr(main_dialog, 'dem_file_path', None),
+            'previous_dem': getattr(main_dialog, 'previous_dem_file_path', None),
+            'wall': getattr(main_dialog, 'selected_wall', None),
+            'map_range': (self.map_min_spin.value(), self.map_max_spin.value()),
+            'mode': self.operation_mode,
+            'geomembrane_mtime': mtime(geomembrane_csv),
+        }
+        payload = json.dumps(state, sort_keys=True, default=str)
+        return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+    def _announce_pdf_report(self, filename):
+        """Aviso de éxito y apertura del PDF (export completo o reutilizado)"""
+        QMessageBox.information(self, "Éxito", f"Reporte PDF generado correctamente en:\n{filename}")
+        try:
+            os.startfile(filename)
+        except:
+            pass
+
     def export_pdf_report(self):
         """Generate PDF report using QPT Template and Dynamic Screenshots"""
         try:
+            # Clases de layout solo se necesitan aquí: importarlas al exportar, no al cargar el plugin
+            from qgis.PyQt.QtXml import QDomDocument
+            from qgis.core import (QgsPrintLayout, QgsLayoutExporter, QgsLayoutItemHtml, QgsLayoutFrame,
+                                   QgsLayoutItemPicture, QgsLayoutItemLabel, QgsReadWriteContext)
+            
             # 1. Validation: Check if Previous DEM is loaded
             has_previous_dem = False
             if self.profiles_data and len(self.profiles_data) > 0:
@@ -3597,6 +4259,20 @@ class InteractiveProfileViewer(QDialog):
                 )
                 return
 
+            # 🆕 Atajo: sin alertas y sin cambios desde el último export -> reutilizar PDF
+            measurement_arrays = self._build_measurement_arrays()
+            alert_profiles = self._detect_alert_profiles(measurement_arrays)
+            state_hash = self._export_state_hash(geo_manager.csv_path)
+            last_pdf = getattr(self, '_last_pdf_path', None)
+            if (not alert_profiles and getattr(self, '_last_export_hash', None) == state_hash
+                    and last_pdf and os.path.exists(last_pdf)):
+                import shutil
+                if os.path.abspath(last_pdf) != os.path.abspath(filename):
+                    shutil.copyfile(last_pdf, filename)
+                logger.info("Estado sin cambios, reutilizando reporte previo: %s", last_pdf)
+                self._announce_pdf_report(filename)
+                return
+
             # 4. Generate Assets (Chart & Tables)
             import tempfile
             import shutil
@@ -3627,8 +4303,9 @@ class InteractiveProfileViewer(QDialog):
             # 🎯 CONFIGURACIÓN: Altura del frame detail_table en el QPT (ajustar según tu layout)
             DETAIL_FRAME_HEIGHT_MM = 220  # Cambiar este valor si ajustas el frame en el Layout Designer
             
-            html_detail = self.generate_detail_html_table(geo_manager, frame_height_mm=DETAIL_FRAME_HEIGHT_MM)
-            html_summary = self.generate_summary_html_table(geo_manager)
+            html_detail = self.generate_detail_html_table(geo_manager, frame_height_mm=DETAIL_FRAME_HEIGHT_MM,
+                                                          arrays=measurement_arrays)
+            html_summary = self.generate_summary_html_table(geo_manager, arrays=measurement_arrays)
             
             # 4. Load Template
             project = QgsProject.instance()
@@ -3899,34 +4576,12 @@ class InteractiveProfileViewer(QDialog):
             QApplication.processEvents()
 
             # 6. Dynamic Screenshots (Pages 2+)
-            # Detect Alerts
-            alert_profiles = []
-            for profile in self.profiles_data:
-                pk = str(profile.get('pk', ''))
-                measurements = self.saved_measurements.get(pk, {})
-                
-                # Check Revancha < 3
-                crown_val = measurements.get('crown', {}).get('y')
-                lama_val = measurements.get('lama', {}).get('y')
-                # Auto lama fallback
-                if lama_val is None and profile.get('lama_points'):
-                    lama_val = profile['lama_points'][0]['elevation']
-                
-                revancha_alert = False
-                if crown_val is not None and lama_val is not None:
-                    if (crown_val - lama_val) < 3.0:
-                        revancha_alert = True
-                        
-                # Check Width < 15
-                width_val = measurements.get('width', {}).get('distance')
-                width_alert = False
-                if width_val is not None and width_val < 15.0:
-                    width_alert = True
-                    
-                if revancha_alert or width_alert:
-                    alert_profiles.append(pk)
+            # (alert_profiles ya detectadas antes de generar assets)
+            screenshots_placed = 0
+            plantas_placed = 0
+            pages_deleted = 0
             if alert_profiles:
-                print(f"📸 Detectadas {len(alert_profiles)} alertas, generando screenshots...")
+                logger.debug("Detectadas %d alertas, generando screenshots...", len(alert_profiles))
                     
                 # ENHANCED SYSTEM: Automatic slot discovery
                 profile_slots = []
@@ -3949,10 +4604,7 @@ class InteractiveProfileViewer(QDialog):
                 profile_slots.sort(key=lambda x: x[0])
                 planta_slots.sort(key=lambda x: x[0])
                 
-                print(f"🔎 Encontrados {len(profile_slots)} espacios de perfil y {len(planta_slots)} de planta en el QPT.")
-                
-                screenshots_placed = 0
-                plantas_placed = 0
+                logger.debug("Encontrados %d espacios de perfil y %d de planta en el QPT", len(profile_slots), len(planta_slots))
                 
                 # Pre-cargar viewer temporal si hay slots de planta
                 temp_ortho_viewer = None
@@ -3967,13 +4619,22 @@ class InteractiveProfileViewer(QDialog):
                         if 'station' in first_prof and 'alignment_type' in first_prof['station'] and first_prof['station']['alignment_type'] == 'curved':
                             bearing = first_prof['station'].get('bearing_tangent', bearing)
                             
+                        # Reusar la capa ECW ya abierta por el visor (o abrirla una sola vez y dejarla
+                        # para él): el canvas solo decodifica la ventana visible a su resolución
+                        report_layer = self._ortho_layer
+                        if report_layer is None or report_layer.source() != self.ecw_file_path:
+                            report_layer = QgsRasterLayer(self.ecw_file_path, "ecw_report")
+                            if report_layer.isValid():
+                                self._ortho_layer = report_layer
+                        
                         temp_ortho_viewer = OrthomosaicViewer(
                             self.ecw_file_path,
                             first_prof.get('centerline_x', 0),
                             first_prof.get('centerline_y', 0),
                             first_pk,
                             self,
-                            bearing
+                            bearing,
+                            ortho_layer=report_layer
                         )
                         temp_ortho_viewer.resize(800, 600)
                         # Ocultamos la ventana de herramientas (toolbar)
@@ -3984,181 +4645,189 @@ class InteractiveProfileViewer(QDialog):
                         for child in temp_ortho_viewer.findChildren(QStatusBar):
                             child.hide()
                     except Exception as e:
-                        print(f"⚠️ No se pudo inicializar visor de planta para alertas: {e}")
+                        logger.warning("No se pudo inicializar visor de planta para alertas: %s", e)
                 
                 # Step 1: Fill slots found in QPT
-                for i in range(len(alert_profiles)):
-                    # Si ya no quedan slots ni de perfil ni de planta, no procesar más
-                    if i >= len(profile_slots) and i >= len(planta_slots):
-                        break
-                        
-                    pk = alert_profiles[i]
-                    
-                    if progress.wasCanceled(): return
-                    # Actualizar progreso
-                    progress.setLabelText(f"Generando captura {i+1} de {len(alert_profiles)}...")
-                    prog_val = 70 + int(((i + 1) / len(alert_profiles)) * 20)  # Hasta el 90%
-                    progress.setValue(prog_val)
-                    QApplication.processEvents()
-
-                    # Find profile data
-                    self.current_pk = pk
-                    current_prof = None
-                    for p_idx, p in enumerate(self.profiles_data):
-                        if str(p.get('pk')) == pk:
-                            self.current_profile_index = p_idx
-                            current_prof = p
+                # Las capturas de perfil se codifican a PNG en segundo plano mientras se
+                # renderiza la siguiente (y la planta); se inyectan al terminar el bucle
+                png_pool = ThreadPoolExecutor(max_workers=2)
+                try:
+                    pending_pngs = []
+                    # PK -> índice de perfil (primera aparición), en vez de buscarlo por cada alerta
+                    pk_index = {}
+                    for p_idx, alert_pk in enumerate(measurement_arrays.pks):
+                        pk_index.setdefault(alert_pk, p_idx)
+                    for i in range(len(alert_profiles)):
+                        # Si ya no quedan slots ni de perfil ni de planta, no procesar más
+                        if i >= len(profile_slots) and i >= len(planta_slots):
                             break
+                        
+                        pk = alert_profiles[i]
                     
-                    # 1. Generate and inject Profile Screenshot
-                    if i < len(profile_slots):
-                        qpt_item = profile_slots[i][1]
-                        self.update_profile_display(export_mode=True)
+                        if progress.wasCanceled(): return
+                        # Actualizar progreso
+                        progress.setLabelText(f"Generando captura {i+1} de {len(alert_profiles)}...")
+                        prog_val = 70 + int(((i + 1) / len(alert_profiles)) * 20)  # Hasta el 90%
+                        progress.setValue(prog_val)
                         QApplication.processEvents()
+
+                        # Find profile data
+                        prof_idx = pk_index.get(pk)
+                        current_prof = self.profiles_data[prof_idx] if prof_idx is not None else None
+                    
+                        # 1. Generate and inject Profile Screenshot (figura fuera de pantalla, sin tocar la vista)
+                        if i < len(profile_slots) and prof_idx is not None:
+                            qpt_item = profile_slots[i][1]
                         
-                        screenshot_path = os.path.join(temp_dir, f"alert_{pk.replace('+','_')}.png")
-                        self.figure.savefig(screenshot_path)
-                        qpt_item.setPicturePath(screenshot_path)
-                        
-                        print(f"✅ Screenshot {i+1} inyectado en slot QPT '{qpt_item.id()}'")
-                        screenshots_placed += 1
+                            screenshot_path = os.path.join(temp_dir, f"alert_{pk.replace('+','_')}.png")
+                            png_future = self._export_profile_png(prof_idx, screenshot_path, png_pool)
+                            pending_pngs.append((png_future, qpt_item, screenshot_path))
                         
-                    # 2. Generate and inject Planta (Ortho) Screenshot
-                    if i < len(planta_slots) and temp_ortho_viewer and current_prof:
-                        planta_item = planta_slots[i][1]
+                        # 2. Generate and inject Planta (Ortho) Screenshot
+                        if i < len(planta_slots) and temp_ortho_viewer and current_prof:
+                            planta_item = planta_slots[i][1]
                         
-                        try:
-                            # 1. Ajustar ratio de aspecto para llenar todo el elemento (evita bordes blancos)
-                            rect = planta_item.rect()
-                            w, h = rect.width(), rect.height()
+                            try:
+                                # 1. Ajustar ratio de aspecto para llenar todo el elemento (evita bordes blancos)
+                                rect = planta_item.rect()
+                                w, h = rect.width(), rect.height()
                             
-                            if w > 0 and h > 0:
-                                # Renderizamos a alta resolución (ej. 1500px ancho)
-                                base_width = 1500
-                                target_height = int(base_width * (h / w))
-                                temp_ortho_viewer.resize(base_width, target_height)
+                                if w > 0 and h > 0:
+                                    # Renderizamos a alta resolución (ej. 1500px ancho)
+                                    base_width = 1500
+                                    target_height = int(base_width * (h / w))
+                                    temp_ortho_viewer.resize(base_width, target_height)
                                 
-                            # Actualizar viewer temporal
-                            temp_ortho_viewer.update_to_profile(current_prof)
-                            # Añadir mediciones
-                            measurements = self.saved_measurements.get(pk, {})
-                            temp_ortho_viewer.update_measurements_display(measurements)
+                                # Actualizar viewer temporal
+                                temp_ortho_viewer.update_to_profile(current_prof)
+                                # Añadir mediciones
+                                measurements = self.saved_measurements.get(pk, {})
+                                temp_ortho_viewer.update_measurements_display(measurements)
                             
-                            # 2. OCULTAR LA LÍNEA DEL PK Y RESALTAR ELEMENTOS
-                            if hasattr(temp_ortho_viewer, 'line_rubber') and temp_ortho_viewer.line_rubber:
-                                temp_ortho_viewer.line_rubber.hide()
-                            if hasattr(temp_ortho_viewer, 'center_cross_rubber') and temp_ortho_viewer.center_cross_rubber:
-                                temp_ortho_viewer.center_cross_rubber.hide()
-                            if hasattr(temp_ortho_viewer, 'centerline_rubber') and temp_ortho_viewer.centerline_rubber:
-                                temp_ortho_viewer.centerline_rubber.hide()
+                                # 2. OCULTAR LA LÍNEA DEL PK Y RESALTAR ELEMENTOS
+                                if hasattr(temp_ortho_viewer, 'line_rubber') and temp_ortho_viewer.line_rubber:
+                                    temp_ortho_viewer.line_rubber.hide()
+                                if hasattr(temp_ortho_viewer, 'center_cross_rubber') and temp_ortho_viewer.center_cross_rubber:
+                                    temp_ortho_viewer.center_cross_rubber.hide()
+                                if hasattr(temp_ortho_viewer, 'centerline_rubber') and temp_ortho_viewer.centerline_rubber:
+                                    temp_ortho_viewer.centerline_rubber.hide()
                             
-                            # Resaltar puntos y líneas con mayor grosor para el pantallazo
-                            if hasattr(temp_ortho_viewer, 'crown_border_rubber') and temp_ortho_viewer.crown_border_rubber:
-                                temp_ortho_viewer.crown_border_rubber.setWidth(18)
-                            if hasattr(temp_ortho_viewer, 'crown_rubber') and temp_ortho_viewer.crown_rubber:
-                                temp_ortho_viewer.crown_rubber.setWidth(14)
-                            if hasattr(temp_ortho_viewer, 'lama_border_rubber') and temp_ortho_viewer.lama_border_rubber:
-                                temp_ortho_viewer.lama_border_rubber.setWidth(18)
-                            if hasattr(temp_ortho_viewer, 'lama_rubber') and temp_ortho_viewer.lama_rubber:
-                                temp_ortho_viewer.lama_rubber.setWidth(14)
-                            if hasattr(temp_ortho_viewer, 'width_rubber') and temp_ortho_viewer.width_rubber:
-                                temp_ortho_viewer.width_rubber.setWidth(8)
+                                # Resaltar puntos y líneas con mayor grosor para el pantallazo
+                                if hasattr(temp_ortho_viewer, 'crown_border_rubber') and temp_ortho_viewer.crown_border_rubber:
+                                    temp_ortho_viewer.crown_border_rubber.setWidth(18)
+                                if hasattr(temp_ortho_viewer, 'crown_rubber') and temp_ortho_viewer.crown_rubber:
+                                    temp_ortho_viewer.crown_rubber.setWidth(14)
+                                if hasattr(temp_ortho_viewer, 'lama_border_rubber') and temp_ortho_viewer.lama_border_rubber:
+                                    temp_ortho_viewer.lama_border_rubber.setWidth(18)
+                                if hasattr(temp_ortho_viewer, 'lama_rubber') and temp_ortho_viewer.lama_rubber:
+                                    temp_ortho_viewer.lama_rubber.setWidth(14)
+                                if hasattr(temp_ortho_viewer, 'width_rubber') and temp_ortho_viewer.width_rubber:
+                                    temp_ortho_viewer.width_rubber.setWidth(8)
                             
-                            # 3. OVERRIDE DEL ZOOM CENTRADO EN CORONAMIENTO
-                            # 3. OVERRIDE DEL ZOOM CENTRADO DINÁMICO (Bounding Box de Mediciones)
-                            pts_world_x = []
-                            pts_world_y = []
+                                # 3. OVERRIDE DEL ZOOM CENTRADO EN CORONAMIENTO
+                                # 3. OVERRIDE DEL ZOOM CENTRADO DINÁMICO (Bounding Box de Mediciones)
+                                pts_world_x = []
+                                pts_world_y = []
                             
-                            crown = measurements.get('crown')
-                            if crown and 'x' in crown and 'y' in crown:
-                                cx, cy = temp_ortho_viewer._convert_profile_to_world_coords(crown['x'], crown['y'])
-                                pts_world_x.append(cx)
-                                pts_world_y.append(cy)
+                                crown = measurements.get('crown')
+                                if crown and 'x' in crown and 'y' in crown:
+                                    cx, cy = temp_ortho_viewer._convert_profile_to_world_coords(crown['x'], crown['y'])
+                                    pts_world_x.append(cx)
+                                    pts_world_y.append(cy)
                                 
-                            lama = measurements.get('lama')
-                            if not lama:
-                                lama = measurements.get('lama_selected')
-                            if lama and 'x' in lama and 'y' in lama:
-                                lx, ly = temp_ortho_viewer._convert_profile_to_world_coords(lama['x'], lama['y'])
-                                pts_world_x.append(lx)
-                                pts_world_y.append(ly)
+                                lama = measurements.get('lama')
+                                if not lama:
+                                    lama = measurements.get('lama_selected')
+                                if lama and 'x' in lama and 'y' in lama:
+                                    lx, ly = temp_ortho_viewer._convert_profile_to_world_coords(lama['x'], lama['y'])
+                                    pts_world_x.append(lx)
+                                    pts_world_y.append(ly)
                                 
-                            width = measurements.get('width')
-                            if width and 'p1' in width and 'p2' in width:
-                                p1 = width['p1']
-                                p2 = width['p2']
-                                # Handle dict vs tuple Format
-                                x1, y1 = (p1['x'], p1['y']) if isinstance(p1, dict) else (p1[0], p1[1])
-                                x2, y2 = (p2['x'], p2['y']) if isinstance(p2, dict) else (p2[0], p2[1])
-                                w1x, w1y = temp_ortho_viewer._convert_profile_to_world_coords(x1, y1)
-                                w2x, w2y = temp_ortho_viewer._convert_profile_to_world_coords(x2, y2)
-                                pts_world_x.extend([w1x, w2x])
-                                pts_world_y.extend([w1y, w2y])
+                                width = measurements.get('width')
+                                if width and 'p1' in width and 'p2' in width:
+                                    p1 = width['p1']
+                                    p2 = width['p2']
+                                    # Handle dict vs tuple Format
+                                    x1, y1 = (p1['x'], p1['y']) if isinstance(p1, dict) else (p1[0], p1[1])
+                                    x2, y2 = (p2['x'], p2['y']) if isinstance(p2, dict) else (p2[0], p2[1])
+                                    w1x, w1y = temp_ortho_viewer._convert_profile_to_world_coords(x1, y1)
+                                    w2x, w2y = temp_ortho_viewer._convert_profile_to_world_coords(x2, y2)
+                                    pts_world_x.extend([w1x, w2x])
+                                    pts_world_y.extend([w1y, w2y])
                                 
-                            if pts_world_x and len(pts_world_x) > 1:
-                                min_x, max_x = min(pts_world_x), max(pts_world_x)
-                                min_y, max_y = min(pts_world_y), max(pts_world_y)
+                                if pts_world_x and len(pts_world_x) > 1:
+                                    min_x, max_x = min(pts_world_x), max(pts_world_x)
+                                    min_y, max_y = min(pts_world_y), max(pts_world_y)
                                 
-                                # Margen dinámico (15 metros min de padding extra alrededor de la caja)
-                                margin_x = max(15, (max_x - min_x) * 0.15)
-                                margin_y = max(15, (max_y - min_y) * 0.15)
+                                    # Margen dinámico (15 metros min de padding extra alrededor de la caja)
+                                    margin_x = max(15, (max_x - min_x) * 0.15)
+                                    margin_y = max(15, (max_y - min_y) * 0.15)
                                 
-                                zoom_rect = QgsRectangle(
-                                    min_x - margin_x,
-                                    min_y - margin_y,
-                                    max_x + margin_x,
-                                    max_y + margin_y
-                                )
-                            else:
-                                center_x, center_y = temp_ortho_viewer.x_coord, temp_ortho_viewer.y_coord
-                                if pts_world_x:
-                                    center_x, center_y = pts_world_x[0], pts_world_y[0]
-                                margin = 15
-                                zoom_rect = QgsRectangle(
-                                    center_x - margin,
-                                    center_y - margin,
-                                    center_x + margin,
-                                    center_y + margin
-                                )
-                            temp_ortho_viewer.map_canvas.setExtent(zoom_rect)
-                            temp_ortho_viewer.map_canvas.refresh()
-                            
-                            # 4. FORZAR RENDERIZADO COMPLETO (Evita imágenes blancas cortadas)
-                            QApplication.processEvents()
-                            try:
-                                # Instruye a QGIS esperar a que todos los tiles terminen de cargar
-                                temp_ortho_viewer.map_canvas.waitWhileRendering()
-                            except Exception:
-                                pass
+                                    zoom_rect = QgsRectangle(
+                                        min_x - margin_x,
+                                        min_y - margin_y,
+                                        max_x + margin_x,
+                                        max_y + margin_y
+                                    )
+                                else:
+                                    center_x, center_y = temp_ortho_viewer.x_coord, temp_ortho_viewer.y_coord
+                                    if pts_world_x:
+                                        center_x, center_y = pts_world_x[0], pts_world_y[0]
+                                    margin = 15
+                                    zoom_rect = QgsRectangle(
+                                        center_x - margin,
+                                        center_y - margin,
+                                        center_x + margin,
+                                        center_y + margin
+                                    )
+                                temp_ortho_viewer.map_canvas.setExtent(zoom_rect)
+                                temp_ortho_viewer.map_canvas.refresh()
                             
-                            import time
-                            # Pequeño loop de gracia para procesar eventos asíncronos restantes
-                            end_time = time.time() + 1.5
-                            while time.time() < end_time:
+                                # 4. FORZAR RENDERIZADO COMPLETO (Evita imágenes blancas cortadas)
                                 QApplication.processEvents()
-                                time.sleep(0.05)
+                                try:
+                                    # Instruye a QGIS esperar a que todos los tiles terminen de cargar
+                                    temp_ortho_viewer.map_canvas.waitWhileRendering()
+                                except Exception:
+                                    pass
                             
-                            ortho_img_path = os.path.join(temp_dir, f"alert_planta_{pk.replace('+','_')}.png")
-                            pixmap = temp_ortho_viewer.map_canvas.grab()
-                            pixmap.save(ortho_img_path)
+                                import time
+                                # Pequeño loop de gracia para procesar eventos asíncronos restantes
+                                end_time = time.time() + 1.5
+                                while time.time() < end_time:
+                                    QApplication.processEvents()
+                                    time.sleep(0.05)
                             
-                            planta_item.setPicturePath(ortho_img_path)
-                            print(f"✅ Planta {i+1} inyectada en slot QPT '{planta_item.id()}'")
-                            plantas_placed += 1
-                        except Exception as e:
-                            print(f"⚠️ Falló captura de planta para {pk}: {e}")
+                                ortho_img_path = os.path.join(temp_dir, f"alert_planta_{pk.replace('+','_')}.png")
+                                pixmap = temp_ortho_viewer.map_canvas.grab()
+                                pixmap.save(ortho_img_path)
+                            
+                                planta_item.setPicturePath(ortho_img_path)
+                                logger.debug("Planta %d inyectada en slot QPT %s", i + 1, planta_item.id())
+                                plantas_placed += 1
+                            except Exception as e:
+                                logger.warning("Falló captura de planta para %s: %s", pk, e)
                 
-                # Limpiar visor temporal
-                if temp_ortho_viewer:
-                    try:
-                        temp_ortho_viewer.close()
-                        temp_ortho_viewer.deleteLater()
-                    except Exception as e:
-                        print(f"⚠️ Error limpiando visor temporal: {e}")
+                    # Inyectar las capturas de perfil (esperando a que cada PNG esté escrito)
+                    for png_future, qpt_item, screenshot_path in pending_pngs:
+                        png_future.result()
+                        qpt_item.setPicturePath(screenshot_path)
+                        screenshots_placed += 1
+                        logger.debug("Screenshot %d inyectado en slot QPT %s", screenshots_placed, qpt_item.id())
+                finally:
+                    # Drenar el pool antes de que el finally externo borre temp_dir (cancelación,
+                    # excepción o fin normal) y cerrar el visor temporal en cualquier caso
+                    png_pool.shutdown(wait=True, cancel_futures=True)
+                    if temp_ortho_viewer:
+                        try:
+                            temp_ortho_viewer.close()
+                            temp_ortho_viewer.deleteLater()
+                        except Exception as e:
+                            logger.warning("Error limpiando visor temporal: %s", e)
                 
                 # Step 2: Inform if there are more alerts than slots in QPT
                 if screenshots_placed < len(alert_profiles):
-                    print(f"⚠️ AVISO: Quedaron {len(alert_profiles) - screenshots_placed} alertas sin espacio de perfil en el QPT.")
+                    logger.warning("Quedaron %d alertas sin espacio de perfil en el QPT", len(alert_profiles) - screenshots_placed)
             
             # 🆕 LOGICA CONSOLIDADA DE LIMPIEZA DE PÁGINAS (Páginas 3+ / Índices 2+)
             # Esta lógica determina cuántas páginas de alertas se necesitan realmente
@@ -4176,7 +4845,7 @@ class InteractiveProfileViewer(QDialog):
             total_pages_now = page_collection.pageCount()
             
             if start_delete_idx < total_pages_now:
-                print(f"🧹 Limpiando {total_pages_now - start_delete_idx} páginas vacías (desde índice {start_delete_idx})...")
+                logger.debug("Limpiando %d páginas vacías (desde índice %d)", total_pages_now - start_delete_idx, start_delete_idx)
                 # Eliminar en orden inverso para no alterar los índices durante el proceso
                 for page_idx in range(total_pages_now - 1, start_delete_idx - 1, -1):
                     # 1. Eliminar items de la página
@@ -4187,9 +4856,10 @@ class InteractiveProfileViewer(QDialog):
                     
                     # 2. Eliminar página
                     page_collection.deletePage(page_idx)
-                    print(f"   ✅ Página {page_idx + 1} eliminada")
+                    pages_deleted += 1
+                    logger.debug("Página %d eliminada", page_idx + 1)
             else:
-                print(f"📋 No hay páginas que limpiar (Necesarias: {alert_pages_needed}, Actuales: {total_pages_now - first_alert_page_idx} de alertas)")
+                logger.debug("No hay páginas que limpiar (necesarias: %d, actuales: %d de alertas)", alert_pages_needed, total_pages_now - first_alert_page_idx)
             
             if progress.wasCanceled(): return
             progress.setLabelText("Generando gráficos finales...")
@@ -4203,7 +4873,7 @@ class InteractiveProfileViewer(QDialog):
                 report_gen = ReportGenerator(plugin_root, self.profiles_data, self.saved_measurements)
                 
                 chart_path = os.path.join(temp_dir, "longitudinal_profile.png")
-                print(f"📊 Intentando generar gráfico en: {chart_path}")
+                logger.debug("Intentando generar gráfico en: %s", chart_path)
                 
                 if report_gen.generate_longitudinal_chart(chart_path):
                     # Use confirmed ID 'chart'
@@ -4211,16 +4881,13 @@ class InteractiveProfileViewer(QDialog):
                         
                     if chart_item and isinstance(chart_item, QgsLayoutItemPicture):
                         chart_item.setPicturePath(chart_path)
-                        print(f"✅ Gráfico longitudinal inyectado en item '{chart_item.id()}'")
+                        logger.debug("Gráfico longitudinal inyectado en item %s", chart_item.id())
                     else:
-                        print(f"⚠️ Item 'chart' no encontrado o no es Picture. Verifique el Layout.")
-                        logger.warning(f"Chart Item ID 'chart' not found in layout or is not QgsLayoutItemPicture.")
+                        logger.warning("Item 'chart' no encontrado o no es QgsLayoutItemPicture. Verifique el Layout.")
                 else:
-                    print(f"❌ Falló generate_longitudinal_chart (ver logs anteriores)")
+                    logger.error("Falló generate_longitudinal_chart (ver logs anteriores)")
             except Exception as e:
-                print(f"❌ Error crítico generando gráfico: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Error crítico generando gráfico: %s", e)
 
             if progress.wasCanceled(): return
             progress.setLabelText("Exportando a archivo PDF...")
@@ -4235,11 +4902,15 @@ class InteractiveProfileViewer(QDialog):
             QApplication.processEvents()
             
             if result == QgsLayoutExporter.Success:
-                QMessageBox.information(self, "Éxito", f"Reporte PDF generado correctamente en:\n{filename}")
-                try:
-                    os.startfile(filename)
-                except:
-                    pass
+                # Resumen único visible en el panel de mensajes de QGIS
+                QgsMessageLog.logMessage(
+                    f"Reporte PDF: {len(alert_profiles)} alertas, {screenshots_placed} perfiles y "
+                    f"{plantas_placed} plantas inyectados, {pages_deleted} páginas eliminadas -> {filename}",
+                    "Revanchas LT", Qgis.Info
+                )
+                self._last_export_hash = state_hash
+                self._last_pdf_path = filename
+                self._announce_pdf_report(filename)
             else:
                 QMessageBox.critical(self, "Error", "Fallo al exportar el PDF.")
                 
@@ -4254,9 +4925,9 @@ class InteractiveProfileViewer(QDialog):
                 try:
                     import shutil
                     shutil.rmtree(temp_dir)
-                    print(f"🧹 Recursos temporales limpiados: {temp_dir}")
+                    logger.debug("Recursos temporales limpiados: %s", temp_dir)
                 except Exception as e:
-                    print(f"⚠️ Error limpiando temporales: {e}")
+                    logger.warning("Error limpiando temporales: %s", e)
 
     def generate_dev_map(self):
         """🆕 Método DEV para probar generación de mapas rápidamente"""